@@ -5,87 +5,105 @@ Step 1: Random Baseline
 Establishes a baseline by calculating metrics with randomly shuffled ordinal positions.
 This gives us a reference point to measure optimization improvements against.
 
+The graph comes from the cached snapshot (see stage_cache.py), and the
+whole step is skipped when a cached output matches the snapshot, config and
+code version.
+
 Usage:
     python scripts/01-random-baseline.py
+    python scripts/01-random-baseline.py --refresh
 """
 
-import os
+import argparse
 import random
 from datetime import datetime
+from pathlib import Path
 
 from optimization_utils import (
-    get_supabase_client,
-    fetch_top_actors,
-    fetch_connections,
-    deduplicate_edges,
-    calculate_vogel_position,
-    calculate_metrics,
+    OUTPUT_DIR,
+    Metrics,
+    graph_limit,
     save_step_output,
     append_to_progress,
     print_header,
     print_metrics,
 )
+from graph_core import GraphCore, peak_rss_mb
+from stage_cache import (
+    add_cache_arguments,
+    load_graph_snapshot,
+    restore_cached_stage,
+    stage_fingerprint,
+    store_stage,
+)
+
+RANDOM_SEED = 42
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Step 1: random baseline')
+    add_cache_arguments(parser)
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
+
     print_header('STEP 1: RANDOM BASELINE')
 
     # Set random seed for reproducibility (optional - remove for true randomness)
-    random.seed(42)
+    random.seed(RANDOM_SEED)
 
-    # Initialize Supabase client
-    supabase = get_supabase_client()
-
-    # Fetch top actors (uses VITE_GRAPH_LIMIT from .env)
-    actors = fetch_top_actors(supabase, int(os.getenv('VITE_GRAPH_LIMIT', '100')))
-
-    # Create actor ID set and list
+    # Top actors (VITE_GRAPH_LIMIT from .env) and their deduplicated edges
+    actors, edges, snapshot = load_graph_snapshot(graph_limit(), refresh=args.refresh)
     actor_ids = [a['person_id'] for a in actors]
-    actor_id_set = set(actor_ids)
 
-    # Fetch and deduplicate connections
-    connections = fetch_connections(supabase, actor_ids)
-    edges = deduplicate_edges(connections, actor_id_set)
+    config = {'num_actors': len(actors), 'random_seed': RANDOM_SEED}
+    fingerprint = stage_fingerprint('01-random-baseline', snapshot, config, Path(__file__))
+    cached = restore_cached_stage(fingerprint, '01-random-baseline', args.no_cache)
+    if cached:
+        print_metrics(Metrics(**cached['metrics']), 'Random Baseline Metrics (cached)')
+        print()
+        print('Run Step 2 next: python scripts/02-centrality-ordering.py')
+        return
+
+    # Graph core over the fetched actors (dense index = fetch order)
+    core = GraphCore.from_edges(actor_ids, edges)
 
     # Create random ordinal assignment (shuffle positions 0-99)
     ordinal_positions = list(range(len(actors)))
     random.shuffle(ordinal_positions)
 
     # Assign random ordinals and calculate Vogel positions
-    actor_ordinals = {}  # actor_id -> ordinal
-    positions = {}  # actor_id -> (x, y)
-
-    for i, actor in enumerate(actors):
-        actor_id = actor['person_id']
-        ordinal = ordinal_positions[i]
-        actor_ordinals[actor_id] = ordinal
-        positions[actor_id] = calculate_vogel_position(ordinal)
+    core.place_on_slots(ordinal_positions)
 
     # Calculate metrics
-    metrics = calculate_metrics(positions, edges)
+    metrics = core.metrics()
 
     # Print results
     print_metrics(metrics, 'Random Baseline Metrics')
 
+    peak_rss = peak_rss_mb()
+    xs, ys = core.xs.tolist(), core.ys.tolist()
+
     # Save output
     output_data = {
         'step': 'Step 1: Random Baseline',
         'timestamp': datetime.now().isoformat(),
-        'config': {
-            'num_actors': len(actors),
-            'random_seed': 42,
-        },
+        'config': config,
+        'graph_snapshot': snapshot,
         'metrics': metrics.to_dict(),
+        'peak_rss_mb': round(peak_rss, 1),
         'actors': [
             {
                 'person_id': a['person_id'],
                 'name': a['name'],
                 'recognizability': a['Recognizability'],
-                'ordinal': actor_ordinals[a['person_id']],
-                'x': positions[a['person_id']][0],
-                'y': positions[a['person_id']][1],
+                'ordinal': ordinal_positions[i],
+                'x': xs[i],
+                'y': ys[i],
             }
-            for a in actors
+            for i, a in enumerate(actors)
         ],
         'edges': [
             {'source': e[0], 'target': e[1]}
@@ -94,14 +112,16 @@ def main():
     }
 
     save_step_output('01-random-baseline', output_data)
+    store_stage(fingerprint, '01-random-baseline', [OUTPUT_DIR / '01-random-baseline.json'])
 
     # Append to progress file
     append_to_progress(
         'Step 1: Random Baseline',
         metrics,
         extra_info={
-            'Random seed': 42,
+            'Random seed': RANDOM_SEED,
             'Description': 'Baseline with randomly shuffled ordinal positions',
+            'Peak RSS': f'{peak_rss:.0f} MB',
         }
     )
 
@@ -109,6 +129,7 @@ def main():
     print(f'Actors: {len(actors)}')
     print(f'Edges: {len(edges)}')
     print(f'Avg edge distance: {metrics.avg_distance:.2f}')
+    print(f'Peak RSS: {peak_rss:.0f} MB')
     print()
     print('Run Step 2 next: python scripts/02-centrality-ordering.py')
 
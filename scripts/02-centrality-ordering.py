@@ -3,24 +3,34 @@
 Step 2: Centrality Ordering
 
 Places most highly-connected actors in the center of the Vogel layout.
-Actors are sorted by degree (connection count) and assigned ordinal positions
-with highest degree actors getting the center positions.
+Actors are sorted by a centrality measure and assigned ordinal positions
+with the most central actors getting the center positions.
+
+Orderings:
+- degree_descending: connection count (default)
+- closeness_descending: sampled closeness centrality (see centrality.py)
+- force_directed: Barnes-Hut force-directed layout snapped onto the Vogel
+  slots (see force_layout.py), seeded with the degree ordering
+
+The graph comes from the cached snapshot, and the step is skipped when a
+cached output matches the snapshot, options and code version (see
+stage_cache.py).
 
 Usage:
     python scripts/02-centrality-ordering.py
+    python scripts/02-centrality-ordering.py --ordering closeness_descending
+    python scripts/02-centrality-ordering.py --ordering force_directed
 """
 
-from collections import defaultdict
 from datetime import datetime
-import os
+from pathlib import Path
+import argparse
+import time
+from typing import Optional
 
 from optimization_utils import (
-    get_supabase_client,
-    fetch_top_actors,
-    fetch_connections,
-    deduplicate_edges,
-    calculate_vogel_position,
-    calculate_metrics,
+    OUTPUT_DIR,
+    graph_limit,
     save_step_output,
     load_step_output,
     append_to_progress,
@@ -28,34 +38,72 @@ from optimization_utils import (
     print_metrics,
     Metrics,
 )
+from centrality import estimate_centrality, DEFAULT_PIVOTS
+from graph_core import GraphCore, peak_rss_mb
+from force_layout import force_directed_ordering, DEFAULT_ITERATIONS as DEFAULT_FORCE_ITERATIONS
+from stage_cache import (
+    add_cache_arguments,
+    load_graph_snapshot,
+    restore_cached_stage,
+    stage_fingerprint,
+    store_stage,
+)
 
+ORDERINGS = {
+    'degree_descending': 'By degree (connection count), descending',
+    'closeness_descending': 'By sampled closeness centrality, descending',
+    'force_directed': 'Force-directed layout snapped onto Vogel slots',
+}
 
-def calculate_degrees(edges: list[tuple[int, int]], actor_ids: list[int]) -> dict[int, int]:
-    """
-    Calculate the degree (connection count) for each actor.
 
-    Args:
-        edges: List of (actor_id_1, actor_id_2) tuples
-        actor_ids: List of all actor IDs
+def compute_ordering(actor_ids: list[int], edges: list[tuple[int, int]], core: GraphCore,
+                     args: argparse.Namespace) -> tuple[list[int], list[float], Optional[dict]]:
+    """
+    Order actors from the center outwards by the measure chosen in `args`.
 
     Returns:
-        Dict mapping actor_id to degree
+        (dense indices in slot order, per-actor scores, centrality estimate
+        info for closeness_descending or None)
     """
-    degree = defaultdict(int)
-
-    # Initialize all actors with 0 degree
-    for actor_id in actor_ids:
-        degree[actor_id] = 0
-
-    # Count connections
-    for source_id, target_id in edges:
-        degree[source_id] += 1
-        degree[target_id] += 1
-
-    return dict(degree)
+    # Sort actors by the chosen measure (descending) - most central gets center position
+    scores = [float(degree) for degree in core.degrees.tolist()]
+    centrality_info = None
+    if args.ordering == 'closeness_descending':
+        print(f'Estimating closeness centrality from {args.pivots} pivots...')
+        estimate = estimate_centrality(actor_ids, edges, num_pivots=args.pivots, core=core)
+        scores = estimate.closeness
+        centrality_info = estimate.to_dict()
+        print(f"Estimated in {estimate.elapsed_seconds:.2f}s (median relative error "
+              f"±{centrality_info['median_relative_error'] or 0:.1%}, rank stability "
+              f"{centrality_info['rank_stability'] or 0:.3f})")
+
+    # Ties (e.g. equal degree) keep Recognizability order from the fetch
+    order = sorted(range(len(actor_ids)), key=lambda i: scores[i], reverse=True)
+
+    if args.ordering == 'force_directed':
+        print(f'Running force-directed layout ({args.force_iterations} iterations)...')
+        start_time = time.time()
+        order = force_directed_ordering(core, iterations=args.force_iterations, initial_order=order)
+        print(f'Laid out and snapped in {time.time() - start_time:.2f}s')
+
+    return order, scores, centrality_info
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Step 2: centrality ordering')
+    parser.add_argument('--ordering', choices=sorted(ORDERINGS), default='degree_descending',
+                        help='Measure used to order actors from the center outwards')
+    parser.add_argument('--pivots', type=int, default=DEFAULT_PIVOTS,
+                        help=f'Pivot BFS runs for closeness_descending (default {DEFAULT_PIVOTS})')
+    parser.add_argument('--force-iterations', type=int, default=DEFAULT_FORCE_ITERATIONS,
+                        help=f'Simulation steps for force_directed (default {DEFAULT_FORCE_ITERATIONS})')
+    add_cache_arguments(parser)
+    return parser.parse_args(argv)
 
 
 def main():
+    args = parse_args()
+
     print_header('STEP 2: CENTRALITY ORDERING')
 
     # Load baseline metrics for comparison
@@ -67,37 +115,37 @@ def main():
         print('Warning: Could not load baseline metrics from Step 1')
         baseline_metrics = None
 
-    # Initialize Supabase client
-    supabase = get_supabase_client()
-
-    # Fetch top actors using VITE_GRAPH_LIMIT from environment
-    actors = fetch_top_actors(supabase, limit=int(os.getenv('VITE_GRAPH_LIMIT')))
-
-    # Create actor ID set and list
+    # Top actors (VITE_GRAPH_LIMIT from environment) and their deduplicated edges
+    actors, edges, snapshot = load_graph_snapshot(graph_limit(), refresh=args.refresh)
     actor_ids = [a['person_id'] for a in actors]
-    actor_id_set = set(actor_ids)
-  
-    # Fetch and deduplicate connections
-    connections = fetch_connections(supabase, actor_ids)
-    edges = deduplicate_edges(connections, actor_id_set)
 
-    # Calculate degree for each actor
-    degrees = calculate_degrees(edges, actor_ids)
-
-    # Sort actors by degree (descending) - highest degree gets center position
-    actors_by_degree = sorted(actors, key=lambda a: degrees[a['person_id']], reverse=True)
+    fingerprint = stage_fingerprint('02-centrality-ordering', snapshot, {
+        'num_actors': len(actors),
+        'ordering': args.ordering,
+        'pivots': args.pivots if args.ordering == 'closeness_descending' else None,
+        'force_iterations': args.force_iterations if args.ordering == 'force_directed' else None,
+    }, Path(__file__))
+    cached = restore_cached_stage(fingerprint, '02-centrality-ordering', args.no_cache)
+    if cached:
+        print_metrics(Metrics(**cached['metrics']), 'Centrality Ordering Metrics (cached)')
+        print()
+        print('Run Step 3 next: python scripts/03-swap-optimization.py')
+        return
+
+    # Graph core over the fetched actors (dense index = fetch order)
+    core = GraphCore.from_edges(actor_ids, edges)
+    degrees = core.degrees.tolist()
+
+    order, scores, centrality_info = compute_ordering(actor_ids, edges, core, args)
 
     # Assign ordinal positions: highest degree -> position 0 (center)
-    actor_ordinals = {}  # actor_id -> ordinal
-    positions = {}  # actor_id -> (x, y)
-
-    for ordinal, actor in enumerate(actors_by_degree):
-        actor_id = actor['person_id']
-        actor_ordinals[actor_id] = ordinal
-        positions[actor_id] = calculate_vogel_position(ordinal)
+    ordinals = [0] * len(actors)
+    for ordinal, i in enumerate(order):
+        ordinals[i] = ordinal
+    core.place_on_slots(ordinals)
 
     # Calculate metrics
-    metrics = calculate_metrics(positions, edges)
+    metrics = core.metrics()
 
     # Print results
     print_metrics(metrics, 'Centrality Ordering Metrics')
@@ -107,12 +155,18 @@ def main():
                        / baseline_metrics.avg_distance * 100)
         print(f'\nImprovement vs baseline: {improvement:.1f}%')
 
-    # Print top 10 actors by degree
-    print('\nTop 10 actors by degree (connections):')
+    # Print top 10 actors by the chosen ordering
+    print(f'\nTop 10 actors ({args.ordering}):')
     print('-' * 50)
-    for i, actor in enumerate(actors_by_degree[:10]):
-        actor_id = actor['person_id']
-        print(f"  {i+1}. {actor['name']}: {degrees[actor_id]} connections")
+    for rank, i in enumerate(order[:10]):
+        if args.ordering == 'closeness_descending':
+            print(f"  {rank+1}. {actors[i]['name']}: closeness {scores[i]:.4f}, "
+                  f"{degrees[i]} connections")
+        else:
+            print(f"  {rank+1}. {actors[i]['name']}: {degrees[i]} connections")
+
+    peak_rss = peak_rss_mb()
+    xs, ys = core.xs.tolist(), core.ys.tolist()
 
     # Save output
     output_data = {
@@ -120,20 +174,24 @@ def main():
         'timestamp': datetime.now().isoformat(),
         'config': {
             'num_actors': len(actors),
-            'ordering': 'degree_descending',
+            'ordering': args.ordering,
+            'centrality': centrality_info,
+            'force_iterations': args.force_iterations if args.ordering == 'force_directed' else None,
         },
+        'graph_snapshot': snapshot,
         'metrics': metrics.to_dict(),
+        'peak_rss_mb': round(peak_rss, 1),
         'actors': [
             {
                 'person_id': a['person_id'],
                 'name': a['name'],
                 'recognizability': a['Recognizability'],
-                'degree': degrees[a['person_id']],
-                'ordinal': actor_ordinals[a['person_id']],
-                'x': positions[a['person_id']][0],
-                'y': positions[a['person_id']][1],
+                'degree': degrees[i],
+                'ordinal': ordinals[i],
+                'x': xs[i],
+                'y': ys[i],
             }
-            for a in actors
+            for i, a in enumerate(actors)
         ],
         'edges': [
             {'source': e[0], 'target': e[1]}
@@ -142,14 +200,16 @@ def main():
     }
 
     save_step_output('02-centrality-ordering', output_data)
+    store_stage(fingerprint, '02-centrality-ordering', [OUTPUT_DIR / '02-centrality-ordering.json'])
 
     # Append to progress file
     append_to_progress(
         'Step 2: Centrality Ordering',
         metrics,
         extra_info={
-            'Ordering': 'By degree (connection count), descending',
-            'Top actor': f"{actors_by_degree[0]['name']} ({degrees[actors_by_degree[0]['person_id']]} connections)",
+            'Ordering': ORDERINGS[args.ordering],
+            'Top actor': f"{actors[order[0]]['name']} ({degrees[order[0]]} connections)",
+            'Peak RSS': f'{peak_rss:.0f} MB',
         },
         baseline_metrics=baseline_metrics,
     )
@@ -160,6 +220,7 @@ def main():
     print(f'Avg edge distance: {metrics.avg_distance:.2f}')
     if baseline_metrics:
         print(f'Improvement vs baseline: {improvement:.1f}%')
+    print(f'Peak RSS: {peak_rss:.0f} MB')
     print()
     print('Run Step 3 next: python scripts/03-swap-optimization.py')
 
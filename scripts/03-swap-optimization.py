@@ -6,146 +6,593 @@ Iteratively swaps pairs of nodes to reduce total edge distance.
 Stops when no improvement is found for a specified number of consecutive attempts.
 
 Uses efficient delta calculation - only recalculates distances for edges
-affected by the swap, not the entire graph.
+affected by the swap, not the entire graph.  Each actor's contribution is
+cached and updated incrementally on accepted swaps, and proposals favour
+actors with high contribution ("tension").
+
+The step is skipped when a cached output matches the Step 2 actors/edges,
+the options and the code version (see stage_cache.py).
 
 Usage:
     python scripts/03-swap-optimization.py
+    python scripts/03-swap-optimization.py --budget 300 --min-rate 0.01
 """
 
+import argparse
+import math
 import random
 import time
 from datetime import datetime
-from collections import defaultdict
+from pathlib import Path
+from typing import Optional
 
 from optimization_utils import (
-    calculate_metrics,
+    OUTPUT_DIR,
     save_step_output,
     load_step_output,
     append_to_progress,
     print_header,
     print_metrics,
-    euclidean_distance,
     generate_graph_json,
     Metrics,
+    SlotGrid,
+)
+from components import plan_components
+from graph_core import GraphCore, peak_rss_mb
+from core_pruning import prune_for_optimization, reattach_peeled
+from parallel_swap import run_parallel_swap_optimization
+from slot_distances import TABLE_BUDGET_MB, flat_view, load_slot_distance_table, positions_on_slots
+from run_controller import (
+    RunController,
+    add_controller_arguments,
+    controller_from_args,
+    DEFAULT_CHECK_INTERVAL,
 )
+from stage_cache import add_cache_arguments, content_hash, restore_cached_stage, stage_fingerprint, store_stage
 
-# Configuration
+# Configuration (defaults; override on the command line)
 STAGNATION_THRESHOLD = 10000  # Stop after this many consecutive non-improving swaps
 MAX_ITERATIONS = 15000000  # Safety limit (~5 min at typical throughput)
 RANDOM_SEED = 42  # For reproducibility
+TENSION_PROPOSAL_RATE = 0.8  # Share of proposals whose first actor is drawn by tension
+MOVE_PROBABILITIES = {'swap': 1.0, 'cycle3': 0.0, 'chain': 0.0, 'block': 0.0}  # Compound moves are opt-in via --move-mix
+CHAIN_LENGTH = 3  # Actors rotated by a neighbour-chain move
+BLOCK_SIZE = 4  # Adjacent slots shifted together by a block move
+SLOT_NEIGHBOR_COUNT = 8  # Nearest slots considered adjacent to a slot
+PARALLEL_WORKERS = 1  # >1 enables sector-parallel refinement (see parallel_swap.py)
 
 
-def build_adjacency(edges: list[tuple[int, int]]) -> dict[int, set[int]]:
+def calculate_actor_contribution(
+    i: int,
+    x: float,
+    y: float,
+    xs: list[float],
+    ys: list[float],
+    adjacency: list[list[int]],
+    partner: int = -1
+) -> float:
     """
-    Build adjacency list from edges.
+    Calculate total edge distance contribution for actor i placed at (x, y).
 
-    Returns dict mapping actor_id to set of connected actor_ids.
+    This is the sum of distances to all connected actors.  If `partner` is
+    given, that neighbour is treated as sitting at actor i's current position
+    (i.e. the two have swapped places).
     """
-    adj = defaultdict(set)
-    for source, target in edges:
-        adj[source].add(target)
-        adj[target].add(source)
-    return dict(adj)
+    total = 0.0
+    for n in adjacency[i]:
+        if n == partner:
+            total += math.hypot(xs[i] - x, ys[i] - y)
+        else:
+            total += math.hypot(xs[n] - x, ys[n] - y)
+    return total
 
 
-def calculate_actor_contribution(
-    actor_id: int,
-    positions: dict[int, tuple[float, float]],
-    adjacency: dict[int, set[int]]
-) -> float:
+class TensionSampler:
     """
-    Calculate total edge distance contribution for a single actor.
+    Fenwick (binary indexed) tree over per-actor tension.
 
-    This is the sum of distances to all connected actors.
+    Supports O(log n) updates and O(log n) sampling of an actor with
+    probability proportional to its tension.  Actors marked inactive (e.g.
+    frozen) keep zero weight and are never sampled.
     """
-    if actor_id not in adjacency:
-        return 0.0
 
-    x1, y1 = positions[actor_id]
-    total = 0.0
-
-    for neighbor_id in adjacency[actor_id]:
-        x2, y2 = positions[neighbor_id]
-        total += euclidean_distance(x1, y1, x2, y2)
-
-    return total
+    def __init__(self, weights: list[float], active: Optional[list[bool]] = None):
+        self.size = len(weights)
+        self.active = active
+        self.weights = [0.0] * self.size
+        self.tree = [0.0] * (self.size + 1)
+        self.top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+        for i, weight in enumerate(weights):
+            self.update(i, weight)
+
+    @property
+    def total(self) -> float:
+        total = 0.0
+        k = self.size
+        while k > 0:
+            total += self.tree[k]
+            k -= k & -k
+        return total
+
+    def update(self, i: int, weight: float):
+        """Set the tension of actor i."""
+        if self.active is not None and not self.active[i]:
+            return
+        change = weight - self.weights[i]
+        self.weights[i] = weight
+        k = i + 1
+        while k <= self.size:
+            self.tree[k] += change
+            k += k & -k
+
+    def sample(self, rng: random.Random) -> int:
+        """Draw an actor index with probability proportional to its tension."""
+        target = rng.random() * self.total
+        pos = 0
+        bit = self.top_bit
+        while bit:
+            nxt = pos + bit
+            if nxt <= self.size and self.tree[nxt] < target:
+                pos = nxt
+                target -= self.tree[nxt]
+            bit >>= 1
+        return min(pos, self.size - 1)
 
 
 def try_swap(
-    actor_i: int,
-    actor_j: int,
-    positions: dict[int, tuple[float, float]],
-    adjacency: dict[int, set[int]]
-) -> float:
+    i: int,
+    j: int,
+    xs: list[float],
+    ys: list[float],
+    adjacency: list[list[int]],
+    contributions: list[float]
+) -> tuple[float, float, float]:
     """
     Calculate the change in total distance if we swap positions of actors i and j.
 
-    Returns the delta (negative means improvement).
+    Current contributions come from the cache, so only the two post-swap
+    contributions are evaluated.  An edge between i and j keeps its length
+    under a swap and appears on both sides, so it cancels out.
+
+    Returns:
+        (delta, new contribution of i, new contribution of j)
+        Negative delta means improvement.
+    """
+    new_i = calculate_actor_contribution(i, xs[j], ys[j], xs, ys, adjacency, partner=j)
+    new_j = calculate_actor_contribution(j, xs[i], ys[i], xs, ys, adjacency, partner=i)
+    return new_i + new_j - contributions[i] - contributions[j], new_i, new_j
+
+
+def apply_swap(
+    i: int,
+    j: int,
+    new_i: float,
+    new_j: float,
+    xs: list[float],
+    ys: list[float],
+    adjacency: list[list[int]],
+    contributions: list[float],
+    sampler: TensionSampler
+):
+    """
+    Swap actors i and j and update cached contributions incrementally.
+
+    Only i, j and their neighbours change: each neighbour's contribution is
+    adjusted by the change in length of its edge to the moved actor.
     """
-    # Calculate current contributions
-    old_contrib_i = calculate_actor_contribution(actor_i, positions, adjacency)
-    old_contrib_j = calculate_actor_contribution(actor_j, positions, adjacency)
+    xi, yi, xj, yj = xs[i], ys[i], xs[j], ys[j]
+
+    for moved, old_x, old_y, new_x, new_y, other in ((i, xi, yi, xj, yj, j), (j, xj, yj, xi, yi, i)):
+        for n in adjacency[moved]:
+            if n == other:
+                continue
+            contributions[n] += (math.hypot(xs[n] - new_x, ys[n] - new_y)
+                                 - math.hypot(xs[n] - old_x, ys[n] - old_y))
+            sampler.update(n, contributions[n])
+
+    xs[i], xs[j] = xj, xi
+    ys[i], ys[j] = yj, yi
+    contributions[i] = new_i
+    contributions[j] = new_j
+    sampler.update(i, new_i)
+    sampler.update(j, new_j)
+
+
+def try_move(
+    moves: dict[int, tuple[float, float]],
+    xs: list[float],
+    ys: list[float],
+    adjacency: list[list[int]],
+    contributions: list[float]
+) -> tuple[float, dict[int, float]]:
+    """
+    Calculate the change in total distance for a compound move.
+
+    Args:
+        moves: Dict mapping each moved actor to its new (x, y)
 
-    # Handle shared edge (if i and j are connected, it's counted twice)
-    shared_edge_adjustment = 0.0
-    if actor_j in adjacency.get(actor_i, set()):
-        x_i, y_i = positions[actor_i]
-        x_j, y_j = positions[actor_j]
-        shared_edge_adjustment = euclidean_distance(x_i, y_i, x_j, y_j)
+    Edges between two moved actors appear in both endpoints' contributions,
+    so half of their change is taken back out of the sum.
 
-    old_total = old_contrib_i + old_contrib_j - shared_edge_adjustment
+    Returns:
+        (delta, dict of new contributions for the moved actors)
+        Negative delta means improvement.
+    """
+    new_contribs = {}
+    delta = 0.0
+    for a, (x, y) in moves.items():
+        total = 0.0
+        internal_change = 0.0
+        for n in adjacency[a]:
+            if n in moves:
+                nx, ny = moves[n]
+                length = math.hypot(nx - x, ny - y)
+                internal_change += length - math.hypot(xs[n] - xs[a], ys[n] - ys[a])
+            else:
+                length = math.hypot(xs[n] - x, ys[n] - y)
+            total += length
+        new_contribs[a] = total
+        delta += total - contributions[a] - internal_change / 2
+    return delta, new_contribs
+
+
+def apply_move(
+    moves: dict[int, tuple[float, float]],
+    new_contribs: dict[int, float],
+    xs: list[float],
+    ys: list[float],
+    adjacency: list[list[int]],
+    contributions: list[float],
+    sampler: TensionSampler
+):
+    """Apply a compound move and update cached contributions incrementally."""
+    for a, (x, y) in moves.items():
+        for n in adjacency[a]:
+            if n in moves:
+                continue
+            contributions[n] += (math.hypot(xs[n] - x, ys[n] - y)
+                                 - math.hypot(xs[n] - xs[a], ys[n] - ys[a]))
+            sampler.update(n, contributions[n])
+
+    for a, (x, y) in moves.items():
+        xs[a], ys[a] = x, y
+        contributions[a] = new_contribs[a]
+        sampler.update(a, new_contribs[a])
+
+
+def table_contribution(
+    i: int,
+    slot: int,
+    slots: list[int],
+    adjacency: list[list[int]],
+    dist: memoryview,
+    stride: int,
+    partner: int = -1
+) -> float:
+    """
+    calculate_actor_contribution over a precomputed slot distance table.
 
-    # Temporarily swap positions
-    positions[actor_i], positions[actor_j] = positions[actor_j], positions[actor_i]
+    `dist` is the table's flat view (see slot_distances.py): the distance
+    between slots s and t is dist[s * stride + t].
+    """
+    base = slot * stride
+    total = 0.0
+    for n in adjacency[i]:
+        if n == partner:
+            total += dist[base + slots[i]]
+        else:
+            total += dist[base + slots[n]]
+    return total
 
-    # Calculate new contributions
-    new_contrib_i = calculate_actor_contribution(actor_i, positions, adjacency)
-    new_contrib_j = calculate_actor_contribution(actor_j, positions, adjacency)
 
-    # Handle shared edge again
-    if actor_j in adjacency.get(actor_i, set()):
-        x_i, y_i = positions[actor_i]
-        x_j, y_j = positions[actor_j]
-        shared_edge_adjustment = euclidean_distance(x_i, y_i, x_j, y_j)
+def try_swap_table(
+    i: int,
+    j: int,
+    slots: list[int],
+    adjacency: list[list[int]],
+    contributions: list[float],
+    dist: memoryview,
+    stride: int
+) -> tuple[float, float, float]:
+    """try_swap with edge lengths looked up in the slot distance table."""
+    new_i = table_contribution(i, slots[j], slots, adjacency, dist, stride, partner=j)
+    new_j = table_contribution(j, slots[i], slots, adjacency, dist, stride, partner=i)
+    return new_i + new_j - contributions[i] - contributions[j], new_i, new_j
+
+
+def apply_swap_table(
+    i: int,
+    j: int,
+    new_i: float,
+    new_j: float,
+    xs: list[float],
+    ys: list[float],
+    slots: list[int],
+    adjacency: list[list[int]],
+    contributions: list[float],
+    sampler: TensionSampler,
+    dist: memoryview,
+    stride: int
+):
+    """apply_swap with edge lengths looked up in the slot distance table."""
+    si, sj = slots[i], slots[j]
+
+    for moved, old_slot, new_slot, other in ((i, si, sj, j), (j, sj, si, i)):
+        for n in adjacency[moved]:
+            if n == other:
+                continue
+            base = slots[n] * stride
+            contributions[n] += dist[base + new_slot] - dist[base + old_slot]
+            sampler.update(n, contributions[n])
+
+    xs[i], xs[j] = xs[j], xs[i]
+    ys[i], ys[j] = ys[j], ys[i]
+    contributions[i] = new_i
+    contributions[j] = new_j
+    sampler.update(i, new_i)
+    sampler.update(j, new_j)
+
+
+def try_move_table(
+    slot_moves: dict[int, int],
+    slots: list[int],
+    adjacency: list[list[int]],
+    contributions: list[float],
+    dist: memoryview,
+    stride: int
+) -> tuple[float, dict[int, float]]:
+    """try_move over slots, with edge lengths looked up in the slot distance table."""
+    new_contribs = {}
+    delta = 0.0
+    for a, slot in slot_moves.items():
+        base = slot * stride
+        old_base = slots[a] * stride
+        total = 0.0
+        internal_change = 0.0
+        for n in adjacency[a]:
+            if n in slot_moves:
+                length = dist[base + slot_moves[n]]
+                internal_change += length - dist[old_base + slots[n]]
+            else:
+                length = dist[base + slots[n]]
+            total += length
+        new_contribs[a] = total
+        delta += total - contributions[a] - internal_change / 2
+    return delta, new_contribs
+
+
+def apply_move_table(
+    slot_moves: dict[int, int],
+    new_contribs: dict[int, float],
+    xs: list[float],
+    ys: list[float],
+    slot_x: list[float],
+    slot_y: list[float],
+    slots: list[int],
+    adjacency: list[list[int]],
+    contributions: list[float],
+    sampler: TensionSampler,
+    dist: memoryview,
+    stride: int
+):
+    """apply_move over slots, with edge lengths looked up in the slot distance table."""
+    for a, slot in slot_moves.items():
+        for n in adjacency[a]:
+            if n in slot_moves:
+                continue
+            base = slots[n] * stride
+            contributions[n] += dist[base + slot] - dist[base + slots[a]]
+            sampler.update(n, contributions[n])
+
+    for a, slot in slot_moves.items():
+        xs[a], ys[a] = slot_x[slot], slot_y[slot]
+        contributions[a] = new_contribs[a]
+        sampler.update(a, new_contribs[a])
+
+
+def propose_cycle(actors_in_cycle: list[int], slots: list[int]) -> Optional[dict[int, int]]:
+    """Rotate slots along a cycle: each actor takes the next actor's slot."""
+    if len(set(actors_in_cycle)) != len(actors_in_cycle):
+        return None
+    return {
+        a: slots[actors_in_cycle[(k + 1) % len(actors_in_cycle)]]
+        for k, a in enumerate(actors_in_cycle)
+    }
 
-    new_total = new_contrib_i + new_contrib_j - shared_edge_adjustment
 
-    # Swap back
-    positions[actor_i], positions[actor_j] = positions[actor_j], positions[actor_i]
+def propose_chain(
+    start: int,
+    rng: random.Random,
+    slots: list[int],
+    occupant: list[int],
+    adjacency: list[list[int]],
+    slot_neighbors: list[list[int]]
+) -> Optional[dict[int, int]]:
+    """
+    Neighbour-chain move.
 
-    return new_total - old_total
+    Walks CHAIN_LENGTH actors: each next actor is the occupant of a slot next
+    to a random neighbour of the previous one.  Rotating slots along the chain
+    moves every actor onto a slot beside one of its neighbours.
+    """
+    chain = [start]
+    current = start
+    for _ in range(CHAIN_LENGTH - 1):
+        if not adjacency[current]:
+            return None
+        anchor = rng.choice(adjacency[current])
+        current = occupant[rng.choice(slot_neighbors[slots[anchor]])]
+        chain.append(current)
+    return propose_cycle(chain, slots)
+
+
+def propose_block(
+    start: int,
+    xs: list[float],
+    ys: list[float],
+    slots: list[int],
+    occupant: list[int],
+    adjacency: list[list[int]],
+    slot_neighbors: list[list[int]],
+    slot_grid: SlotGrid
+) -> Optional[dict[int, int]]:
+    """
+    Block move.
+
+    Takes the tight group of BLOCK_SIZE adjacent slots around `start` and
+    exchanges it with the equally sized group around the slot nearest the
+    centroid of the group's neighbours.  Slots are paired by their rank in
+    distance from each block's center, so the group keeps its rough shape.
+    """
+    source_block = [slots[start]] + slot_neighbors[slots[start]][:BLOCK_SIZE - 1]
+    members = [occupant[s] for s in source_block]
+    member_set = set(members)
+
+    outside = [n for a in members for n in adjacency[a] if n not in member_set]
+    if not outside:
+        return None
+    cx = sum(xs[n] for n in outside) / len(outside)
+    cy = sum(ys[n] for n in outside) / len(outside)
+
+    target = slot_grid.nearest(cx, cy, 1)[0]
+    target_block = [target] + slot_neighbors[target][:BLOCK_SIZE - 1]
+    if len(target_block) != len(source_block) or set(target_block) & set(source_block):
+        return None
+
+    moves = {}
+    for source_slot, target_slot in zip(source_block, target_block):
+        moves[occupant[source_slot]] = target_slot
+        moves[occupant[target_slot]] = source_slot
+    return moves
+
+
+def parse_move_mix(spec: str) -> dict[str, float]:
+    """Parse 'swap=0.85,cycle3=0.05,...' into normalised move probabilities."""
+    mix = {}
+    for part in spec.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in MOVE_PROBABILITIES:
+            raise ValueError(f'Unknown move type: {name} (expected one of {", ".join(MOVE_PROBABILITIES)})')
+        mix[name] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError('Move probabilities must sum to a positive value')
+    return {name: weight / total for name, weight in mix.items()}
 
 
 def run_swap_optimization(
     actors: list[dict],
     edges: list[tuple[int, int]],
     initial_positions: dict[int, tuple[float, float]],
-    initial_ordinals: dict[int, int]
+    initial_ordinals: dict[int, int],
+    stagnation_threshold: int = STAGNATION_THRESHOLD,
+    max_iterations: int = MAX_ITERATIONS,
+    seed: int = RANDOM_SEED,
+    controller: Optional[RunController] = None,
+    move_mix: Optional[dict[str, float]] = None,
+    frozen: Optional[set[int]] = None,
+    distance_table_mb: float = TABLE_BUDGET_MB
 ) -> tuple[dict[int, tuple[float, float]], dict[int, int], dict]:
     """
     Run the swap optimization algorithm.
 
+    The first actor of each proposal is drawn from a tension-weighted sampler
+    (tension = cached edge distance contribution) with probability
+    TENSION_PROPOSAL_RATE, otherwise uniformly.  The second is always uniform.
+
+    Besides two-actor swaps, compound moves (3-cycles, neighbour chains and
+    block exchanges) are mixed in according to `move_mix`; all of them are
+    evaluated with the same incremental delta.
+
+    When every actor sits on its Vogel slot and the slot-to-slot distance
+    table fits `distance_table_mb` (see slot_distances.py), edge lengths are
+    looked up in the memory-mapped table instead of computed with hypot.
+
+    Args:
+        actors: List of actor dicts with person_id
+        edges: List of (actor_id_1, actor_id_2) tuples
+        initial_positions: Dict mapping actor_id to (x, y)
+        initial_ordinals: Dict mapping actor_id to ordinal
+        stagnation_threshold: Stop after this many consecutive non-improving swaps
+        max_iterations: Safety limit on proposals
+        seed: Random seed
+        controller: Optional run controller (budget / target / rate cutoffs)
+        move_mix: Probability of each move type (defaults to MOVE_PROBABILITIES)
+        frozen: Optional set of actor_ids that keep their slots
+        distance_table_mb: Memory budget for the slot distance table (0 = off)
+
     Returns:
         - Final positions dict
         - Final ordinals dict
         - Stats dict with convergence information
     """
-    random.seed(RANDOM_SEED)
-
-    # Copy initial state
-    positions = dict(initial_positions)
-    ordinals = dict(initial_ordinals)
-
-    # Build adjacency list for efficient neighbor lookups
-    adjacency = build_adjacency(edges)
+    rng = random.Random(seed)
 
     actor_ids = [a['person_id'] for a in actors]
-
-    # Calculate initial total distance
-    total_distance = sum(
-        euclidean_distance(*positions[e[0]], *positions[e[1]])
-        for e in edges
-    )
+    n = len(actor_ids)
+
+    # Copy initial state into dense arrays
+    xs = [initial_positions[a][0] for a in actor_ids]
+    ys = [initial_positions[a][1] for a in actor_ids]
+    slots = [initial_ordinals[a] for a in actor_ids]
+
+    # Adjacency lists for efficient neighbor lookups (the swap loop iterates
+    # neighbours millions of times, so lists beat indexing the CSR arrays)
+    adjacency = GraphCore.from_edges(actor_ids, edges).adjacency_lists()
+
+    # Frozen actors keep their slots; proposals only draw from the rest
+    movable = [frozen is None or actor_id not in frozen for actor_id in actor_ids]
+    movable_list = [i for i in range(n) if movable[i]]
+
+    # Slot geometry (slot = ordinal) for compound moves
+    num_slots = max(slots) + 1
+    slot_x = [0.0] * num_slots
+    slot_y = [0.0] * num_slots
+    occupant = [-1] * num_slots
+    for i in range(n):
+        slot_x[slots[i]], slot_y[slots[i]] = xs[i], ys[i]
+        occupant[slots[i]] = i
+
+    move_mix = move_mix or MOVE_PROBABILITIES
+    move_names = [name for name, weight in move_mix.items() if weight > 0]
+    move_weights = [move_mix[name] for name in move_names]
+    slot_grid = None
+    slot_neighbors = None
+    if any(name in ('chain', 'block') for name in move_names):
+        # Only occupied slots take part (the actors may not fill every slot)
+        slot_grid = SlotGrid(slot_x, slot_y)
+        for slot in range(num_slots):
+            if occupant[slot] < 0:
+                slot_grid.remove(slot)
+        slot_neighbors = [
+            slot_grid.nearest(slot_x[slot], slot_y[slot], SLOT_NEIGHBOR_COUNT + 1)[1:]
+            if occupant[slot] >= 0 else []
+            for slot in range(num_slots)
+        ]
+
+    # Precomputed slot distances, if the table fits the budget
+    table = load_slot_distance_table(num_slots, budget_mb=distance_table_mb)
+    if table is not None and not positions_on_slots(xs, ys, slots):
+        print('Positions are not on Vogel slots; computing distances on the fly')
+        table = None
+    dist = flat_view(table) if table is not None else None
+
+    # Per-actor contribution ("tension") cache
+    if dist is not None:
+        contributions = [
+            table_contribution(i, slots[i], slots, adjacency, dist, num_slots)
+            for i in range(n)
+        ]
+    else:
+        contributions = [
+            calculate_actor_contribution(i, xs[i], ys[i], xs, ys, adjacency)
+            for i in range(n)
+        ]
+    sampler = TensionSampler(contributions, active=movable)
+
+    # Each edge is counted once from each endpoint
+    total_distance = sum(contributions) / 2
 
     print(f'Initial total distance: {total_distance:,.2f}')
 
@@ -153,22 +600,82 @@ def run_swap_optimization(
     stagnation_counter = 0
     iteration = 0
     swaps_accepted = 0
+    evaluations = 0
+    move_proposed = {name: 0 for name in move_names}
+    move_accepted = {name: 0 for name in move_names}
+    stopped_reason = None
     start_time = time.time()
+    if controller:
+        controller.start(total_distance)
 
-    while stagnation_counter < STAGNATION_THRESHOLD and iteration < MAX_ITERATIONS:
+    while stagnation_counter < stagnation_threshold and iteration < max_iterations and len(movable_list) > 1:
         iteration += 1
 
-        # Pick two random actors to swap
-        actor_i, actor_j = random.sample(actor_ids, 2)
-
-        # Calculate delta
-        delta = try_swap(actor_i, actor_j, positions, adjacency)
-
-        if delta < -0.001:  # Improvement (with small epsilon for floating point)
-            # Accept swap
-            positions[actor_i], positions[actor_j] = positions[actor_j], positions[actor_i]
-            ordinals[actor_i], ordinals[actor_j] = ordinals[actor_j], ordinals[actor_i]
+        if controller and iteration % DEFAULT_CHECK_INTERVAL == 0:
+            stopped_reason = controller.check(total_distance, evaluations=evaluations)
+            if stopped_reason:
+                break
 
+        # Pick the first actor, favouring high-tension actors
+        if rng.random() < TENSION_PROPOSAL_RATE and sampler.total > 0:
+            i = sampler.sample(rng)
+        else:
+            i = rng.choice(movable_list)
+
+        move = move_names[0] if len(move_names) == 1 else rng.choices(move_names, move_weights)[0]
+        move_proposed[move] += 1
+
+        if move == 'swap':
+            j = rng.choice(movable_list)
+            if i == j:
+                stagnation_counter += 1
+                continue
+
+            # Calculate delta
+            if dist is not None:
+                delta, new_i, new_j = try_swap_table(i, j, slots, adjacency, contributions, dist, num_slots)
+            else:
+                delta, new_i, new_j = try_swap(i, j, xs, ys, adjacency, contributions)
+            evaluations += 2
+            accepted = delta < -0.001  # Improvement (with small epsilon for floating point)
+            if accepted:
+                if dist is not None:
+                    apply_swap_table(i, j, new_i, new_j, xs, ys, slots, adjacency, contributions, sampler,
+                                     dist, num_slots)
+                else:
+                    apply_swap(i, j, new_i, new_j, xs, ys, adjacency, contributions, sampler)
+                slots[i], slots[j] = slots[j], slots[i]
+                occupant[slots[i]], occupant[slots[j]] = i, j
+        else:
+            if move == 'cycle3':
+                slot_moves = propose_cycle([i, rng.choice(movable_list), rng.choice(movable_list)], slots)
+            elif move == 'chain':
+                slot_moves = propose_chain(i, rng, slots, occupant, adjacency, slot_neighbors)
+            else:
+                slot_moves = propose_block(i, xs, ys, slots, occupant, adjacency, slot_neighbors, slot_grid)
+            if not slot_moves or not all(movable[a] for a in slot_moves):
+                stagnation_counter += 1
+                continue
+
+            if dist is not None:
+                delta, new_contribs = try_move_table(slot_moves, slots, adjacency, contributions, dist, num_slots)
+            else:
+                moves = {a: (slot_x[slot], slot_y[slot]) for a, slot in slot_moves.items()}
+                delta, new_contribs = try_move(moves, xs, ys, adjacency, contributions)
+            evaluations += len(slot_moves)
+            accepted = delta < -0.001
+            if accepted:
+                if dist is not None:
+                    apply_move_table(slot_moves, new_contribs, xs, ys, slot_x, slot_y, slots, adjacency,
+                                     contributions, sampler, dist, num_slots)
+                else:
+                    apply_move(moves, new_contribs, xs, ys, adjacency, contributions, sampler)
+                for a, slot in slot_moves.items():
+                    slots[a] = slot
+                    occupant[slot] = a
+
+        if accepted:
+            move_accepted[move] += 1
             total_distance += delta
             swaps_accepted += 1
             stagnation_counter = 0
@@ -182,18 +689,285 @@ def run_swap_optimization(
     elapsed_time = time.time() - start_time
     print()  # New line after progress
 
+    positions = {actor_id: (xs[i], ys[i]) for i, actor_id in enumerate(actor_ids)}
+    ordinals = {actor_id: slots[i] for i, actor_id in enumerate(actor_ids)}
+
+    if stopped_reason is None:
+        if len(movable_list) <= 1:
+            stopped_reason = 'nothing_to_move'
+        elif stagnation_counter >= stagnation_threshold:
+            stopped_reason = 'stagnation'
+        else:
+            stopped_reason = 'max_iterations'
+
     stats = {
+        'mode': 'serial',
         'iterations': iteration,
         'swaps_accepted': swaps_accepted,
-        'stagnation_threshold': STAGNATION_THRESHOLD,
+        'evaluations': evaluations,
+        'evaluations_per_accepted_swap': round(evaluations / swaps_accepted, 1) if swaps_accepted else None,
+        'stagnation_threshold': stagnation_threshold,
         'elapsed_seconds': round(elapsed_time, 2),
-        'stopped_reason': 'stagnation' if stagnation_counter >= STAGNATION_THRESHOLD else 'max_iterations',
+        'stopped_reason': stopped_reason,
+        'distance_table': dist is not None,
+        'moves': {
+            name: {'proposed': move_proposed[name], 'accepted': move_accepted[name]}
+            for name in move_names
+        },
     }
 
     return positions, ordinals, stats
 
 
+def run_nested_optimization(
+    actors: list[dict],
+    edges: list[tuple[int, int]],
+    initial_positions: dict[int, tuple[float, float]],
+    initial_ordinals: dict[int, int],
+    sizes: list[int],
+    stagnation_threshold: int = STAGNATION_THRESHOLD,
+    max_iterations: int = MAX_ITERATIONS,
+    seed: int = RANDOM_SEED,
+    controller: Optional[RunController] = None,
+    move_mix: Optional[dict[str, float]] = None,
+    distance_table_mb: float = TABLE_BUDGET_MB
+) -> tuple[dict[int, tuple[float, float]], dict[int, int], dict, list[tuple[int, list[dict], list[tuple[int, int]]]]]:
+    """
+    Build nested layouts: the top-N actors by Recognizability occupy the first
+    N slots, for every configured N.
+
+    Tiers are optimized smallest first.  Each tier's actors start on the next
+    free slots (in Step 2 order) and only they may move; earlier tiers stay
+    frozen, so every smaller layout is an exact prefix of the larger ones.
+    The edges of a tier are those induced on its top-N actors.
+
+    Args:
+        actors: List of actor dicts with person_id and recognizability
+        edges: List of (actor_id_1, actor_id_2) tuples
+        initial_positions: Dict mapping actor_id to (x, y) from Step 2
+        initial_ordinals: Dict mapping actor_id to ordinal from Step 2
+        sizes: Layout sizes to export; the full actor count is always included
+        stagnation_threshold, max_iterations, seed, controller, move_mix, distance_table_mb:
+            Passed to run_swap_optimization for each tier (controller limits
+            apply per tier)
+
+    Returns:
+        - Final positions dict
+        - Final ordinals dict
+        - Stats dict with per-tier convergence information
+        - (size, actors, edges) for every layout, smallest first
+    """
+    n = len(actors)
+    ranked = sorted(actors, key=lambda a: a['recognizability'] or 0, reverse=True)
+    sizes = sorted({size for size in sizes if 0 < size < n} | {n})
+
+    # Slot coordinates: Step 2 places ordinal k on Vogel slot k
+    slot_positions = {initial_ordinals[a['person_id']]: initial_positions[a['person_id']] for a in actors}
+
+    positions = {}
+    ordinals = {}
+    layouts = []
+    tiers = []
+    placed = 0
+    for tier_index, size in enumerate(sizes):
+        tier = sorted(ranked[placed:size], key=lambda a: initial_ordinals[a['person_id']])
+        for slot, actor in enumerate(tier, start=placed):
+            ordinals[actor['person_id']] = slot
+            positions[actor['person_id']] = slot_positions[slot]
+
+        members = ranked[:size]
+        member_ids = {a['person_id'] for a in members}
+        tier_edges = [e for e in edges if e[0] in member_ids and e[1] in member_ids]
+        frozen = {a['person_id'] for a in ranked[:placed]}
+
+        print(f'\nTier {tier_index + 1}/{len(sizes)}: top {size} actors '
+              f'({size - placed} movable, {len(tier_edges):,} edges)')
+        positions, ordinals, tier_stats = run_swap_optimization(
+            members, tier_edges, positions, ordinals,
+            stagnation_threshold=stagnation_threshold,
+            max_iterations=max_iterations,
+            seed=seed + tier_index,
+            controller=controller,
+            move_mix=move_mix,
+            frozen=frozen,
+            distance_table_mb=distance_table_mb,
+        )
+        tiers.append({'size': size, 'movable': size - placed, 'edges': len(tier_edges), **tier_stats})
+        layouts.append((size, members, tier_edges))
+        placed = size
+
+    stats = {
+        'mode': 'nested',
+        'sizes': sizes,
+        'iterations': sum(t['iterations'] for t in tiers),
+        'swaps_accepted': sum(t['swaps_accepted'] for t in tiers),
+        'elapsed_seconds': round(sum(t['elapsed_seconds'] for t in tiers), 2),
+        'stopped_reason': tiers[-1]['stopped_reason'],
+        'tiers': tiers,
+    }
+    return positions, ordinals, stats, layouts
+
+
+def optimize_layout(
+    actors: list[dict],
+    edges: list[tuple[int, int]],
+    initial_positions: dict[int, tuple[float, float]],
+    initial_ordinals: dict[int, int],
+    args: argparse.Namespace,
+    controller: Optional[RunController] = None
+) -> tuple[dict, dict, dict, list]:
+    """
+    Run the optimizer configured by Step 3's CLI options on a layout.
+
+    Handles component splitting, 2-core pruning, nested / sector-parallel /
+    serial swapping and assignment refinement, as selected by `args`.
+
+    Returns:
+        (final positions, final ordinals, stats, nested layouts)
+    """
+    # Split off small components and isolates; only the giant component is optimized
+    opt_actors, opt_edges, opt_positions, opt_ordinals = actors, edges, initial_positions, initial_ordinals
+    component_plan = None
+    if args.components:
+        component_plan = plan_components(actors, edges, initial_positions, initial_ordinals, workers=args.workers)
+        component_stats = component_plan.stats
+        print(f"Components: {component_stats['components']:,} "
+              f"(giant {component_stats['giant_size']:,} actors, "
+              f"{component_stats['small_components']:,} small with {component_stats['small_component_actors']:,} actors, "
+              f"{component_stats['isolates']:,} isolates) - placed in {component_stats['elapsed_seconds']:.2f}s")
+        giant = set(component_plan.giant_ids)
+        opt_actors = [a for a in actors if a['person_id'] in giant]
+        opt_edges = [e for e in edges if e[0] in giant]
+        opt_positions, opt_ordinals = component_plan.giant_positions, component_plan.giant_ordinals
+
+    # Peel to the 2-core; peeled trees are reattached after optimization
+    peel = None
+    if args.prune_2core:
+        slot_positions = {opt_ordinals[a]: opt_positions[a] for a in opt_ordinals}
+        peel_positions = opt_positions
+        peel, opt_actors, opt_edges, opt_positions, opt_ordinals = prune_for_optimization(
+            opt_actors, opt_edges, opt_positions, opt_ordinals
+        )
+        peel_stats = peel.stats
+        print(f"2-core: {peel_stats['core_actors']:,} of {peel_stats['actors']:,} actors, "
+              f"{peel_stats['core_edges']:,} of {peel_stats['edges']:,} edges "
+              f"({peel_stats['peeled_fraction']:.1%} peeled in {peel_stats['peel_rounds']} rounds, "
+              f"{peel_stats['degree_one']:,} leaves)")
+
+    # Run optimization
+    print(f'\nRunning swap optimization (stagnation threshold: {args.stagnation_threshold})...\n')
+    nested_layouts = []
+    if args.nested_sizes:
+        print(f'Nested mode: sizes {args.nested_sizes} (tiers run serially)')
+        final_positions, final_ordinals, stats, nested_layouts = run_nested_optimization(
+            opt_actors, opt_edges, opt_positions, opt_ordinals,
+            sizes=args.nested_sizes,
+            stagnation_threshold=args.stagnation_threshold,
+            max_iterations=args.max_iterations,
+            seed=args.seed,
+            controller=controller,
+            move_mix=args.move_mix,
+            distance_table_mb=args.distance_table_mb,
+        )
+    elif args.workers > 1:
+        print(f'Sector-parallel mode with {args.workers} workers')
+        final_positions, final_ordinals, stats = run_parallel_swap_optimization(
+            opt_actors, opt_edges, opt_positions, opt_ordinals,
+            workers=args.workers,
+            max_iterations=args.max_iterations,
+            stagnation_threshold=args.stagnation_threshold,
+            seed=args.seed,
+            controller=controller,
+        )
+    else:
+        final_positions, final_ordinals, stats = run_swap_optimization(
+            opt_actors, opt_edges, opt_positions, opt_ordinals,
+            stagnation_threshold=args.stagnation_threshold,
+            max_iterations=args.max_iterations,
+            seed=args.seed,
+            controller=controller,
+            move_mix=args.move_mix,
+            distance_table_mb=args.distance_table_mb,
+        )
+
+    if args.assignment_window:
+        from assignment_refinement import run_assignment_refinement
+
+        # Earlier nested tiers stay frozen, as in the swap phase, so the prefixes survive
+        frozen = None
+        if len(nested_layouts) > 1:
+            frozen = {a['person_id'] for a in nested_layouts[-2][1]}
+
+        print(f'\nRefining with {args.assignment_window}-actor assignment windows...\n')
+        final_positions, final_ordinals, stats['assignment'] = run_assignment_refinement(
+            opt_actors, opt_edges, final_positions, final_ordinals,
+            window_size=args.assignment_window,
+            workers=args.workers,
+            seed=args.seed,
+            controller=controller,
+            frozen=frozen,
+        )
+
+    if peel:
+        start_time = time.time()
+        final_positions, final_ordinals = reattach_peeled(
+            peel, final_positions, final_ordinals, slot_positions, peel_positions
+        )
+        peel.stats['reattach_seconds'] = round(time.time() - start_time, 2)
+        stats['pruning'] = peel.stats
+        print(f"Reattached {peel.stats['peeled_actors']:,} peeled actors in {peel.stats['reattach_seconds']:.2f}s")
+
+    if component_plan:
+        final_positions.update(component_plan.positions)
+        final_ordinals.update(component_plan.ordinals)
+        stats['components'] = component_plan.stats
+
+    return final_positions, final_ordinals, stats, nested_layouts
+
+
+def parse_nested_sizes(spec: str) -> list[int]:
+    """Parse a comma-separated list of layout sizes, e.g. '100,200,500'."""
+    try:
+        return [int(size) for size in spec.split(',') if size.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'Invalid size list: {spec}')
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Step 3: swap optimization')
+    parser.add_argument('--stagnation-threshold', type=int, default=STAGNATION_THRESHOLD,
+                        help=f'Consecutive non-improving swaps before stopping (default {STAGNATION_THRESHOLD})')
+    parser.add_argument('--max-iterations', type=int, default=MAX_ITERATIONS,
+                        help=f'Safety limit on swap proposals (default {MAX_ITERATIONS})')
+    parser.add_argument('--seed', type=int, default=RANDOM_SEED,
+                        help=f'Random seed (default {RANDOM_SEED})')
+    parser.add_argument('--workers', type=int, default=PARALLEL_WORKERS,
+                        help='Worker processes; >1 enables sector-parallel refinement')
+    parser.add_argument('--move-mix', type=parse_move_mix,
+                        default=','.join(f'{k}={v}' for k, v in MOVE_PROBABILITIES.items()),
+                        help='Move type probabilities, e.g. swap=0.6,chain=0.3,cycle3=0.05,block=0.05')
+    parser.add_argument('--distance-table-mb', type=float, default=TABLE_BUDGET_MB,
+                        help=f'Memory budget for the precomputed slot distance table (default {TABLE_BUDGET_MB}; 0 = off)')
+    parser.add_argument('--assignment-window', type=int, default=0, metavar='K',
+                        help='After swapping, refine with K-actor optimal-assignment windows (0 = off)')
+    parser.add_argument('--components', action='store_true',
+                        help='Optimize only the giant component; place small components and isolates outside it')
+    parser.add_argument('--prune-2core', action='store_true',
+                        help='Optimize only the 2-core; reattach peeled trees next to their anchors')
+    parser.add_argument('--nested-sizes', type=parse_nested_sizes, default=None,
+                        help='Also export nested prefix layouts of these sizes, e.g. 100,200,500')
+    add_controller_arguments(parser)
+    add_cache_arguments(parser, snapshot=False)
+    args = parser.parse_args(argv)
+    if args.nested_sizes and (args.components or args.prune_2core):
+        parser.error('--nested-sizes cannot be combined with --components or --prune-2core')
+    return args
+
+
 def main():
+    args = parse_args()
+    controller = controller_from_args(args)
+
     print_header('STEP 3: SWAP OPTIMIZATION')
 
     # Load Step 2 output
@@ -215,27 +989,43 @@ def main():
     previous_metrics = Metrics(**step2_data['metrics'])
     print(f'Previous avg distance (Step 2): {previous_metrics.avg_distance:.2f}')
 
+    config = {
+        'num_actors': len(step2_data['actors']),
+        'stagnation_threshold': args.stagnation_threshold,
+        'max_iterations': args.max_iterations,
+        'random_seed': args.seed,
+        'tension_proposal_rate': TENSION_PROPOSAL_RATE,
+        'move_mix': args.move_mix,
+        'parallel_workers': args.workers,
+        'nested_sizes': args.nested_sizes,
+        'assignment_window': args.assignment_window,
+        'components': args.components,
+        'prune_2core': args.prune_2core,
+        'distance_table_mb': args.distance_table_mb,
+        'run_controller': controller.to_dict(),
+    }
+    inputs = content_hash({'actors': step2_data['actors'], 'edges': step2_data['edges']})
+    fingerprint = stage_fingerprint('03-swap-optimization', inputs, config, Path(__file__))
+    cached = restore_cached_stage(fingerprint, '03-swap-optimization', args.no_cache)
+    if cached:
+        print_metrics(Metrics(**cached['metrics']), 'Swap Optimization Metrics (cached)')
+        return
+
     # Reconstruct actors, edges, positions, and ordinals from Step 2
     actors = step2_data['actors']
     edges = [(e['source'], e['target']) for e in step2_data['edges']]
+    core = GraphCore.from_step_output(step2_data)
 
-    initial_positions = {
-        a['person_id']: (a['x'], a['y'])
-        for a in actors
-    }
-    initial_ordinals = {
-        a['person_id']: a['ordinal']
-        for a in actors
-    }
+    initial_positions = core.positions()
+    initial_ordinals = core.ordinal_map()
 
-    # Run optimization
-    print(f'\nRunning swap optimization (stagnation threshold: {STAGNATION_THRESHOLD})...\n')
-    final_positions, final_ordinals, stats = run_swap_optimization(
-        actors, edges, initial_positions, initial_ordinals
+    final_positions, final_ordinals, stats, nested_layouts = optimize_layout(
+        actors, edges, initial_positions, initial_ordinals, args, controller
     )
 
     # Calculate final metrics
-    metrics = calculate_metrics(final_positions, edges)
+    core.set_layout(final_positions, final_ordinals)
+    metrics = core.metrics()
 
     # Print results
     print_metrics(metrics, 'Swap Optimization Metrics')
@@ -254,30 +1044,33 @@ def main():
     print(f'  Swaps accepted: {stats["swaps_accepted"]:,}')
     print(f'  Time: {stats["elapsed_seconds"]:.2f}s')
     print(f'  Stopped: {stats["stopped_reason"]}')
+    if 'assignment' in stats:
+        refinement = stats['assignment']
+        print(f'  Assignment windows improved: {refinement["windows_improved"]:,}'
+              f' of {refinement["windows_solved"]:,} ({refinement["elapsed_seconds"]:.2f}s)')
+
+    peak_rss = peak_rss_mb()
+    xs, ys, ordinals = core.xs.tolist(), core.ys.tolist(), core.ordinals.tolist()
 
     # Save output
     output_data = {
         'step': 'Step 3: Swap Optimization',
         'timestamp': datetime.now().isoformat(),
-        'config': {
-            'num_actors': len(actors),
-            'stagnation_threshold': STAGNATION_THRESHOLD,
-            'max_iterations': MAX_ITERATIONS,
-            'random_seed': RANDOM_SEED,
-        },
+        'config': config,
         'stats': stats,
         'metrics': metrics.to_dict(),
+        'peak_rss_mb': round(peak_rss, 1),
         'actors': [
             {
                 'person_id': a['person_id'],
                 'name': a['name'],
                 'recognizability': a['recognizability'],
                 'degree': a['degree'],
-                'ordinal': final_ordinals[a['person_id']],
-                'x': final_positions[a['person_id']][0],
-                'y': final_positions[a['person_id']][1],
+                'ordinal': ordinals[i],
+                'x': xs[i],
+                'y': ys[i],
             }
-            for a in actors
+            for i, a in enumerate(actors)
         ],
         'edges': [
             {'source': e[0], 'target': e[1]}
@@ -288,7 +1081,11 @@ def main():
     save_step_output('03-swap-optimization', output_data)
 
     # Generate frontend-ready graph JSON
-    generate_graph_json(actors, edges, final_positions, final_ordinals)
+    outputs = [OUTPUT_DIR / '03-swap-optimization.json']
+    outputs.append(generate_graph_json(actors, edges, final_positions, final_ordinals))
+    for size, layout_actors, layout_edges in nested_layouts[:-1]:
+        outputs.append(generate_graph_json(layout_actors, layout_edges, final_positions, final_ordinals))
+    store_stage(fingerprint, '03-swap-optimization', outputs, info={'stopped_reason': stats['stopped_reason']})
 
     # Append to progress file
     append_to_progress(
@@ -299,6 +1096,7 @@ def main():
             'Swaps accepted': f'{stats["swaps_accepted"]:,}',
             'Time': f'{stats["elapsed_seconds"]:.2f}s',
             'Stopped': stats['stopped_reason'],
+            'Peak RSS': f'{peak_rss:.0f} MB',
         },
         baseline_metrics=baseline_metrics,
         previous_metrics=previous_metrics,
@@ -311,6 +1109,7 @@ def main():
     print(f'Improvement vs Step 2: {improvement_vs_previous:.1f}%')
     if baseline_metrics:
         print(f'Improvement vs baseline: {improvement_vs_baseline:.1f}%')
+    print(f'Peak RSS: {peak_rss:.0f} MB')
 
 
 if __name__ == '__main__':
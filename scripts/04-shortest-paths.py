@@ -3,18 +3,42 @@ BFS shortest-path distances from center actors to all other actors.
 
 Processes centers sequentially in the order listed so you can stop at any
 time and still have results for the most important actors.  Append new
-person_ids to CENTER_ACTOR_IDS to analyze more centers over time.
+person_ids to CENTER_ACTOR_IDS to analyze more centers over time, or pass
+--auto-centers K to use the K most central actors (sampled closeness).
+
+With --out-of-core DIR, the graph is read from an out-of-core store built
+by out_of_core.py (memory-mapped CSR) and BFS runs vectorized over it in
+chunks; per-actor distances go to one int16 .npy file per center in
+DIR/distances/ instead of the JSON output.
+
+With --update, the stored results are refreshed for a batch of added and
+removed connections instead of being recomputed: an added edge can only
+shorten distances, so decreases are propagated outwards from its endpoints;
+a removed edge only matters to centers for which it lies on a shortest path
+(endpoint distances differ by one), and those centers are recomputed.
 
 Usage:
     python scripts/04-shortest-paths.py
+    python scripts/04-shortest-paths.py --budget 60
+    python scripts/04-shortest-paths.py --auto-centers 25
+    python scripts/04-shortest-paths.py --update new-connections.json
+    python scripts/04-shortest-paths.py --out-of-core optimization_outputs/ooc
 """
 
+import argparse
+import heapq
 import json
 import sys
 import time
-from collections import deque
 from pathlib import Path
 
+import numpy as np
+
+from centrality import bfs_levels, estimate_centrality, DEFAULT_PIVOTS
+from graph_core import GraphCore, peak_rss_mb
+from out_of_core import bfs_levels_chunked, open_store
+from run_controller import add_controller_arguments, controller_from_args
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
@@ -46,68 +70,237 @@ CENTER_ACTOR_IDS: list[int] = [
 # Graph building
 # ---------------------------------------------------------------------------
 
-def load_graph(path: Path) -> tuple[dict[int, list[int]], dict[int, str]]:
-    """Return (adjacency list, id->name map) from the graph JSON."""
+def load_graph(path: Path) -> tuple[GraphCore, list[str]]:
+    """Return (graph core, names by dense index) from the graph JSON."""
     with open(path) as f:
         data = json.load(f)
-
-    id_to_name: dict[int, str] = {}
-    for actor in data["actors"]:
-        pid = actor["person_id"]
-        id_to_name[pid] = actor["name"]
-
-    adj: dict[int, list[int]] = {pid: [] for pid in id_to_name}
-    for edge in data["edges"]:
-        s, t = edge["source"], edge["target"]
-        if s in adj and t in adj:
-            adj[s].append(t)
-            adj[t].append(s)
-
-    return adj, id_to_name
+    return GraphCore.from_step_output(data), [actor["name"] for actor in data["actors"]]
 
 # ---------------------------------------------------------------------------
 # BFS
 # ---------------------------------------------------------------------------
 
-def bfs_distances(adj: dict[int, list[int]], source: int) -> dict[int, int]:
-    """BFS from *source*. Returns {node: distance} for all reachable nodes."""
-    dist: dict[int, int] = {source: 0}
-    queue = deque([source])
-    while queue:
-        node = queue.popleft()
-        d = dist[node]
-        for neighbor in adj[node]:
-            if neighbor not in dist:
-                dist[neighbor] = d + 1
-                queue.append(neighbor)
-    return dist
-
-# ---------------------------------------------------------------------------
-# Reporting
-# ---------------------------------------------------------------------------
+def bfs_distances(core: GraphCore, source: int) -> list[int]:
+    """BFS from dense index *source*. Returns hop counts by dense index, -1 if unreachable."""
+    offsets, neighbors = core.csr()
+    return bfs_levels(offsets, neighbors, source)
 
-def print_report(name: str, distances: dict[int, int], total_nodes: int) -> None:
-    reachable = len(distances) - 1  # exclude the source itself
-    unreachable = total_nodes - len(distances)
 
-    # distance distribution
+def build_center_result(pid: int, name: str, core: GraphCore, levels: list[int]) -> dict:
+    """Build the stored result for one center from its BFS hop counts."""
+    # Per-node distance list (None for unreachable) and distance distribution
+    full_distances: dict[str, int | None] = {}
     dist_counts: dict[int, int] = {}
-    for d in distances.values():
-        if d == 0:
+    for other_pid, d in zip(core.ids.tolist(), levels):
+        if other_pid == pid:
+            continue
+        if d < 0:
+            full_distances[str(other_pid)] = None
             continue
+        full_distances[str(other_pid)] = d
         dist_counts[d] = dist_counts.get(d, 0) + 1
 
+    reachable = sum(dist_counts.values())
+    unreachable = core.num_nodes - 1 - reachable
+
     max_dist = max(dist_counts) if dist_counts else 0
     total_distance = sum(d * c for d, c in dist_counts.items())
     avg_dist = total_distance / reachable if reachable else 0
 
+    return {
+        "person_id": pid,
+        "name": name,
+        "reachable": reachable,
+        "unreachable": unreachable,
+        "avg_distance": round(avg_dist, 4),
+        "max_distance": max_dist,
+        "distribution": {str(d): dist_counts.get(d, 0) for d in range(1, max_dist + 1)},
+        "distances": full_distances,
+    }
+
+
+def build_center_summary(pid: int, name: str, levels, distances_dir: Path) -> dict:
+    """
+    Out-of-core variant of build_center_result for an int32 hop-count array.
+
+    Stats are computed with numpy; the per-actor distances are saved to
+    distances_dir/{pid}.npy (int16 by dense index, -1 unreachable) rather
+    than kept in the result.
+    """
+    counts = np.bincount(levels[levels > 0])
+    reachable = int(counts.sum())
+    max_dist = len(counts) - 1 if reachable else 0
+    avg_dist = float(np.dot(np.arange(len(counts)), counts)) / reachable if reachable else 0
+
+    distances_dir.mkdir(parents=True, exist_ok=True)
+    distances_path = distances_dir / f"{pid}.npy"
+    np.save(distances_path, levels.astype(np.int16))
+
+    return {
+        "person_id": pid,
+        "name": name,
+        "reachable": reachable,
+        "unreachable": len(levels) - 1 - reachable,
+        "avg_distance": round(avg_dist, 4),
+        "max_distance": max_dist,
+        "distribution": {str(d): int(counts[d]) for d in range(1, max_dist + 1)},
+        "distances_file": str(distances_path),
+    }
+
+# ---------------------------------------------------------------------------
+# Incremental updates
+# ---------------------------------------------------------------------------
+
+def load_edge_updates(path: Path) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """Read {"added": [[s, t], ...], "removed": [[s, t], ...]} from *path*."""
+    with open(path) as f:
+        data = json.load(f)
+    added = [(int(s), int(t)) for s, t in data.get("added", [])]
+    removed = [(int(s), int(t)) for s, t in data.get("removed", [])]
+    return added, removed
+
+
+def propagate_insertions(core: GraphCore, result: dict,
+                         added: list[tuple[int, int]]) -> int:
+    """
+    Lower one center's stored distances for newly added edges.
+
+    Distances only change where an added edge creates a shortcut; those
+    decreases are pushed outwards in distance order and the stored stats
+    (reachable counts, distribution, avg/max) are adjusted per change.
+
+    Returns the number of actors whose distance changed.
+    """
+    center = result["person_id"]
+    distances = result["distances"]
+    distribution = {int(d): c for d, c in result["distribution"].items()}
+    ids = memoryview(core.ids)
+    offsets, neighbors = core.csr()
+
+    def get(node: int) -> int | None:
+        pid = ids[node]
+        return 0 if pid == center else distances.get(str(pid))
+
+    # Heap entries are (distance, dense index)
+    heap: list[tuple[int, int]] = []
+    for s, t in added:
+        s, t = core.index_of(s), core.index_of(t)
+        for a, b in ((s, t), (t, s)):
+            da, db = get(a), get(b)
+            if da is not None and (db is None or da + 1 < db):
+                heapq.heappush(heap, (da + 1, b))
+
+    changed = 0
+    while heap:
+        d, node = heapq.heappop(heap)
+        current = get(node)
+        if current is not None and current <= d:
+            continue
+        distances[str(ids[node])] = d
+        changed += 1
+        if current is None:
+            result["reachable"] += 1
+            result["unreachable"] -= 1
+        else:
+            distribution[current] -= 1
+        distribution[d] = distribution.get(d, 0) + 1
+        for k in range(offsets[node], offsets[node + 1]):
+            neighbor = neighbors[k]
+            dn = get(neighbor)
+            if dn is None or dn > d + 1:
+                heapq.heappush(heap, (d + 1, neighbor))
+
+    if changed:
+        max_dist = max((d for d, c in distribution.items() if c), default=0)
+        total_distance = sum(d * c for d, c in distribution.items())
+        result["max_distance"] = max_dist
+        result["avg_distance"] = round(total_distance / result["reachable"], 4) if result["reachable"] else 0
+        result["distribution"] = {str(d): distribution.get(d, 0) for d in range(1, max_dist + 1)}
+    return changed
+
+
+def removal_affects(result: dict, removed: list[tuple[int, int]]) -> bool:
+    """True if any removed edge lies on a shortest path from this center."""
+    center = result["person_id"]
+    distances = result["distances"]
+    for s, t in removed:
+        ds = 0 if s == center else distances.get(str(s))
+        dt = 0 if t == center else distances.get(str(t))
+        if ds is not None and dt is not None and abs(ds - dt) == 1:
+            return True
+    return False
+
+
+def run_update(update_path: Path) -> None:
+    """Refresh the stored results for the edge changes in *update_path*."""
+    if not OUTPUT_PATH.exists():
+        print(f"Error: {OUTPUT_PATH} not found. Run a full pass first.")
+        sys.exit(1)
+
+    t_start = time.perf_counter()
+    with open(OUTPUT_PATH) as f:
+        output = json.load(f)
+    stats, results = output["stats"], output["centers"]
+
+    print(f"Loading graph from {GRAPH_PATH} …")
+    core, _ = load_graph(GRAPH_PATH)
+    total_nodes = core.num_nodes
+
+    # Replay earlier updates so the adjacency matches the stored distances
+    history = stats.get("graph_updates", [])
+    for batch in history:
+        core, _, _ = core.with_edge_changes(batch["added"], batch["removed"])
+
+    added, removed = load_edge_updates(update_path)
+    print(f"  {total_nodes:,} actors; update: {len(added):,} added, {len(removed):,} removed edges")
+    t_loaded = time.perf_counter()
+
+    # Decide which centers a removal invalidates before the graph changes
+    affected = {r["person_id"] for r in results if removal_affects(r, removed)}
+    core, added, removed = core.with_edge_changes(added, removed)
+
+    changed = 0
+    for i, r in enumerate(results):
+        if r["person_id"] in affected:
+            levels = bfs_distances(core, core.index_of(r["person_id"]))
+            results[i] = build_center_result(r["person_id"], r["name"], core, levels)
+        elif added:
+            changed += propagate_insertions(core, r, added)
+    elapsed = time.perf_counter() - t_loaded
+
+    history.append({"added": [list(e) for e in added], "removed": [list(e) for e in removed]})
+    stats["graph_updates"] = history
+    stats["last_update"] = {
+        "added": len(added),
+        "removed": len(removed),
+        "centers_recomputed": len(affected),
+        "distances_lowered": changed,
+        "elapsed_seconds": round(elapsed, 4),
+    }
+    stats["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    print(f"  Lowered {changed:,} stored distances; recomputed {len(affected)} of {len(results)} centers")
+    print(f"  Update applied in {elapsed:.3f}s (load/save excluded; total {time.perf_counter() - t_start:.2f}s)")
+    print(f"  Peak RSS: {stats['peak_rss_mb']:.0f} MB")
+
+    with open(OUTPUT_PATH, "w") as f:
+        json.dump({"stats": stats, "centers": results}, f, indent=2)
+    print(f"\nUpdated results written to {OUTPUT_PATH}")
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def print_report(result: dict) -> None:
+    max_dist = result["max_distance"]
+
     print(f"\n{'=' * 60}")
-    print(f"  Center: {name}")
-    print(f"  Reachable: {reachable:,}   Unreachable: {unreachable:,}")
-    print(f"  Avg distance: {avg_dist:.3f}   Max distance: {max_dist}")
+    print(f"  Center: {result['name']}")
+    print(f"  Reachable: {result['reachable']:,}   Unreachable: {result['unreachable']:,}")
+    print(f"  Avg distance: {result['avg_distance']:.3f}   Max distance: {max_dist}")
     print(f"  Distance distribution:")
     for d in range(1, max_dist + 1):
-        count = dist_counts.get(d, 0)
+        count = result["distribution"].get(str(d), 0)
         bar = "#" * min(count // 40, 60)
         print(f"    {d:3d}: {count:>6,}  {bar}")
     print(f"{'=' * 60}")
@@ -116,58 +309,76 @@ def print_report(name: str, distances: dict[int, int], total_nodes: int) -> None
 # Main
 # ---------------------------------------------------------------------------
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="BFS shortest paths from center actors")
+    parser.add_argument("--auto-centers", type=int, default=None, metavar="K",
+                        help="Use the K most central actors instead of CENTER_ACTOR_IDS")
+    parser.add_argument("--pivots", type=int, default=DEFAULT_PIVOTS,
+                        help=f"Pivot BFS runs for --auto-centers (default {DEFAULT_PIVOTS})")
+    parser.add_argument("--update", type=Path, default=None, metavar="PATH",
+                        help='Refresh stored results for {"added": [[s, t], ...], "removed": [...]} edge changes')
+    parser.add_argument("--out-of-core", type=Path, default=None, metavar="DIR",
+                        help="Read the graph from an out_of_core.py store and run chunked BFS over it")
+    add_controller_arguments(parser, objective=False)
+    args = parser.parse_args()
+    if args.update and args.out_of_core:
+        parser.error("--update works on the JSON results; it cannot be combined with --out-of-core")
+    return args
+
+
 def main() -> None:
-    print(f"Loading graph from {GRAPH_PATH} …")
-    adj, id_to_name = load_graph(GRAPH_PATH)
-    total_nodes = len(adj)
-    print(f"  {total_nodes:,} actors, {sum(len(v) for v in adj.values()) // 2:,} edges\n")
+    args = parse_args()
+    if args.update:
+        run_update(args.update)
+        return
+    controller = controller_from_args(args)
+
+    store = None
+    if args.out_of_core:
+        print(f"Opening out-of-core store {args.out_of_core} …")
+        store = open_store(args.out_of_core)
+        core, names = store.core, store.load_names()
+    else:
+        print(f"Loading graph from {GRAPH_PATH} …")
+        core, names = load_graph(GRAPH_PATH)
+    print(f"  {core.num_nodes:,} actors, {core.num_edges:,} edges\n")
+
+    center_ids = CENTER_ACTOR_IDS
+    if args.auto_centers:
+        print(f"Selecting top {args.auto_centers} centers by closeness ({args.pivots} pivots) …")
+        estimate = estimate_centrality(core.ids.tolist(), None, num_pivots=args.pivots, core=core)
+        center_ids = estimate.top_k(args.auto_centers)
+        print(f"  estimated in {estimate.elapsed_seconds:.2f}s: "
+              f"{', '.join(names[core.index_of(pid)] for pid in center_ids)}\n")
 
     results: list[dict] = []
+    controller.start()
+    stopped_reason = "completed"
+
+    for pid in center_ids:
+        if controller.budget_exhausted():
+            stopped_reason = controller.stopped_reason
+            print(f"\n⚠ Budget of {args.budget:g}s exhausted, stopping before remaining centers")
+            break
 
-    for pid in CENTER_ACTOR_IDS:
-        name = id_to_name.get(pid)
-        if name is None:
+        if pid not in core:
             print(f"⚠ person_id {pid} not found in graph, skipping")
             continue
+        i = core.index_of(pid)
 
         t0 = time.perf_counter()
-        distances = bfs_distances(adj, pid)
+        if store:
+            levels = bfs_levels_chunked(core.offsets, core.neighbors, i)
+        else:
+            levels = bfs_distances(core, i)
         elapsed = time.perf_counter() - t0
 
-        # Build per-node distance list (None for unreachable)
-        full_distances: dict[str, int | None] = {}
-        for other_pid in adj:
-            if other_pid == pid:
-                continue
-            d = distances.get(other_pid)
-            full_distances[str(other_pid)] = d  # None if unreachable
-
-        reachable = len(distances) - 1
-        unreachable = total_nodes - len(distances)
-
-        # Compute stats
-        dist_counts: dict[int, int] = {}
-        for d in distances.values():
-            if d == 0:
-                continue
-            dist_counts[d] = dist_counts.get(d, 0) + 1
-
-        max_dist = max(dist_counts) if dist_counts else 0
-        total_distance = sum(d * c for d, c in dist_counts.items())
-        avg_dist = total_distance / reachable if reachable else 0
-
-        results.append({
-            "person_id": pid,
-            "name": name,
-            "reachable": reachable,
-            "unreachable": unreachable,
-            "avg_distance": round(avg_dist, 4),
-            "max_distance": max_dist,
-            "distribution": {str(d): dist_counts.get(d, 0) for d in range(1, max_dist + 1)},
-            "distances": full_distances,
-        })
-
-        print_report(name, distances, total_nodes)
+        if store:
+            results.append(build_center_summary(pid, names[i], levels, store.directory / "distances"))
+        else:
+            results.append(build_center_result(pid, names[i], core, levels))
+
+        print_report(results[-1])
         print(f"  BFS completed in {elapsed:.3f}s")
 
     # Summary table
@@ -181,9 +392,22 @@ def main() -> None:
               f"{r['reachable']:>10,} {r['unreachable']:>12,}")
     print(f"{'=' * 72}")
 
+    stats = {
+        "center_selection": f"auto_top_{args.auto_centers}" if args.auto_centers else "manual",
+        "graph_source": str(args.out_of_core or GRAPH_PATH),
+        "centers_requested": len(center_ids),
+        "centers_processed": len(results),
+        "elapsed_seconds": round(controller.elapsed, 2),
+        "stopped_reason": stopped_reason,
+        "run_controller": controller.to_dict(),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    print(f"\n  Processed {len(results)}/{len(center_ids)} centers "
+          f"in {stats['elapsed_seconds']:.2f}s (stopped: {stopped_reason}); peak RSS {stats['peak_rss_mb']:.0f} MB")
+
     # Write output
     with open(OUTPUT_PATH, "w") as f:
-        json.dump(results, f, indent=2)
+        json.dump({"stats": stats, "centers": results}, f, indent=2)
     print(f"\nFull results written to {OUTPUT_PATH}")
 
 
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Step 5: Publish Positions
+
+Writes the optimized layout from Step 3 back to the database as a new layout
+version (see sql/actor_positions.sql):
+
+- Diffs the new slots/positions against the last published layout
+- Allocates a new version (status 'writing')
+- Upserts only changed actors (plus tombstones for actors that left the
+  layout) in large batches over a bounded thread pool, retrying failed batches
+- Flips the version to 'published' once every batch is written
+
+Positions go to the versioned actor_positions table, not to columns on
+`actors`; readers that used those columns should call the
+published_actor_positions(graph_limit) RPC instead.
+
+Readers resolve positions from published versions only, so they see either
+the previous layout or the new one, never a mix; a publish that fails midway
+leaves its version unpublished and invisible.  Batches are idempotent
+upserts keyed by (graph_limit, person_id, version), so a retried or re-run
+publish never duplicates rows.
+
+Usage:
+    python scripts/05-publish-positions.py
+    python scripts/05-publish-positions.py --dry-run
+    SUPABASE_LOCAL_STORE=/tmp/store.json python scripts/05-publish-positions.py
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from graph_core import GraphCore, peak_rss_mb
+from optimization_utils import load_step_output, print_header
+from supabase_io import get_supabase_client
+
+# Configuration
+BATCH_SIZE = 1000  # Rows per upsert request
+MAX_CONCURRENCY = 4  # Upsert requests in flight at once
+MAX_RETRIES = 4  # Attempts per batch before the publish is abandoned
+RETRY_BACKOFF_SECONDS = 0.5  # Doubled after every failed attempt
+POSITION_TOLERANCE = 0.01  # Coordinates closer than this count as unchanged
+PAGE_SIZE = 1000  # Rows per page when reading the published layout
+
+
+def fetch_published_layout(supabase, graph_limit: int) -> dict[int, dict]:
+    """
+    Fetch the newest published layout for a graph size.
+
+    Returns:
+        Dict mapping person_id to {ordinal, x, y, version}
+    """
+    published = {}
+    start = 0
+    while True:
+        response = supabase.rpc('published_actor_positions', {'p_graph_limit': graph_limit}) \
+            .range(start, start + PAGE_SIZE - 1) \
+            .execute()
+        rows = response.data or []
+        for row in rows:
+            published[row['person_id']] = row
+        if len(rows) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return published
+
+
+def diff_layout(core: GraphCore, published: dict[int, dict], tolerance: float = POSITION_TOLERANCE) -> tuple[list[dict], list[int]]:
+    """
+    Find actors whose slot or position differs from the published layout.
+
+    Args:
+        core: Step 3 graph core with ordinals and positions
+        published: Result of fetch_published_layout
+        tolerance: Coordinate difference below which a position is unchanged
+
+    Returns:
+        - Changed or new actors as {person_id, ordinal, x, y}
+        - person_ids that are published but no longer in the layout
+    """
+    changed = []
+    for person_id, ordinal, x, y in zip(core.ids.tolist(), core.ordinals.tolist(),
+                                        core.xs.tolist(), core.ys.tolist()):
+        old = published.get(person_id)
+        if (old is None
+                or old['ordinal'] != ordinal
+                or abs(old['x'] - x) >= tolerance
+                or abs(old['y'] - y) >= tolerance):
+            changed.append({'person_id': person_id, 'ordinal': ordinal, 'x': x, 'y': y})
+
+    published_ids = list(published)
+    present = core.mask_of(published_ids).tolist()
+    removed = [person_id for person_id, ok in zip(published_ids, present) if not ok]
+    return changed, removed
+
+
+def upsert_with_retry(supabase, table: str, rows: list[dict], on_conflict: str, retries: int = MAX_RETRIES) -> int:
+    """
+    Upsert one batch, retrying with exponential backoff.
+
+    Returns:
+        Number of attempts used
+    """
+    delay = RETRY_BACKOFF_SECONDS
+    for attempt in range(1, retries + 1):
+        try:
+            supabase.table(table).upsert(rows, on_conflict=on_conflict).execute()
+            return attempt
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f'\n  Batch of {len(rows)} rows failed ({e}); retrying in {delay:.1f}s')
+            time.sleep(delay)
+            delay *= 2
+    return retries
+
+
+def write_batches(supabase, rows: list[dict], batch_size: int, concurrency: int, retries: int) -> dict:
+    """
+    Upsert rows into actor_positions in batches over a bounded thread pool.
+
+    Returns:
+        Stats dict (batches, retries)
+    """
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+    attempts = 0
+    done = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(upsert_with_retry, supabase, 'actor_positions', batch,
+                        'graph_limit,person_id,version', retries)
+            for batch in batches
+        ]
+        for future in as_completed(futures):
+            attempts += future.result()
+            done += 1
+            print(f'\rWrote {done}/{len(batches)} batches', end='', flush=True)
+    print()
+    return {'batches': len(batches), 'retries': attempts - len(batches)}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Step 5: publish positions')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help=f'Rows per upsert request (default {BATCH_SIZE})')
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENCY,
+                        help=f'Upsert requests in flight (default {MAX_CONCURRENCY})')
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES,
+                        help=f'Attempts per batch (default {MAX_RETRIES})')
+    parser.add_argument('--tag', default=None,
+                        help='Label stored with the version (default: Step 3 timestamp)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report the diff without writing anything')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print_header('STEP 5: PUBLISH POSITIONS')
+
+    try:
+        step3_data = load_step_output('03-swap-optimization')
+    except FileNotFoundError:
+        print('Error: Step 3 output not found. Run Step 3 first.')
+        return
+
+    core = GraphCore.from_step_output(step3_data)
+    graph_limit = core.num_nodes
+    tag = args.tag or step3_data.get('timestamp')
+    print(f'Loaded Step 3 layout ({graph_limit} actors)')
+
+    supabase = get_supabase_client()
+    start_time = time.time()
+
+    published = fetch_published_layout(supabase, graph_limit)
+    changed, removed = diff_layout(core, published)
+    print(f'Published layout: {len(published)} actors; '
+          f'{len(changed)} changed, {len(removed)} removed, '
+          f'{graph_limit - len(changed)} unchanged')
+
+    if not changed and not removed:
+        print('Nothing to publish.')
+        return
+    if args.dry_run:
+        print('Dry run: no rows written.')
+        return
+
+    # Allocate the next version; it stays invisible until marked published
+    versions = supabase.table('layout_versions') \
+        .select('version') \
+        .eq('graph_limit', graph_limit) \
+        .order('version', desc=True) \
+        .range(0, 0) \
+        .execute()
+    version = (versions.data[0]['version'] if versions.data else 0) + 1
+    version_row = {
+        'graph_limit': graph_limit,
+        'version': version,
+        'tag': tag,
+        'status': 'writing',
+        'changed_rows': len(changed) + len(removed),
+    }
+    upsert_with_retry(supabase, 'layout_versions', [version_row], 'graph_limit,version', args.retries)
+    print(f'Writing version {version} ({tag})')
+
+    rows = [
+        {
+            'graph_limit': graph_limit,
+            'person_id': a['person_id'],
+            'version': version,
+            'ordinal': a['ordinal'],
+            'x': a['x'],
+            'y': a['y'],
+            'removed': False,
+        }
+        for a in changed
+    ] + [
+        {
+            'graph_limit': graph_limit,
+            'person_id': person_id,
+            'version': version,
+            'ordinal': None,
+            'x': None,
+            'y': None,
+            'removed': True,
+        }
+        for person_id in removed
+    ]
+
+    write_stats = write_batches(supabase, rows, args.batch_size, args.concurrency, args.retries)
+
+    # Every batch landed: make the version visible
+    version_row.update({'status': 'published', 'published_at': datetime.now().isoformat()})
+    upsert_with_retry(supabase, 'layout_versions', [version_row], 'graph_limit,version', args.retries)
+
+    print_header('STEP 5 COMPLETE')
+    print(f'Published version {version} for graph size {graph_limit}')
+    print(f'Rows written: {len(rows)} in {write_stats["batches"]} batches '
+          f'({write_stats["retries"]} retries)')
+    print(f'Time: {time.time() - start_time:.2f}s')
+    print(f'Peak RSS: {peak_rss_mb():.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
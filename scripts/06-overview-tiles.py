@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Step 6: Overview Tiles
+
+Rasterizes the Step 3 layout into a pyramid of PNG tiles for zoomed-out
+views, where drawing thousands of Circle/Edge components only produces a
+blur.  Each tile is TILE_SIZE pixels square; zoom level z splits the
+layout's bounding square into 2^z x 2^z tiles, so every level doubles the
+resolution of the one above it.
+
+Each tile has two layers:
+
+- Edge-density heatmap: every edge is clipped to the tile and sampled about
+  once per pixel along its length; the samples are binned into a per-pixel
+  density (pixel lengths of edge through each pixel), log-scaled and
+  colour-mapped.  The colour scale is fixed per level from a percentile of
+  that level's densest tile (the one under the level-0 peak), so adjacent
+  tiles line up.  Density does not simply halve per level: edges shorter
+  than a pixel put all their length into one pixel at low zoom.
+- Node dots: one anti-aliased disc per actor, sized by recognizability as
+  in the frontend (8-32 world units) and clamped to a few pixels.
+
+Tiles are rendered in parallel (one task per tile), and edges are sampled
+in chunks so a tile's memory stays bounded.  Tiles with nothing on them are
+skipped.  Output goes to optimization_outputs/tiles/{N}/{z}/{x}/{y}.png with
+a tiles.json manifest giving the world bounds and, per level, the pixels
+per world unit: the frontend shows the level whose scale matches its
+viewport zoom and switches to vector rendering past the deepest level.
+
+Usage:
+    python scripts/06-overview-tiles.py
+    python scripts/06-overview-tiles.py --max-zoom 5 --workers 4
+    python scripts/06-overview-tiles.py --graph optimization_outputs/graph-data-2000.json
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from graph_core import GraphCore, peak_rss_mb
+from optimization_utils import OUTPUT_DIR, load_step_output, print_header
+
+# Configuration
+TILE_SIZE = 256  # Pixels per tile side
+MAX_ZOOM = 4  # Deepest level (4**z tiles at level z)
+EDGE_CHUNK = 20000  # Edges sampled per batch (bounds samples per batch)
+DENSITY_PERCENTILE = 99.5  # Density percentile of a level's densest tile mapped to full intensity
+MIN_NODE_RADIUS, MAX_NODE_RADIUS = 8, 32  # World radius by recognizability (as in graphData.ts)
+MIN_DOT_PX, MAX_DOT_PX = 0.6, 6.0  # Dot radius clamp in pixels
+DOT_COLOR = (235, 240, 255)
+DOT_ALPHA = 0.9
+# Heatmap colour stops (intensity, RGBA): transparent -> violet -> orange -> pale yellow
+HEATMAP_STOPS = [
+    (0.0, (40, 10, 80, 0)),
+    (0.15, (70, 20, 120, 110)),
+    (0.5, (190, 60, 90, 190)),
+    (0.8, (250, 150, 50, 230)),
+    (1.0, (255, 245, 190, 255)),
+]
+TILES_DIR = OUTPUT_DIR / 'tiles'
+
+# Worker-global layout (populated by _init_worker in each process)
+_layout = None
+
+
+def _init_worker(layout: dict):
+    """Attach a worker process to the layout arrays."""
+    global _layout
+    _layout = layout
+
+
+# ---------------------------------------------------------------------------
+# Rasterization
+# ---------------------------------------------------------------------------
+
+def clip_segments(x0, y0, x1, y1, left, top, right, bottom) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Clip segments to a rectangle (Liang-Barsky, vectorized).
+
+    Returns:
+        (mask of segments that intersect, entry t, exit t) with t in [0, 1]
+        along each segment
+    """
+    dx, dy = x1 - x0, y1 - y0
+    t_in = np.zeros(len(x0))
+    t_out = np.ones(len(x0))
+    inside = np.ones(len(x0), dtype=bool)
+    for p, q in ((-dx, x0 - left), (dx, right - x0), (-dy, y0 - top), (dy, bottom - y0)):
+        parallel = p == 0
+        inside &= ~(parallel & (q < 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.where(parallel, 0.0, q / np.where(parallel, 1.0, p))
+        t_in = np.where(~parallel & (p < 0), np.maximum(t_in, r), t_in)
+        t_out = np.where(~parallel & (p > 0), np.minimum(t_out, r), t_out)
+    return inside & (t_in <= t_out), t_in, t_out
+
+
+def edge_density(layout: dict, left: float, top: float, scale: float, size: int = TILE_SIZE,
+                 chunk: int = EDGE_CHUNK) -> np.ndarray:
+    """
+    Per-pixel edge density for one tile.
+
+    Each clipped edge is sampled at ceil(length in pixels) + 1 evenly spaced
+    points weighted by length / samples, so a pixel's value is the pixel
+    length of edge passing through it.
+
+    Args:
+        layout: Edge endpoint arrays (ex0, ey0, ex1, ey1) in world units
+        left, top: World coordinates of the tile's top-left corner
+        scale: Pixels per world unit
+        size: Tile side in pixels
+        chunk: Edges sampled per batch
+    """
+    density = np.zeros(size * size)
+    right, bottom = left + size / scale, top + size / scale
+    ex0, ey0, ex1, ey1 = layout['ex0'], layout['ey0'], layout['ex1'], layout['ey1']
+    # Cheap bounding-box rejection before clipping
+    near = np.flatnonzero(
+        (np.maximum(ex0, ex1) >= left) & (np.minimum(ex0, ex1) <= right)
+        & (np.maximum(ey0, ey1) >= top) & (np.minimum(ey0, ey1) <= bottom)
+    )
+    for start in range(0, len(near), chunk):
+        e = near[start:start + chunk]
+        hit, t_in, t_out = clip_segments(ex0[e], ey0[e], ex1[e], ey1[e], left, top, right, bottom)
+        e, t_in, t_out = e[hit], t_in[hit], t_out[hit]
+        if not len(e):
+            continue
+        length = np.hypot(ex1[e] - ex0[e], ey1[e] - ey0[e]) * scale * (t_out - t_in)
+        samples = np.ceil(length).astype(np.int64) + 1
+        owner = np.repeat(np.arange(len(e)), samples)
+        step = np.arange(len(owner)) - np.repeat(np.cumsum(samples) - samples, samples)
+        t = t_in[owner] + (t_out - t_in)[owner] * step / np.maximum(samples[owner] - 1, 1)
+        px = ((ex0[e][owner] + (ex1[e] - ex0[e])[owner] * t - left) * scale).astype(np.int64)
+        py = ((ey0[e][owner] + (ey1[e] - ey0[e])[owner] * t - top) * scale).astype(np.int64)
+        np.clip(px, 0, size - 1, out=px)
+        np.clip(py, 0, size - 1, out=py)
+        density += np.bincount(py * size + px, weights=(length / samples)[owner], minlength=size * size)
+    return density.reshape(size, size)
+
+
+def node_coverage(layout: dict, left: float, top: float, scale: float, size: int = TILE_SIZE) -> np.ndarray:
+    """Per-pixel coverage (0-1) of the node dots on one tile, anti-aliased at the rim."""
+    radius = np.clip(layout['radius'] * scale, MIN_DOT_PX, MAX_DOT_PX)
+    cx = (layout['xs'] - left) * scale
+    cy = (layout['ys'] - top) * scale
+    near = np.flatnonzero((cx >= -radius) & (cx <= size + radius) & (cy >= -radius) & (cy <= size + radius))
+    coverage = np.zeros(size * size)
+    if not len(near):
+        return coverage.reshape(size, size)
+
+    reach = int(np.ceil(radius[near].max())) + 1
+    offsets = np.arange(-reach, reach + 1)
+    ox, oy = np.meshgrid(offsets, offsets)
+    ox, oy = ox.ravel(), oy.ravel()
+    # Pixel centres around each dot's own pixel
+    px = np.floor(cx[near])[:, None].astype(np.int64) + ox
+    py = np.floor(cy[near])[:, None].astype(np.int64) + oy
+    dist = np.hypot(px + 0.5 - cx[near][:, None], py + 0.5 - cy[near][:, None])
+    alpha = np.clip(radius[near][:, None] + 0.5 - dist, 0.0, 1.0)
+    keep = (alpha > 0) & (px >= 0) & (px < size) & (py >= 0) & (py < size)
+    np.maximum.at(coverage, (py * size + px)[keep], alpha[keep])
+    return coverage.reshape(size, size)
+
+
+def colorize(density: np.ndarray, coverage: np.ndarray, full_density: float) -> np.ndarray:
+    """Composite the log-scaled heatmap and the dots into an RGBA uint8 image."""
+    intensity = np.clip(np.log1p(density) / np.log1p(full_density), 0.0, 1.0)
+    stops = np.array([s for s, _ in HEATMAP_STOPS])
+    colors = np.array([c for _, c in HEATMAP_STOPS], dtype=np.float64)
+    rgba = np.stack([np.interp(intensity, stops, colors[:, k]) for k in range(4)], axis=-1)
+    rgba[density <= 0] = 0
+
+    # Dots "over" the heatmap (straight alpha)
+    dot_alpha = coverage * DOT_ALPHA
+    base_alpha = rgba[..., 3] / 255
+    out_alpha = dot_alpha + base_alpha * (1 - dot_alpha)
+    for k in range(3):
+        blended = DOT_COLOR[k] * dot_alpha + rgba[..., k] * base_alpha * (1 - dot_alpha)
+        rgba[..., k] = np.divide(blended, out_alpha, out=np.zeros_like(blended), where=out_alpha > 0)
+    rgba[..., 3] = out_alpha * 255
+    return np.round(rgba).astype(np.uint8)
+
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Encode an (h, w, 4) uint8 image as a PNG (no filtering)."""
+    height, width = rgba.shape[:2]
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + chunk(b'IEND', b''))
+
+
+def _render_tile(task: tuple[int, int, int]) -> Optional[tuple[int, int, int, int]]:
+    """
+    Render and write one tile.
+
+    Returns:
+        (z, x, y, PNG bytes) for a written tile, None for an empty one
+    """
+    z, tx, ty = task
+    layout = _layout
+    scale = TILE_SIZE * 2 ** z / layout['side']
+    left = layout['left'] + tx * TILE_SIZE / scale
+    top = layout['top'] + ty * TILE_SIZE / scale
+    density = edge_density(layout, left, top, scale)
+    coverage = node_coverage(layout, left, top, scale)
+    if not density.any() and not coverage.any():
+        return None
+
+    full_density = layout['full_density'][z]
+    png = encode_png(colorize(density, coverage, full_density))
+    path = Path(layout['out_dir']) / str(z) / str(tx) / f'{ty}.png'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(png)
+    return z, tx, ty, len(png)
+
+
+def build_layout(core: GraphCore, recognizability: np.ndarray) -> dict:
+    """Edge endpoints, dot radii and the bounding square of a laid-out core."""
+    pairs = core.edge_pairs()
+    radius = MIN_NODE_RADIUS + np.clip(recognizability, 0, 100) / 100 * (MAX_NODE_RADIUS - MIN_NODE_RADIUS)
+    left = float((core.xs - radius).min())
+    top = float((core.ys - radius).min())
+    side = max(float((core.xs + radius).max()) - left, float((core.ys + radius).max()) - top)
+    return {
+        'xs': core.xs, 'ys': core.ys, 'radius': radius,
+        'ex0': core.xs[pairs[:, 0]], 'ey0': core.ys[pairs[:, 0]],
+        'ex1': core.xs[pairs[:, 1]], 'ey1': core.ys[pairs[:, 1]],
+        'left': left, 'top': top, 'side': side,
+    }
+
+
+def render_pyramid(layout: dict, out_dir: Path, max_zoom: int = MAX_ZOOM, workers: Optional[int] = None) -> dict:
+    """
+    Render every level 0..max_zoom into out_dir and write its manifest.
+
+    Returns:
+        The manifest (also saved as out_dir/tiles.json)
+    """
+    start_time = time.time()
+    level0 = edge_density(layout, layout['left'], layout['top'], TILE_SIZE / layout['side'])
+    peak_y, peak_x = np.unravel_index(np.argmax(level0), level0.shape)
+    layout['full_density'] = []
+    for z in range(max_zoom + 1):
+        scale = TILE_SIZE * 2 ** z / layout['side']
+        tx, ty = peak_x * 2 ** z // TILE_SIZE, peak_y * 2 ** z // TILE_SIZE
+        densest = edge_density(layout, layout['left'] + tx * TILE_SIZE / scale,
+                               layout['top'] + ty * TILE_SIZE / scale, scale)
+        full = np.percentile(densest[densest > 0], DENSITY_PERCENTILE) if densest.any() else 1.0
+        layout['full_density'].append(max(float(full), 1.0))
+    layout['out_dir'] = str(out_dir)
+
+    tasks = [(z, tx, ty) for z in range(max_zoom + 1) for tx in range(2 ** z) for ty in range(2 ** z)]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        _init_worker(layout)
+        rendered = [_render_tile(task) for task in tasks]
+    else:
+        with Pool(processes=workers, initializer=_init_worker, initargs=(layout,)) as pool:
+            # Deep levels dominate the work; small chunks keep workers balanced
+            rendered = pool.map(_render_tile, tasks, chunksize=4)
+
+    written = [r for r in rendered if r]
+    levels = []
+    for z in range(max_zoom + 1):
+        level_tiles = [r for r in written if r[0] == z]
+        levels.append({
+            'zoom': z,
+            'grid': 2 ** z,
+            'pixels_per_unit': round(TILE_SIZE * 2 ** z / layout['side'], 6),
+            'full_density': round(layout['full_density'][z], 2),
+            'tiles': [[x, y] for _, x, y, _ in sorted(level_tiles)],
+        })
+    manifest = {
+        'generated': datetime.now().isoformat(),
+        'tile_size': TILE_SIZE,
+        'max_zoom': max_zoom,
+        'bounds': {'left': layout['left'], 'top': layout['top'], 'side': layout['side']},
+        'path_template': '{z}/{x}/{y}.png',
+        'vector_above_pixels_per_unit': levels[-1]['pixels_per_unit'],
+        'levels': levels,
+        'stats': {
+            'tiles_written': len(written),
+            'tiles_empty': len(tasks) - len(written),
+            'bytes': sum(r[3] for r in written),
+            'workers': workers,
+            'elapsed_seconds': round(time.time() - start_time, 2),
+        },
+    }
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / 'tiles.json', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Step 6: overview tiles')
+    parser.add_argument('--graph', type=Path, default=None,
+                        help='Graph JSON with positioned actors (default: Step 3 output)')
+    parser.add_argument('--max-zoom', type=int, default=MAX_ZOOM,
+                        help=f'Deepest zoom level (default {MAX_ZOOM})')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--out', type=Path, default=None,
+                        help=f'Output directory (default {TILES_DIR}/<actors>)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    print_header('STEP 6: OVERVIEW TILES')
+
+    try:
+        if args.graph:
+            with open(args.graph) as f:
+                data = json.load(f)
+        else:
+            data = load_step_output('03-swap-optimization')
+    except FileNotFoundError:
+        print('Error: Step 3 output not found. Run Step 3 first.')
+        return
+
+    core = GraphCore.from_step_output(data)
+    recognizability = np.array([a.get('recognizability') or 0 for a in data['actors']], dtype=np.float64)
+    del data
+    out_dir = args.out or TILES_DIR / str(core.num_nodes)
+    print(f'Loaded layout ({core.num_nodes:,} actors, {core.num_edges:,} edges)')
+    print(f'Rendering levels 0-{args.max_zoom} into {out_dir}...')
+
+    manifest = render_pyramid(build_layout(core, recognizability), out_dir, args.max_zoom, args.workers)
+    stats = manifest['stats']
+    for level in manifest['levels']:
+        print(f"  z{level['zoom']}: {len(level['tiles']):>4} of {level['grid'] ** 2:>4} tiles, "
+              f"{level['pixels_per_unit']:.4f} px per unit")
+
+    print_header('STEP 6 COMPLETE')
+    print(f"Tiles: {stats['tiles_written']:,} ({stats['tiles_empty']:,} empty skipped), "
+          f"{stats['bytes'] / 1e6:.1f} MB")
+    print(f"Time: {stats['elapsed_seconds']:.2f}s with {stats['workers']} workers")
+    print(f'Vector rendering above {manifest["vector_above_pixels_per_unit"]:.4f} px per unit')
+    print(f'Peak RSS: {peak_rss_mb():.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Anytime profiling: total distance against time and evaluations.
+
+OPTIMIZATION_PROGRESS.md records one final average distance per run, which
+says nothing about how fast a strategy gets there.  This harness runs Step 2
+orderings plus Step 3 optimizer configurations on one fixed graph, several
+seeds each, and samples the total distance as the run goes (through a
+tracing RunController, so every controller check is a sample).
+
+Each curve starts when the ordering finishes (at the Step 2 total) and
+ends with the final layout's total, so an expensive ordering is charged
+for its time.  Evaluations are counted in each optimizer's own unit: delta
+evaluations for the serial swap loop, proposals for sector-parallel runs,
+solved windows for assignment refinement.  With --components or
+--prune-2core the samples are the optimized subgraph's total until the
+final point.
+
+Per configuration the report gives, across seeds:
+
+- Final total distance
+- Time (and evaluations) to target: first sample within --target-pct of
+  the best final total found by any run
+- Normalized AUC: mean over [0, horizon] of the gap to that best total,
+  scaled so the worst starting total is 1 (the gap counts as 1 until the
+  ordering finishes, and stays at the final value after the run ends).
+  Lower means good layouts sooner.
+
+Curves and the summary are saved to optimization_outputs/anytime/.
+
+Usage:
+    python scripts/anytime_profile.py --graph optimization_outputs/graph-data-500.json \\
+        --config "degree: --ordering degree_descending" \\
+        --config "force: --ordering force_directed" \\
+        --config "chain-heavy: --move-mix swap=0.4,chain=0.6" --seeds 1,2,3
+    python scripts/anytime_profile.py --limit 2000 --config "--budget 30" --target-pct 0.5
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import shlex
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from graph_core import GraphCore, peak_rss_mb
+from optimization_utils import OUTPUT_DIR, SCRIPT_DIR, print_header
+from run_controller import controller_from_args
+from stage_cache import content_hash
+
+# Configuration
+DEFAULT_GRAPH = OUTPUT_DIR / 'graph-data-500.json'
+DEFAULT_SEEDS = '1,2,3'
+TARGET_PCT = 1.0  # Time-to-target threshold: within this % of the best final total
+STEP2_OPTIONS = ('--ordering', '--pivots', '--force-iterations')  # Routed to Step 2's parser
+ANYTIME_DIR = OUTPUT_DIR / 'anytime'
+
+
+def load_step_module(name: str):
+    """Import a numbered step script (e.g. '03-swap-optimization') as a module."""
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), SCRIPT_DIR / f'{name}.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_config(spec: str, step2, step3) -> tuple[str, argparse.Namespace, argparse.Namespace]:
+    """
+    Split a "[LABEL:] options" configuration into Step 2 and Step 3 arguments.
+
+    Returns:
+        (label, step 2 args, step 3 args)
+    """
+    label, _, options = spec.partition(':') if ':' in spec.split('--')[0] else ('', '', spec)
+    tokens = shlex.split(options)
+    step2_tokens, step3_tokens = [], []
+    i = 0
+    while i < len(tokens):
+        name = tokens[i].split('=')[0]
+        if name in STEP2_OPTIONS:
+            takes_value = '=' not in tokens[i]
+            step2_tokens += tokens[i:i + 1 + takes_value]
+            i += 1 + takes_value
+        else:
+            step3_tokens.append(tokens[i])
+            i += 1
+    return label.strip() or ' '.join(tokens) or 'defaults', step2.parse_args(step2_tokens), step3.parse_args(step3_tokens)
+
+
+# ---------------------------------------------------------------------------
+# Runs
+# ---------------------------------------------------------------------------
+
+def run_ordering(step2, actors: list[dict], edges: list[tuple[int, int]], core: GraphCore,
+                 args: argparse.Namespace) -> tuple[dict, dict, float, float]:
+    """
+    Step 2 ordering placed on the Vogel slots.
+
+    Returns:
+        (positions, ordinals, total distance, seconds taken)
+    """
+    start_time = time.time()
+    actor_ids = [a['person_id'] for a in actors]
+    order, _, _ = step2.compute_ordering(actor_ids, edges, core, args)
+    ordinals = [0] * len(actors)
+    for ordinal, i in enumerate(order):
+        ordinals[i] = ordinal
+    core.place_on_slots(ordinals)
+    elapsed = time.time() - start_time
+    return core.positions(), core.ordinal_map(), core.metrics(crossings=False).total_distance, elapsed
+
+
+def run_optimizer(step3, actors: list[dict], edges: list[tuple[int, int]], core: GraphCore,
+                  ordering: tuple[dict, dict, float, float], args: argparse.Namespace) -> dict:
+    """
+    One Step 3 run from an ordering, sampled through a tracing controller.
+
+    Returns:
+        Run record with the curve as [seconds, evaluations, total distance]
+        points (seconds include the ordering time)
+    """
+    positions, ordinals, start_total, ordering_seconds = ordering
+    controller = controller_from_args(args, trace=True)
+    start_time = time.time()
+    final_positions, final_ordinals, stats, _ = step3.optimize_layout(
+        actors, edges, dict(positions), dict(ordinals), args, controller
+    )
+    end_time = time.time()
+    core.set_layout(final_positions, final_ordinals)
+    final_total = core.metrics(crossings=False).total_distance
+
+    # Evaluations restart at 0 in every optimizer phase (nested tiers, refinement)
+    curve = [[round(ordering_seconds, 4), 0, start_total]]
+    offset = previous = 0
+    for timestamp, evaluations, value in controller.trace:
+        if evaluations < previous:
+            offset += previous
+        previous = evaluations
+        curve.append([round(timestamp - start_time + ordering_seconds, 4), offset + evaluations, value])
+    curve.append([round(end_time - start_time + ordering_seconds, 4), offset + previous, final_total])
+
+    return {
+        'seed': args.seed,
+        'ordering_seconds': round(ordering_seconds, 4),
+        'start_total': start_total,
+        'final_total': final_total,
+        'stopped_reason': stats.get('stopped_reason'),
+        'curve': curve,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Curve metrics
+# ---------------------------------------------------------------------------
+
+def time_to_target(curve: list[list[float]], target: float) -> tuple[Optional[float], Optional[int]]:
+    """(seconds, evaluations) of the first sample at or below target, or (None, None)."""
+    for seconds, evaluations, value in curve:
+        if value <= target:
+            return seconds, evaluations
+    return None, None
+
+
+def normalized_auc(curve: list[list[float]], best: float, worst: float, horizon: float) -> float:
+    """
+    Mean normalized gap (value - best) / (worst - best) over [0, horizon].
+
+    The curve is a step function: the gap is 1 before the first sample, and
+    each sample's value holds until the next (the last one until horizon).
+    """
+    if horizon <= 0 or worst <= best:
+        return 0.0
+    area = 0.0
+    previous_time, previous_gap = 0.0, 1.0
+    for seconds, _, value in curve:
+        seconds = min(seconds, horizon)
+        area += previous_gap * (seconds - previous_time)
+        previous_time, previous_gap = seconds, min(max((value - best) / (worst - best), 0.0), 1.0)
+    area += previous_gap * (horizon - previous_time)
+    return area / horizon
+
+
+def summarize(runs: list[dict], target_pct: float, horizon: Optional[float] = None) -> dict:
+    """
+    Add per-run time-to-target and AUC, and aggregate them per configuration.
+
+    Returns:
+        {'best_total', 'target_total', 'horizon_seconds', 'configs': {label: stats}}
+    """
+    best = min(r['final_total'] for r in runs)
+    worst = max(r['start_total'] for r in runs)
+    target = best * (1 + target_pct / 100)
+    horizon = horizon or max(r['curve'][-1][0] for r in runs)
+
+    configs = {}
+    for run in runs:
+        run['time_to_target'], run['evaluations_to_target'] = time_to_target(run['curve'], target)
+        run['auc'] = round(normalized_auc(run['curve'], best, worst, horizon), 6)
+        configs.setdefault(run['config'], []).append(run)
+
+    def spread(values: list[float]) -> dict:
+        if not values:
+            return {'mean': None, 'stdev': None}
+        return {'mean': statistics.fmean(values), 'stdev': statistics.stdev(values) if len(values) > 1 else 0.0}
+
+    summary = {}
+    for label, config_runs in configs.items():
+        reached = [r for r in config_runs if r['time_to_target'] is not None]
+        summary[label] = {
+            'runs': len(config_runs),
+            'reached_target': len(reached),
+            'final_total': spread([r['final_total'] for r in config_runs]),
+            'time_to_target': spread([r['time_to_target'] for r in reached]),
+            'evaluations_to_target': spread([r['evaluations_to_target'] for r in reached]),
+            'auc': spread([r['auc'] for r in config_runs]),
+            'seconds': spread([r['curve'][-1][0] for r in config_runs]),
+        }
+    return {'best_total': best, 'target_total': target, 'horizon_seconds': horizon, 'configs': summary}
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Anytime quality-vs-time profiling of layout optimizers')
+    graphs = parser.add_mutually_exclusive_group()
+    graphs.add_argument('--graph', type=Path, default=None,
+                        help=f'Graph JSON with actors and edges (default {DEFAULT_GRAPH})')
+    graphs.add_argument('--limit', type=int, default=None,
+                        help='Use the cached graph snapshot of this size (see stage_cache.py)')
+    parser.add_argument('--config', action='append', default=None, metavar='"[LABEL:] OPTIONS"',
+                        help='Step 2 and Step 3 options for one configuration (repeatable)')
+    parser.add_argument('--seeds', default=DEFAULT_SEEDS,
+                        help=f'Comma-separated Step 3 seeds per configuration (default {DEFAULT_SEEDS})')
+    parser.add_argument('--target-pct', type=float, default=TARGET_PCT,
+                        help=f'Target: within this %% of the best final total (default {TARGET_PCT})')
+    parser.add_argument('--horizon', type=float, default=None,
+                        help='AUC horizon in seconds (default: longest run)')
+    parser.add_argument('--verbose', action='store_true', help="Show the steps' own progress output")
+    return parser.parse_args()
+
+
+def fmt(stat: dict, spec: str = '.2f') -> str:
+    if stat['mean'] is None:
+        return '-'
+    return f"{stat['mean']:{spec}} ±{stat['stdev']:{spec}}"
+
+
+def main():
+    args = parse_args()
+    step2 = load_step_module('02-centrality-ordering')
+    step3 = load_step_module('03-swap-optimization')
+    configs = [parse_config(spec, step2, step3) for spec in (args.config or [''])]
+    seeds = [int(seed) for seed in args.seeds.split(',') if seed.strip()]
+
+    print_header('ANYTIME PROFILE')
+
+    if args.limit:
+        from stage_cache import load_graph_snapshot
+        actors, edges, graph_hash = load_graph_snapshot(args.limit)
+        source = f'snapshot {graph_hash[:12]} ({args.limit} actors)'
+    else:
+        path = args.graph or DEFAULT_GRAPH
+        with open(path) as f:
+            data = json.load(f)
+        actors = data['actors']
+        edges = [(e['source'], e['target']) for e in data['edges']]
+        graph_hash = content_hash({'actors': [a['person_id'] for a in actors], 'edges': edges})
+        source = str(path)
+    core = GraphCore.from_edges([a['person_id'] for a in actors], edges)
+    print(f'Graph: {source}, {len(actors):,} actors, {len(edges):,} edges')
+    print(f'{len(configs)} configurations x {len(seeds)} seeds\n')
+
+    # The steps' progress output is dropped unless --verbose
+    def step_output():
+        return contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    runs = []
+    for label, step2_args, step3_args in configs:
+        with step_output():
+            ordering = run_ordering(step2, actors, edges, core, step2_args)
+        for seed in seeds:
+            step3_args.seed = seed
+            with step_output():
+                run = run_optimizer(step3, actors, edges, core, ordering, step3_args)
+            run['config'] = label
+            runs.append(run)
+            print(f"  {label} / seed {seed}: {run['start_total']:,.0f} -> {run['final_total']:,.0f} "
+                  f"in {run['curve'][-1][0]:.2f}s ({len(run['curve'])} samples, {run['stopped_reason']})")
+
+    summary = summarize(runs, args.target_pct, args.horizon)
+    print(f"\nBest final total {summary['best_total']:,.0f}; target {summary['target_total']:,.0f} "
+          f"(+{args.target_pct:g}%); AUC horizon {summary['horizon_seconds']:.2f}s\n")
+    width = max(len(label) for label in summary['configs'])
+    print(f"{'config':<{width}}  {'final total':>20}  {'reached':>7}  {'time to target (s)':>18}  "
+          f"{'evals to target':>22}  {'norm. AUC':>15}")
+    for label, stats in summary['configs'].items():
+        print(f"{label:<{width}}  {fmt(stats['final_total'], ',.0f'):>20}  "
+              f"{stats['reached_target']:>3}/{stats['runs']:<3}  {fmt(stats['time_to_target']):>18}  "
+              f"{fmt(stats['evaluations_to_target'], ',.0f'):>22}  {fmt(stats['auc'], '.4f'):>15}")
+
+    ANYTIME_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = ANYTIME_DIR / f"anytime-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output_path, 'w') as f:
+        json.dump({
+            'timestamp': datetime.now().isoformat(),
+            'graph': source,
+            'graph_hash': graph_hash,
+            'seeds': seeds,
+            'target_pct': args.target_pct,
+            'configs': [
+                {'label': label, 'step2': vars(step2_args), 'step3': {**vars(step3_args), 'seed': None}}
+                for label, step2_args, step3_args in configs
+            ],
+            'summary': summary,
+            'runs': runs,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        }, f, indent=2, default=str)
+    print(f'\nSaved curves to {output_path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Windowed optimal-assignment refinement.
+
+Random pair swaps only find the best arrangement of a group of slots by luck.
+This pass picks a window of k actors and the k slots they occupy, holds every
+other actor fixed, and solves the k x k assignment exactly: cost[a][s] is the
+summed length of actor a's edges to actors outside the window if a sat on
+slot s.  Edges inside the window are left out of the matrix, so each solution
+is re-scored exactly (all edges) before it is applied and kept only if the
+total distance drops.
+
+Windows are chosen two ways:
+- Spatial: the k slots nearest a random slot
+- Tension: half the slots around a high-tension actor, half around the
+  centroid of its neighbours, so that actor can jump to where it belongs
+
+Frozen actors (e.g. the earlier tiers of a nested run) keep their slots:
+their slots never join a window and they are never sampled by tension.
+
+Each round picks several slot-disjoint windows.  With workers > 1 they are
+solved concurrently against shared-memory positions and then applied one by
+one in the parent, each re-scored against the layout as it stands.
+"""
+
+import random
+import time
+from multiprocessing import Pool, RawArray
+from typing import Optional
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from graph_core import GraphCore
+from optimization_utils import SlotGrid
+from run_controller import RunController
+
+# Configuration
+DEFAULT_WINDOW_SIZE = 24  # Actors (and slots) per window
+DEFAULT_WINDOWS_PER_ROUND = 8  # Slot-disjoint windows solved per round
+DEFAULT_STAGNATION_WINDOWS = 400  # Consecutive non-improving windows before stopping
+DEFAULT_MAX_WINDOWS = 200_000  # Safety limit on windows solved
+TENSION_WINDOW_RATE = 0.5  # Share of windows seeded by a tension-sampled actor
+
+# Worker-global state (populated by _init_worker in each process)
+_pos_x = None
+_pos_y = None
+_offsets = None
+_neighbors = None
+
+
+def _init_worker(pos_x, pos_y, offsets: np.ndarray, neighbors: np.ndarray):
+    """Attach a worker process to the shared positions and the CSR graph."""
+    global _pos_x, _pos_y, _offsets, _neighbors
+    _pos_x = np.frombuffer(pos_x, dtype=np.float64)
+    _pos_y = np.frombuffer(pos_y, dtype=np.float64)
+    _offsets = offsets
+    _neighbors = neighbors
+
+
+def _incident(members: np.ndarray, offsets: np.ndarray, neighbors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gather the edges incident to `members`.
+
+    Returns:
+        (owner, neighbour) arrays; owner is the position in `members`
+    """
+    starts = offsets[members]
+    counts = offsets[members + 1] - starts
+    owner = np.repeat(np.arange(len(members)), counts)
+    flat = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts) + np.arange(counts.sum())
+    return owner, neighbors[flat]
+
+
+def _solve_window(task: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]) -> tuple[np.ndarray, float]:
+    """
+    Solve one window's assignment against the current shared positions.
+
+    Args:
+        task: (window actor indices, their slots, slot x, slot y); actor
+              members[r] currently sits on slots[r]
+
+    Returns:
+        (column index into `slots` for each actor, estimated delta over
+         edges leaving the window)
+    """
+    members, slots, sx, sy = task
+    owner, nbr = _incident(members, _offsets, _neighbors)
+
+    # Only edges leaving the window enter the cost matrix
+    outside = ~np.isin(nbr, members)
+    owner, nbr = owner[outside], nbr[outside]
+
+    dist = np.hypot(sx[None, :] - _pos_x[nbr][:, None], sy[None, :] - _pos_y[nbr][:, None])
+    cost = np.zeros((len(members), len(slots)))
+    np.add.at(cost, owner, dist)
+
+    rows, cols = linear_sum_assignment(cost)
+    current = np.trace(cost)
+    return cols[np.argsort(rows)], float(cost[rows, cols].sum() - current)
+
+
+def run_assignment_refinement(
+    actors: list[dict],
+    edges: list[tuple[int, int]],
+    initial_positions: dict[int, tuple[float, float]],
+    initial_ordinals: dict[int, int],
+    window_size: int = DEFAULT_WINDOW_SIZE,
+    windows_per_round: int = DEFAULT_WINDOWS_PER_ROUND,
+    stagnation_windows: int = DEFAULT_STAGNATION_WINDOWS,
+    max_windows: int = DEFAULT_MAX_WINDOWS,
+    workers: int = 1,
+    seed: int = 42,
+    controller: Optional[RunController] = None,
+    frozen: Optional[set[int]] = None
+) -> tuple[dict[int, tuple[float, float]], dict[int, int], dict]:
+    """
+    Refine a layout by solving windowed assignment problems.
+
+    Args:
+        actors: List of actor dicts with person_id
+        edges: List of (actor_id_1, actor_id_2) tuples
+        initial_positions: Dict mapping actor_id to (x, y)
+        initial_ordinals: Dict mapping actor_id to ordinal
+        window_size: Actors per window (k)
+        windows_per_round: Slot-disjoint windows picked (and solved in parallel) per round
+        stagnation_windows: Stop after this many consecutive non-improving windows
+        max_windows: Safety limit on windows solved
+        workers: Worker processes for solving windows
+        seed: Random seed
+        controller: Optional run controller, checked after every round.  If
+            it is already running (e.g. after the swap phase), the refinement
+            continues its clock, baseline and rate window rather than
+            restarting it, so the limits cover both phases together
+        frozen: Optional set of actor_ids that keep their slots
+
+    Returns:
+        - Final positions dict
+        - Final ordinals dict
+        - Stats dict with convergence information
+    """
+    global _pos_x, _pos_y, _offsets, _neighbors
+    rng = random.Random(seed)
+
+    actor_ids = [a['person_id'] for a in actors]
+    n = len(actor_ids)
+
+    # CSR adjacency over dense indices
+    core = GraphCore.from_edges(actor_ids, edges)
+    offsets, neighbors = core.offsets, core.neighbors
+
+    # Shared positions; slot geometry (slot = ordinal)
+    pos_x = RawArray('d', [initial_positions[a][0] for a in actor_ids])
+    pos_y = RawArray('d', [initial_positions[a][1] for a in actor_ids])
+    xs = np.frombuffer(pos_x, dtype=np.float64)
+    ys = np.frombuffer(pos_y, dtype=np.float64)
+    slot_of = np.array([initial_ordinals[a] for a in actor_ids], dtype=np.int64)
+    num_slots = int(slot_of.max()) + 1
+    slot_x = np.zeros(num_slots)
+    slot_y = np.zeros(num_slots)
+    slot_x[slot_of], slot_y[slot_of] = xs, ys
+    occupant = np.full(num_slots, -1, dtype=np.int64)
+    occupant[slot_of] = np.arange(n)
+
+    # Windows only draw from slots held by movable actors
+    movable = np.array([frozen is None or actor_id not in frozen for actor_id in actor_ids])
+    k = min(window_size, int(movable.sum()))
+    slot_grid = SlotGrid(slot_x.tolist(), slot_y.tolist())
+    for slot in range(num_slots):
+        if occupant[slot] < 0 or not movable[occupant[slot]]:
+            slot_grid.remove(slot)
+    occupied = [s for s in range(num_slots) if occupant[s] >= 0 and movable[occupant[s]]]
+
+    def contributions(members: np.ndarray) -> np.ndarray:
+        owner, nbr = _incident(members, offsets, neighbors)
+        dist = np.hypot(xs[members][owner] - xs[nbr], ys[members][owner] - ys[nbr])
+        return np.bincount(owner, weights=dist, minlength=len(members))
+
+    tension = contributions(np.arange(n))
+    total_distance = float(tension.sum() / 2)
+    print(f'Initial total distance: {total_distance:,.2f}')
+
+    def pick_window(taken: set[int]) -> Optional[np.ndarray]:
+        """Pick up to k free occupied slots, by tension or spatial locality."""
+        weights = np.where(movable, tension, 0.0)
+        if rng.random() < TENSION_WINDOW_RATE and weights.sum() > 0:
+            cumulative = np.cumsum(weights)
+            a = int(np.searchsorted(cumulative, rng.random() * cumulative[-1], side='right'))
+            a = min(a, n - 1)
+            owner, nbr = _incident(np.array([a]), offsets, neighbors)
+            centers = [(xs[a], ys[a])]
+            if len(nbr):
+                centers.append((float(xs[nbr].mean()), float(ys[nbr].mean())))
+        else:
+            seed_slot = occupied[rng.randrange(len(occupied))]
+            centers = [(slot_x[seed_slot], slot_y[seed_slot])]
+
+        window: list[int] = []
+        share = -(-k // len(centers))
+        for cx, cy in centers:
+            for slot in slot_grid.nearest(cx, cy, share + len(window), exclude=taken):
+                if slot not in window and len(window) < k:
+                    window.append(slot)
+        if len(window) < 2:
+            return None
+        taken.update(window)
+        return np.array(window, dtype=np.int64)
+
+    def apply_window(members: np.ndarray, slots: np.ndarray, cols: np.ndarray) -> float:
+        """Move members[r] to slots[cols[r]] if that lowers the exact total; return delta."""
+        owner, nbr = _incident(members, offsets, neighbors)
+        # Edges inside the window are seen from both ends
+        weight = np.where(np.isin(nbr, members), 0.5, 1.0)
+        old = float((weight * np.hypot(xs[members][owner] - xs[nbr], ys[members][owner] - ys[nbr])).sum())
+
+        old_x, old_y = xs[members].copy(), ys[members].copy()
+        new_slots = slots[cols]
+        xs[members], ys[members] = slot_x[new_slots], slot_y[new_slots]
+        new = float((weight * np.hypot(xs[members][owner] - xs[nbr], ys[members][owner] - ys[nbr])).sum())
+
+        delta = new - old
+        if delta < -0.001:
+            slot_of[members] = new_slots
+            occupant[new_slots] = members
+            touched = np.unique(np.concatenate((members, nbr)))
+            tension[touched] = contributions(touched)
+            return delta
+        xs[members], ys[members] = old_x, old_y
+        return 0.0
+
+    windows_solved = 0
+    windows_improved = 0
+    actors_moved = 0
+    stagnation_counter = 0
+    rounds = 0
+    stopped_reason = None
+    start_time = time.time()
+    if controller:
+        if controller.start_time is None:
+            controller.start(total_distance)
+        else:
+            stopped_reason = controller.check(total_distance, evaluations=0)
+
+    pool = None
+    if workers > 1:
+        pool = Pool(processes=workers, initializer=_init_worker, initargs=(pos_x, pos_y, offsets, neighbors))
+    else:
+        _pos_x, _pos_y, _offsets, _neighbors = xs, ys, offsets, neighbors
+
+    try:
+        while (stopped_reason is None and stagnation_counter < stagnation_windows
+               and windows_solved < max_windows and k >= 2):
+            taken: set[int] = set()
+            windows = [w for w in (pick_window(taken) for _ in range(windows_per_round)) if w is not None]
+            tasks = [(occupant[w], w, slot_x[w], slot_y[w]) for w in windows]
+
+            results = pool.map(_solve_window, tasks) if pool else [_solve_window(t) for t in tasks]
+            rounds += 1
+
+            for (members, slots, _, _), (cols, estimate) in zip(tasks, results):
+                windows_solved += 1
+                delta = apply_window(members, slots, cols) if estimate < -0.001 else 0.0
+                if delta < 0:
+                    total_distance += delta
+                    windows_improved += 1
+                    actors_moved += int((cols != np.arange(len(cols))).sum())
+                    stagnation_counter = 0
+                else:
+                    stagnation_counter += 1
+
+            print(f'\rRound {rounds}: {windows_improved}/{windows_solved} windows improved, '
+                  f'total distance: {total_distance:,.2f}', end='', flush=True)
+
+            if controller:
+                stopped_reason = controller.check(total_distance, evaluations=windows_solved)
+                if stopped_reason:
+                    break
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    elapsed_time = time.time() - start_time
+    print()  # New line after progress
+
+    if stopped_reason is None:
+        stopped_reason = 'stagnation' if stagnation_counter >= stagnation_windows else 'max_windows'
+
+    positions = {actor_id: (float(xs[i]), float(ys[i])) for i, actor_id in enumerate(actor_ids)}
+    ordinals = {actor_id: int(slot_of[i]) for i, actor_id in enumerate(actor_ids)}
+
+    stats = {
+        'mode': 'assignment',
+        'window_size': k,
+        'windows_per_round': windows_per_round,
+        'workers': workers,
+        'rounds': rounds,
+        'windows_solved': windows_solved,
+        'windows_improved': windows_improved,
+        'actors_moved': actors_moved,
+        'elapsed_seconds': round(elapsed_time, 2),
+        'stopped_reason': stopped_reason,
+    }
+
+    return positions, ordinals, stats
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Sampled closeness and harmonic centrality.
+
+Runs BFS from a random sample of pivot actors (in parallel over a CSR graph)
+and estimates every actor's closeness and harmonic centrality from its
+distances to the pivots, following Eppstein & Wang.
+
+Each actor gets its own confidence interval: a normal approximation over the
+pivots it reaches, from their count and the spread of its distances to them,
+finite population corrected (as in crossings.py).  Rank stability is the
+Spearman correlation between the closeness rankings computed from two
+disjoint halves of the pivots.
+
+Closeness uses the Wasserman-Faust form, which stays meaningful on a
+disconnected graph:  (reachable fraction) / (average distance to reachable).
+
+Usage:
+    python scripts/centrality.py [--pivots 64] [--top 20]
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from dataclasses import dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from statistics import NormalDist
+from typing import Optional, Sequence
+
+import numpy as np
+
+from graph_core import GraphCore
+
+# Configuration
+DEFAULT_PIVOTS = 64  # BFS sources sampled for the estimate
+DEFAULT_CONFIDENCE = 0.95  # Confidence level of the per-actor intervals
+DEFAULT_GRAPH_PATH = Path(__file__).parent.parent / 'optimization_outputs' / 'graph-data-20000.json'
+
+# Worker-global CSR graph (populated by _init_worker in each process)
+_offsets = None
+_neighbors = None
+
+
+@dataclass
+class CentralityEstimate:
+    """Per-actor centrality estimates with per-actor confidence intervals."""
+    node_ids: list[int]
+    closeness: list[float]
+    harmonic: list[float]
+    avg_distance: list[float]  # Estimated mean hops to reachable actors (inf if none)
+    avg_distance_error: list[float]  # +/- half-width on avg_distance, in hops (inf with < 2 pivots reached)
+    harmonic_error: list[float]  # +/- half-width on harmonic centrality
+    rank_stability: Optional[float]  # Split-half Spearman correlation of closeness ranks (None with < 2 pivots)
+    num_pivots: int
+    confidence: float
+    elapsed_seconds: float
+
+    def relative_error(self, i: int) -> float:
+        """Relative half-width of the avg_distance (and so closeness) estimate for actor i."""
+        if not math.isfinite(self.avg_distance[i]):
+            return math.inf
+        return self.avg_distance_error[i] / self.avg_distance[i]
+
+    def closeness_bounds(self, i: int) -> tuple[float, float]:
+        """Lower/upper closeness bound for the actor at dense index i."""
+        if self.closeness[i] == 0.0:
+            return 0.0, 0.0
+        reach = self.closeness[i] * self.avg_distance[i]
+        upper_dist = self.avg_distance[i] + self.avg_distance_error[i]
+        lower_dist = max(self.avg_distance[i] - self.avg_distance_error[i], 1.0)
+        return reach / upper_dist, reach / lower_dist
+
+    def top_k(self, k: int, measure: str = 'closeness') -> list[int]:
+        """Return the person_ids of the k most central actors."""
+        scores = self.closeness if measure == 'closeness' else self.harmonic
+        order = sorted(range(len(self.node_ids)), key=lambda i: scores[i], reverse=True)
+        return [self.node_ids[i] for i in order[:k]]
+
+    def error_summary(self) -> dict:
+        """Median and 90th percentile relative error over actors that reach 2+ pivots."""
+        relative = np.array([self.relative_error(i) for i in range(len(self.node_ids))])
+        relative = relative[np.isfinite(relative)]
+        if not len(relative):
+            return {'median_relative_error': None, 'p90_relative_error': None}
+        return {
+            'median_relative_error': round(float(np.median(relative)), 4),
+            'p90_relative_error': round(float(np.percentile(relative, 90)), 4),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            'num_pivots': self.num_pivots,
+            'confidence': self.confidence,
+            **self.error_summary(),
+            'rank_stability': round(self.rank_stability, 4) if self.rank_stability is not None else None,
+            'elapsed_seconds': round(self.elapsed_seconds, 2),
+        }
+
+
+def bfs_levels(offsets: Sequence[int], neighbors: Sequence[int], source: int) -> list[int]:
+    """
+    Level-synchronous BFS from `source` over a CSR graph (see GraphCore.csr).
+
+    Returns hop counts, -1 if unreachable.
+    """
+    dist = [-1] * (len(offsets) - 1)
+    dist[source] = 0
+    frontier = [source]
+    level = 0
+    while frontier:
+        level += 1
+        next_frontier = []
+        for node in frontier:
+            for k in range(offsets[node], offsets[node + 1]):
+                neighbor = neighbors[k]
+                if dist[neighbor] < 0:
+                    dist[neighbor] = level
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return dist
+
+
+def _init_worker(offsets, neighbors):
+    """Attach a worker process to the CSR graph (GraphCore arrays)."""
+    global _offsets, _neighbors
+    _offsets = memoryview(offsets)
+    _neighbors = memoryview(neighbors)
+
+
+def _accumulate_pivots(pivots: list[int]) -> tuple[list[int], list[int], list[int], list[float], list[float]]:
+    """
+    BFS from each pivot and accumulate per-node sums.
+
+    Returns:
+        (distance sums, squared distance sums, reach counts, harmonic sums,
+        squared harmonic sums)
+    """
+    n = len(_offsets) - 1
+    dist_sum = [0] * n
+    dist_sq_sum = [0] * n
+    reach_count = [0] * n
+    harmonic_sum = [0.0] * n
+    harmonic_sq_sum = [0.0] * n
+
+    for pivot in pivots:
+        dist = bfs_levels(_offsets, _neighbors, pivot)
+        for v, d in enumerate(dist):
+            if d > 0:
+                dist_sum[v] += d
+                dist_sq_sum[v] += d * d
+                reach_count[v] += 1
+                harmonic_sum[v] += 1.0 / d
+                harmonic_sq_sum[v] += 1.0 / (d * d)
+
+    return dist_sum, dist_sq_sum, reach_count, harmonic_sum, harmonic_sq_sum
+
+
+def _closeness(dist_sum: np.ndarray, reach_count: np.ndarray, k: int) -> np.ndarray:
+    """Wasserman-Faust closeness from k pivots' sums (0 where no pivot is reached)."""
+    closeness = np.zeros(len(dist_sum))
+    reached = reach_count > 0
+    closeness[reached] = (reach_count[reached] / k) * reach_count[reached] / dist_sum[reached]
+    return closeness
+
+
+def _spearman(a: np.ndarray, b: np.ndarray) -> float:
+    """Spearman rank correlation (ties broken by position)."""
+    rank_a = np.empty(len(a))
+    rank_b = np.empty(len(b))
+    rank_a[np.argsort(a, kind='stable')] = np.arange(len(a))
+    rank_b[np.argsort(b, kind='stable')] = np.arange(len(b))
+    return float(np.corrcoef(rank_a, rank_b)[0, 1])
+
+
+def estimate_centrality(
+    node_ids: list[int],
+    edges: Optional[list[tuple[int, int]]],
+    num_pivots: int = DEFAULT_PIVOTS,
+    workers: Optional[int] = None,
+    seed: int = 42,
+    confidence: float = DEFAULT_CONFIDENCE,
+    core: Optional[GraphCore] = None
+) -> CentralityEstimate:
+    """
+    Estimate closeness and harmonic centrality for every actor.
+
+    Args:
+        node_ids: List of all actor IDs
+        edges: List of (actor_id_1, actor_id_2) tuples (unused if `core` is given)
+        num_pivots: Number of BFS sources to sample (all actors if larger than n)
+        workers: Worker processes (defaults to CPU count)
+        seed: Random seed for pivot selection
+        confidence: Per-actor confidence level for the error bounds
+        core: GraphCore over node_ids (in the same order), if the caller has one
+
+    Returns:
+        CentralityEstimate in the same order as node_ids
+    """
+    start_time = time.time()
+    n = len(node_ids)
+    if core is None:
+        core = GraphCore.from_edges(node_ids, edges)
+    offsets, neighbors = core.offsets, core.neighbors
+
+    k = min(num_pivots, n)
+    pivots = random.Random(seed).sample(range(n), k)
+    workers = max(1, min(workers or os.cpu_count() or 1, k))
+
+    # Pivots are split into two halves (for rank stability), each spread over the workers
+    halves = [pivots[0::2], pivots[1::2]]
+    chunks = [half[w::workers] for half in halves for w in range(workers)]
+
+    if workers == 1:
+        _init_worker(offsets, neighbors)
+        partials = [_accumulate_pivots(chunk) for chunk in chunks]
+    else:
+        with Pool(processes=workers, initializer=_init_worker, initargs=(offsets, neighbors)) as pool:
+            partials = pool.map(_accumulate_pivots, chunks)
+
+    # Per-half sums: [distance, squared distance, reach, harmonic, squared harmonic]
+    half_sums = [
+        [np.sum([np.asarray(p[field], dtype=np.float64) for p in partials[h * workers:(h + 1) * workers]], axis=0)
+         for field in range(5)]
+        for h in range(2)
+    ]
+    dist_sum, dist_sq_sum, reach_count, harmonic_sum, harmonic_sq_sum = (
+        half_sums[0][field] + half_sums[1][field] for field in range(5)
+    )
+
+    closeness = _closeness(dist_sum, reach_count, k)
+    reached = reach_count > 0
+    avg_distance = np.full(n, math.inf)
+    avg_distance[reached] = dist_sum[reached] / reach_count[reached]
+    harmonic = harmonic_sum / k
+
+    # Normal approximation per actor over the pivots it reaches; pivots are
+    # drawn without replacement, so the interval is finite population corrected
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    fpc = math.sqrt((n - k) / (n - 1)) if n > 1 else 0.0
+    avg_distance_error = np.full(n, math.inf)
+    sampled = reach_count > 1
+    m = reach_count[sampled]
+    variance = np.maximum(dist_sq_sum[sampled] - dist_sum[sampled] ** 2 / m, 0.0) / (m - 1)
+    avg_distance_error[sampled] = z * np.sqrt(variance / m) * fpc
+
+    # Harmonic averages over all k pivots (unreached ones contribute 0)
+    harmonic_variance = (np.maximum(harmonic_sq_sum - harmonic_sum ** 2 / k, 0.0) / (k - 1)
+                         if k > 1 else np.full(n, math.inf))
+    harmonic_error = z * np.sqrt(harmonic_variance / k) * fpc
+
+    rank_stability = None
+    if len(halves[1]) and n > 1:
+        rank_stability = _spearman(
+            _closeness(half_sums[0][0], half_sums[0][2], len(halves[0])),
+            _closeness(half_sums[1][0], half_sums[1][2], len(halves[1])),
+        )
+
+    return CentralityEstimate(
+        node_ids=list(node_ids),
+        closeness=closeness.tolist(),
+        harmonic=harmonic.tolist(),
+        avg_distance=avg_distance.tolist(),
+        avg_distance_error=avg_distance_error.tolist(),
+        harmonic_error=harmonic_error.tolist(),
+        rank_stability=rank_stability,
+        num_pivots=k,
+        confidence=confidence,
+        elapsed_seconds=time.time() - start_time,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimate closeness/harmonic centrality')
+    parser.add_argument('--graph', type=Path, default=DEFAULT_GRAPH_PATH,
+                        help='Graph JSON with actors and edges')
+    parser.add_argument('--pivots', type=int, default=DEFAULT_PIVOTS,
+                        help=f'Number of pivot BFS runs (default {DEFAULT_PIVOTS})')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: CPU count)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='Number of most central actors to print')
+    args = parser.parse_args()
+
+    with open(args.graph) as f:
+        data = json.load(f)
+    core = GraphCore.from_step_output(data)
+    node_ids = core.ids.tolist()
+    names = [a['name'] for a in data['actors']]
+
+    print(f'Estimating centrality for {len(node_ids):,} actors from {args.pivots} pivots...')
+    estimate = estimate_centrality(node_ids, None, num_pivots=args.pivots, workers=args.workers, core=core)
+    summary = estimate.error_summary()
+    print(f'Done in {estimate.elapsed_seconds:.2f}s')
+    if summary['median_relative_error'] is not None:
+        print(f"Avg distance error at {estimate.confidence:.0%}: median ±{summary['median_relative_error']:.1%}, "
+              f"90th percentile ±{summary['p90_relative_error']:.1%}")
+    if estimate.rank_stability is not None:
+        print(f'Rank stability (split-half Spearman): {estimate.rank_stability:.3f}')
+
+    print(f'\nTop {args.top} actors by closeness:')
+    print('-' * 60)
+    for rank, node_id in enumerate(estimate.top_k(args.top), start=1):
+        i = core.index_of(node_id)
+        low, high = estimate.closeness_bounds(i)
+        print(f'  {rank:>3}. {names[i]:<30} closeness {estimate.closeness[i]:.4f} '
+              f'[{low:.4f}, {high:.4f}]  harmonic {estimate.harmonic[i]:.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Connected-component split for step 3.
+
+The actor graph is not connected: besides one giant component there are
+small components and isolated actors (degree 0).  Swapping a small component
+with the giant one can never shorten an edge between them, so step 3 only
+needs to optimize the giant component:
+
+- Giant component: keeps the innermost slots and goes through the optimizer
+- Small components: each gets a compact patch of free slots just outside the
+  giant component and is laid out on its own (in parallel)
+- Isolates: take the outermost slots in Recognizability order, no optimization
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from itertools import permutations
+from multiprocessing import Pool
+
+from optimization_utils import SlotGrid
+
+# Configuration
+EXHAUSTIVE_MAX_SIZE = 6  # Small components up to this size are laid out by brute force
+MAX_LOCAL_SEARCH_PASSES = 50  # Pairwise-swap passes for larger small components
+
+
+@dataclass
+class ComponentPlan:
+    """Slot plan for a graph split into components."""
+    giant_ids: list[int]
+    giant_positions: dict[int, tuple[float, float]]  # Starting positions on the inner slots
+    giant_ordinals: dict[int, int]
+    positions: dict[int, tuple[float, float]]  # Final positions of every other actor
+    ordinals: dict[int, int]
+    stats: dict = field(default_factory=dict)
+
+
+def connected_components(node_ids: list[int], edges: list[tuple[int, int]]) -> list[list[int]]:
+    """
+    Split the graph into connected components (union-find).
+
+    Returns:
+        Components largest first; ties and members keep node_ids order
+    """
+    parent = {node_id: node_id for node_id in node_ids}
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for source, target in edges:
+        root_s, root_t = find(source), find(target)
+        if root_s != root_t:
+            parent[root_s] = root_t
+
+    groups: dict[int, list[int]] = {}
+    for node_id in node_ids:
+        groups.setdefault(find(node_id), []).append(node_id)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def _edge_length(a: tuple[float, float], b: tuple[float, float]) -> float:
+    return math.hypot(a[0] - b[0], a[1] - b[1])
+
+
+def layout_small_component(task: tuple[list[int], list[tuple[int, int]], list[tuple[int, float, float]]]) -> dict[int, int]:
+    """
+    Place one small component on its patch of slots.
+
+    Components up to EXHAUSTIVE_MAX_SIZE actors are solved exactly; larger
+    ones start with the best-connected actors nearest the patch centre and
+    are improved with pairwise swaps until no swap helps.
+
+    Args:
+        task: (member actor_ids, component edges, patch slots as (slot, x, y))
+
+    Returns:
+        Dict mapping actor_id to slot
+    """
+    members, edges, patch = task
+    slot_xy = {slot: (x, y) for slot, x, y in patch}
+    slots = [slot for slot, _, _ in patch]
+
+    def total(assignment: dict[int, int]) -> float:
+        return sum(_edge_length(slot_xy[assignment[s]], slot_xy[assignment[t]]) for s, t in edges)
+
+    if len(members) <= EXHAUSTIVE_MAX_SIZE:
+        best = min(
+            (dict(zip(members, perm)) for perm in permutations(slots)),
+            key=total,
+        )
+        return best
+
+    adjacency: dict[int, list[int]] = {m: [] for m in members}
+    for s, t in edges:
+        adjacency[s].append(t)
+        adjacency[t].append(s)
+
+    cx = sum(x for _, x, _ in patch) / len(patch)
+    cy = sum(y for _, _, y in patch) / len(patch)
+    by_center = sorted(slots, key=lambda slot: _edge_length(slot_xy[slot], (cx, cy)))
+    by_degree = sorted(members, key=lambda m: len(adjacency[m]), reverse=True)
+    assignment = dict(zip(by_degree, by_center))
+
+    def cost(actor: int, slot: int, skip: int) -> float:
+        return sum(_edge_length(slot_xy[slot], slot_xy[assignment[n]]) for n in adjacency[actor] if n != skip)
+
+    for _ in range(MAX_LOCAL_SEARCH_PASSES):
+        improved = False
+        for i, a in enumerate(members):
+            for b in members[i + 1:]:
+                sa, sb = assignment[a], assignment[b]
+                delta = (cost(a, sb, b) + cost(b, sa, a)) - (cost(a, sa, b) + cost(b, sb, a))
+                if delta < -0.001:
+                    assignment[a], assignment[b] = sb, sa
+                    improved = True
+        if not improved:
+            break
+    return assignment
+
+
+def plan_components(
+    actors: list[dict],
+    edges: list[tuple[int, int]],
+    initial_positions: dict[int, tuple[float, float]],
+    initial_ordinals: dict[int, int],
+    workers: int = 1
+) -> ComponentPlan:
+    """
+    Split the layout by component and place everything but the giant component.
+
+    Args:
+        actors: List of actor dicts with person_id and recognizability
+        edges: List of (actor_id_1, actor_id_2) tuples
+        initial_positions: Dict mapping actor_id to (x, y) (from Step 2)
+        initial_ordinals: Dict mapping actor_id to ordinal (from Step 2)
+        workers: Worker processes for laying out small components
+
+    Returns:
+        ComponentPlan
+    """
+    start_time = time.time()
+    n = len(actors)
+    actor_ids = [a['person_id'] for a in actors]
+    components = connected_components(actor_ids, edges)
+
+    giant = components[0] if components else []
+    small = [c for c in components[1:] if len(c) > 1]
+    isolates = [c[0] for c in components[1:] if len(c) == 1]
+
+    # Slot coordinates: Step 2 places ordinal k on Vogel slot k
+    slot_x = [0.0] * n
+    slot_y = [0.0] * n
+    for actor_id in actor_ids:
+        slot_x[initial_ordinals[actor_id]], slot_y[initial_ordinals[actor_id]] = initial_positions[actor_id]
+
+    # Giant component: innermost slots, in Step 2 order
+    giant_ordinals = {
+        actor_id: slot
+        for slot, actor_id in enumerate(sorted(giant, key=lambda a: initial_ordinals[a]))
+    }
+    giant_positions = {actor_id: (slot_x[slot], slot_y[slot]) for actor_id, slot in giant_ordinals.items()}
+
+    # Isolates: outermost slots, most recognizable first
+    recognizability = {a['person_id']: a.get('recognizability') or 0 for a in actors}
+    isolates.sort(key=lambda a: (-recognizability[a], a))
+    ordinals = {actor_id: slot for slot, actor_id in enumerate(isolates, start=n - len(isolates))}
+
+    # Small components: compact patches carved from the band in between
+    band_start, band_end = len(giant), n - len(isolates)
+    slot_grid = SlotGrid(slot_x, slot_y)
+    for slot in list(range(band_start)) + list(range(band_end, n)):
+        slot_grid.remove(slot)
+    free = set(range(band_start, band_end))
+
+    component_edges: dict[int, list[tuple[int, int]]] = {}
+    component_of = {actor_id: k for k, c in enumerate(small) for actor_id in c}
+    for source, target in edges:
+        if source in component_of:
+            component_edges.setdefault(component_of[source], []).append((source, target))
+
+    tasks = []
+    for k, members in enumerate(small):
+        seed_slot = min(free)
+        patch = slot_grid.nearest(slot_x[seed_slot], slot_y[seed_slot], len(members))
+        for slot in patch:
+            slot_grid.remove(slot)
+            free.discard(slot)
+        tasks.append((members, component_edges.get(k, []), [(s, slot_x[s], slot_y[s]) for s in patch]))
+
+    if workers > 1 and len(tasks) > 1:
+        with Pool(processes=min(workers, len(tasks))) as pool:
+            assignments = pool.map(layout_small_component, tasks)
+    else:
+        assignments = [layout_small_component(task) for task in tasks]
+    for assignment in assignments:
+        ordinals.update(assignment)
+
+    positions = {actor_id: (slot_x[slot], slot_y[slot]) for actor_id, slot in ordinals.items()}
+
+    stats = {
+        'components': len(components),
+        'giant_size': len(giant),
+        'small_components': len(small),
+        'small_component_actors': sum(len(c) for c in small),
+        'isolates': len(isolates),
+        'elapsed_seconds': round(time.time() - start_time, 2),
+    }
+
+    return ComponentPlan(
+        giant_ids=giant,
+        giant_positions=giant_positions,
+        giant_ordinals=giant_ordinals,
+        positions=positions,
+        ordinals=ordinals,
+        stats=stats,
+    )
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+2-core pruning for step 3.
+
+Actors of degree 1 (and the chains and trees they form) have no say in where
+the rest of the graph goes: their best slot is simply next to their anchor.
+So step 3 peels the graph down to its 2-core, optimizes only the core, and
+reattaches the peeled trees afterwards:
+
+- Peel: repeatedly remove actors with at most one remaining neighbour,
+  remembering that neighbour as the actor's anchor
+- Optimize: the core keeps its Step 2 slots and is swapped among them
+- Reattach: in reverse peel order (anchors before their leaves), each peeled
+  actor takes the free slot nearest its anchor, via a SlotGrid index.  Actors
+  peeled without an anchor (roots of tree components) take the free slot
+  nearest their Step 2 position
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from optimization_utils import SlotGrid
+
+
+@dataclass
+class PeelResult:
+    """2-core of a graph plus the order in which everything else was peeled."""
+    core_ids: list[int]
+    peeled: list[tuple[int, Optional[int]]]  # (actor_id, anchor or None), in peel order
+    stats: dict = field(default_factory=dict)
+
+
+def peel_to_two_core(node_ids: list[int], edges: list[tuple[int, int]]) -> PeelResult:
+    """
+    Peel the graph down to its 2-core.
+
+    Args:
+        node_ids: List of all actor IDs
+        edges: List of (actor_id_1, actor_id_2) tuples
+
+    Returns:
+        PeelResult; core_ids keep node_ids order
+    """
+    adjacency: dict[int, list[int]] = {node_id: [] for node_id in node_ids}
+    for source, target in edges:
+        adjacency[source].append(target)
+        adjacency[target].append(source)
+
+    degree = {node_id: len(neighbors) for node_id, neighbors in adjacency.items()}
+    removed = set()
+    peeled = []
+    queue = deque(node_id for node_id in node_ids if degree[node_id] <= 1)
+    queued = set(queue)
+    rounds = 0
+
+    while queue:
+        rounds += 1
+        for _ in range(len(queue)):
+            node_id = queue.popleft()
+            removed.add(node_id)
+            anchor = None
+            for neighbor in adjacency[node_id]:
+                if neighbor in removed:
+                    continue
+                anchor = neighbor
+                degree[neighbor] -= 1
+                if degree[neighbor] <= 1 and neighbor not in queued:
+                    queue.append(neighbor)
+                    queued.add(neighbor)
+            peeled.append((node_id, anchor))
+
+    core_ids = [node_id for node_id in node_ids if node_id not in removed]
+    stats = {
+        'actors': len(node_ids),
+        'core_actors': len(core_ids),
+        'peeled_actors': len(peeled),
+        'peeled_fraction': round(len(peeled) / len(node_ids), 4) if node_ids else 0.0,
+        'degree_one': sum(1 for node_id in node_ids if len(adjacency[node_id]) == 1),
+        'peel_rounds': rounds,
+    }
+    return PeelResult(core_ids=core_ids, peeled=peeled, stats=stats)
+
+
+def reattach_peeled(
+    peel: PeelResult,
+    core_positions: dict[int, tuple[float, float]],
+    core_ordinals: dict[int, int],
+    slot_positions: dict[int, tuple[float, float]],
+    original_positions: dict[int, tuple[float, float]]
+) -> tuple[dict[int, tuple[float, float]], dict[int, int]]:
+    """
+    Place every peeled actor on the free slot nearest its anchor.
+
+    Args:
+        peel: Result of peel_to_two_core
+        core_positions: Optimized core positions
+        core_ordinals: Optimized core slots
+        slot_positions: Dict mapping every available slot to (x, y)
+        original_positions: Starting positions, used for actors without an anchor
+
+    Returns:
+        Positions and ordinals for core and peeled actors together
+    """
+    slots = sorted(slot_positions)
+    index = {slot: k for k, slot in enumerate(slots)}
+    slot_grid = SlotGrid([slot_positions[s][0] for s in slots], [slot_positions[s][1] for s in slots])
+    for slot in core_ordinals.values():
+        slot_grid.remove(index[slot])
+
+    positions = dict(core_positions)
+    ordinals = dict(core_ordinals)
+    for actor_id, anchor in reversed(peel.peeled):
+        x, y = positions[anchor] if anchor is not None else original_positions[actor_id]
+        k = slot_grid.nearest(x, y, 1)[0]
+        slot_grid.remove(k)
+        ordinals[actor_id] = slots[k]
+        positions[actor_id] = slot_positions[slots[k]]
+
+    return positions, ordinals
+
+
+def prune_for_optimization(
+    actors: list[dict],
+    edges: list[tuple[int, int]],
+    initial_positions: dict[int, tuple[float, float]],
+    initial_ordinals: dict[int, int]
+) -> tuple[PeelResult, list[dict], list[tuple[int, int]], dict[int, tuple[float, float]], dict[int, int]]:
+    """
+    Peel the layout to its 2-core and return the core sub-problem.
+
+    Returns:
+        - PeelResult
+        - Core actors, core edges, and their starting positions and ordinals
+    """
+    start_time = time.time()
+    peel = peel_to_two_core([a['person_id'] for a in actors], edges)
+    core = set(peel.core_ids)
+
+    core_actors = [a for a in actors if a['person_id'] in core]
+    core_edges = [e for e in edges if e[0] in core and e[1] in core]
+    core_positions = {actor_id: initial_positions[actor_id] for actor_id in core}
+    core_ordinals = {actor_id: initial_ordinals[actor_id] for actor_id in core}
+
+    peel.stats['core_edges'] = len(core_edges)
+    peel.stats['edges'] = len(edges)
+    peel.stats['peel_seconds'] = round(time.time() - start_time, 2)
+    return peel, core_actors, core_edges, core_positions, core_ordinals
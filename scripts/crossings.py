@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Edge-crossing count for a layout.
+
+Edges are straight segments between actor positions; two edges cross when
+their segments properly intersect (edges sharing an actor never count).
+
+- Small graphs (up to EXACT_MAX_EDGES edges): exact count, all pairs tested
+  in vectorized blocks
+- Large graphs: a uniform sample of edges is tested against every edge, and
+  the total is estimated as (E / 2) * mean crossings per sampled edge, with a
+  normal-approximation confidence interval (finite population corrected)
+
+Spatial bucketing (uniform grid / sweep line) does not pay off here: on a
+Vogel layout typical edges span a large fraction of the spiral, so every
+grid cell is crossed by a large share of all edges.
+
+Usage:
+    python scripts/crossings.py optimization_outputs/graph-data-2000.json
+"""
+
+import argparse
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+
+# Configuration
+EXACT_MAX_EDGES = 6000  # Count exactly up to this many edges
+DEFAULT_SAMPLES = 400  # Edges sampled for the estimate on larger graphs
+DEFAULT_CONFIDENCE = 0.95
+BLOCK_ELEMENTS = 4_000_000  # Pair tests per vectorized block (bounds memory)
+
+
+@dataclass
+class CrossingEstimate:
+    """Edge-crossing count, exact or sampled with a confidence interval."""
+    crossings: float
+    exact: bool
+    ci_low: float
+    ci_high: float
+    sampled_edges: int
+    confidence: float
+    elapsed_seconds: float
+
+    def to_dict(self) -> dict:
+        return {
+            'crossings': round(self.crossings),
+            'exact': self.exact,
+            'ci': None if self.exact else [round(self.ci_low), round(self.ci_high)],
+            'sampled_edges': self.sampled_edges,
+            'confidence': self.confidence,
+            'elapsed_seconds': round(self.elapsed_seconds, 2),
+        }
+
+    def __str__(self) -> str:
+        if self.exact:
+            return f'{self.crossings:,.0f}'
+        return (f'~{self.crossings:,.0f} ({self.confidence:.0%} CI '
+                f'{self.ci_low:,.0f}-{self.ci_high:,.0f})')
+
+
+def _segments(
+    positions: dict[int, tuple[float, float]],
+    edges: list[tuple[int, int]],
+    dtype: type = np.float64
+) -> np.ndarray:
+    """Return an (E, 4) array of x1, y1, x2, y2."""
+    seg = np.empty((len(edges), 4), dtype=dtype)
+    for k, (source, target) in enumerate(edges):
+        seg[k, 0], seg[k, 1] = positions[source]
+        seg[k, 2], seg[k, 3] = positions[target]
+    return seg
+
+
+def _count_against_all(query_idx: np.ndarray, seg: np.ndarray) -> np.ndarray:
+    """
+    For each segment seg[query_idx], count the segments in `seg` it properly crosses.
+
+    Proper crossing: each segment's endpoints lie strictly on opposite sides
+    of the other.  Coordinates are differenced before multiplying, so an
+    orientation test against a segment's own endpoint is exactly 0 and edges
+    sharing an actor never count.  Queries are processed in blocks of
+    BLOCK_ELEMENTS pair tests to bound memory.
+
+    Returns:
+        int array of crossing counts, one per query
+    """
+    cx, cy, dx, dy = seg[:, 0], seg[:, 1], seg[:, 2], seg[:, 3]
+    ex, ey = dx - cx, dy - cy
+
+    block = max(1, BLOCK_ELEMENTS // max(1, len(seg)))
+    counts = np.empty(len(query_idx), dtype=np.int64)
+    for start in range(0, len(query_idx), block):
+        chunk = query_idx[start:start + block]
+        ax, ay, bx, by = (seg[chunk, j][:, None] for j in range(4))
+        ux, uy = bx - ax, by - ay
+
+        # Sides of c and d relative to ab, and of a and b relative to cd
+        side_ab = ((ux * (cy - ay) - uy * (cx - ax)) * (ux * (dy - ay) - uy * (dx - ax))) < 0
+        side_cd = ((ex * (ay - cy) - ey * (ax - cx)) * (ex * (by - cy) - ey * (bx - cx))) < 0
+        counts[start:start + block] = (side_ab & side_cd).sum(axis=1)
+    return counts
+
+
+def count_crossings(
+    positions: dict[int, tuple[float, float]],
+    edges: list[tuple[int, int]],
+    exact_max_edges: int = EXACT_MAX_EDGES,
+    samples: int = DEFAULT_SAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: int = 42
+) -> CrossingEstimate:
+    """
+    Count (or estimate) edge crossings for a layout.
+
+    Args:
+        positions: Dict mapping actor_id to (x, y)
+        edges: List of (actor_id_1, actor_id_2) tuples
+        exact_max_edges: Largest edge count that is counted exactly
+        samples: Number of edges sampled above that size
+        confidence: Confidence level of the interval
+        seed: Random seed for edge sampling
+
+    Returns:
+        CrossingEstimate
+    """
+    start_time = time.time()
+    num_edges = len(edges)
+    if num_edges < 2:
+        return CrossingEstimate(0.0, True, 0.0, 0.0, num_edges, confidence, 0.0)
+
+    if num_edges <= exact_max_edges:
+        seg = _segments(positions, edges)
+        counts = _count_against_all(np.arange(num_edges), seg)
+        total = counts.sum() / 2  # Every crossing is seen from both edges
+        return CrossingEstimate(
+            float(total), True, float(total), float(total), num_edges,
+            confidence, time.time() - start_time
+        )
+
+    # Single precision halves memory traffic; sign errors need near-collinear
+    # edges and are negligible next to the sampling error
+    seg = _segments(positions, edges, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    m = min(samples, num_edges)
+    sample_idx = rng.choice(num_edges, size=m, replace=False)
+    counts = _count_against_all(sample_idx, seg).astype(np.float64)
+
+    scale = num_edges / 2
+    estimate = scale * counts.mean()
+    fpc = math.sqrt((num_edges - m) / (num_edges - 1))
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    half_width = z * scale * counts.std(ddof=1) / math.sqrt(m) * fpc
+
+    return CrossingEstimate(
+        float(estimate), False,
+        float(max(0.0, estimate - half_width)), float(estimate + half_width),
+        m, confidence, time.time() - start_time
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count edge crossings in a graph layout')
+    parser.add_argument('graph', type=Path, help='Step output or graph-data JSON with actors and edges')
+    parser.add_argument('--samples', type=int, default=DEFAULT_SAMPLES,
+                        help=f'Sampled edges for large graphs (default {DEFAULT_SAMPLES})')
+    parser.add_argument('--exact-max-edges', type=int, default=EXACT_MAX_EDGES,
+                        help=f'Count exactly up to this many edges (default {EXACT_MAX_EDGES})')
+    args = parser.parse_args()
+
+    with open(args.graph) as f:
+        data = json.load(f)
+    positions = {a['person_id']: (a['x'], a['y']) for a in data['actors']}
+    edges = [(e['source'], e['target']) for e in data['edges']]
+
+    estimate = count_crossings(positions, edges, args.exact_max_edges, args.samples)
+    print(f'{len(positions):,} actors, {len(edges):,} edges')
+    print(f'Edge crossings: {estimate}')
+    print(f'Computed in {estimate.elapsed_seconds:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Landmark distance oracle: degrees-of-separation bounds for any actor pair.
+
+Step 4 gives exact distances only from its listed centers.  The oracle runs
+one BFS from each of L landmarks and keeps the hop counts as an (n, L)
+uint8 array, so every actor's distances to all landmarks sit in one
+L-byte row.  For actors u, v and each landmark l reaching both, the
+triangle inequality gives
+
+    |d(u, l) - d(v, l)|  <=  d(u, v)  <=  d(u, l) + d(l, v)
+
+and the oracle reports the tightest of each over the L landmarks: an O(L)
+lookup per pair, vectorized over batches of thousands of pairs.  The bounds
+are exact when either actor is a landmark.  If a landmark reaches exactly
+one of the two actors, they are in different components.
+
+Landmarks: most are the highest-degree actors (hubs lie on many shortest
+paths, which tightens the upper bound), the rest are picked by
+farthest-point sampling (the actor furthest from every landmark so far,
+highest degree on ties), which spreads them to the periphery and into
+components the hubs do not reach.  On the 2000-actor graph with 32
+landmarks, a 0.75 degree share gives an exact upper bound for 55% of
+connected pairs (mean error 0.47 hops, see `evaluate`), against 48% at
+0.5 and about 12% for farthest-point sampling alone.
+
+The oracle is saved next to the graph it was built from (a directory per
+graph-data file under optimization_outputs/oracle/, or oracle/ inside an
+out-of-core store) and memory-mapped on load:
+
+    distances.u8     (n, L) hops to each landmark, 255 = unreachable
+    sorted_ids.i64   person_ids in ascending order (lookup by binary search)
+    sorted_index.i32 dense index of each sorted_ids entry
+    landmarks.i64    person_id of each landmark
+    meta.json        counts and build stats
+
+Usage:
+    python scripts/distance_oracle.py build --graph optimization_outputs/graph-data-2000.json
+    python scripts/distance_oracle.py build --store optimization_outputs/ooc --landmarks 32
+    python scripts/distance_oracle.py query --graph optimization_outputs/graph-data-2000.json 4724 112
+    python scripts/distance_oracle.py query --store optimization_outputs/ooc --pairs pairs.csv
+    python scripts/distance_oracle.py evaluate --graph optimization_outputs/graph-data-2000.json --samples 200
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from graph_core import GraphCore, peak_rss_mb
+from optimization_utils import OUTPUT_DIR
+from out_of_core import bfs_levels_chunked, open_store
+
+# Configuration
+DEFAULT_LANDMARKS = 32  # BFS runs (and bytes per actor) in the oracle
+HIGH_DEGREE_SHARE = 0.75  # Share of landmarks taken by degree; the rest by farthest-point sampling
+UNREACHABLE = 255  # Stored hop count for actors a landmark does not reach
+QUERY_CHUNK_PAIRS = 65536  # Pairs bounded per vectorized batch
+ORACLE_DIR = OUTPUT_DIR / 'oracle'
+
+
+@dataclass
+class DistanceOracle:
+    """Landmark hop counts (memory-mapped) with O(L) pair bounds."""
+    distances: np.ndarray  # (n, L) uint8, UNREACHABLE where not reached
+    sorted_ids: np.ndarray
+    sorted_index: np.ndarray
+    landmark_ids: np.ndarray
+    meta: dict
+
+    @property
+    def num_landmarks(self) -> int:
+        return self.distances.shape[1]
+
+    def lookup(self, person_ids) -> np.ndarray:
+        """Dense indices for person_ids.  Raises KeyError if any is absent."""
+        person_ids = np.asarray(person_ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.sorted_ids, person_ids), len(self.sorted_ids) - 1)
+        found = self.sorted_ids[pos] == person_ids
+        if not found.all():
+            raise KeyError(int(person_ids[~found][0]))
+        return np.asarray(self.sorted_index[pos])
+
+    def bounds(self, sources: np.ndarray, targets: np.ndarray,
+               chunk_pairs: int = QUERY_CHUNK_PAIRS) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Lower and upper hop-count bounds for pairs of dense indices.
+
+        Returns:
+            (lower, upper) float32 arrays.  Both are inf for pairs proven to
+            be in different components; upper is inf (lower 1) when no
+            landmark reaches either actor.
+        """
+        lower = np.empty(len(sources), dtype=np.float32)
+        upper = np.empty(len(sources), dtype=np.float32)
+        for start in range(0, len(sources), chunk_pairs):
+            end = start + chunk_pairs
+            du = np.asarray(self.distances[sources[start:end]]).astype(np.int16)
+            dv = np.asarray(self.distances[targets[start:end]]).astype(np.int16)
+            reach_u, reach_v = du != UNREACHABLE, dv != UNREACHABLE
+            both = reach_u & reach_v
+
+            via = np.where(both, du + dv, np.iinfo(np.int16).max).min(axis=1)
+            gap = np.where(both, np.abs(du - dv), 0).max(axis=1)
+            same = sources[start:end] == targets[start:end]
+            split = (reach_u != reach_v).any(axis=1)
+
+            lo = np.maximum(gap, 1).astype(np.float32)
+            hi = np.where(both.any(axis=1), via, np.inf).astype(np.float32)
+            lo[split], hi[split] = np.inf, np.inf
+            lo[same], hi[same] = 0, 0
+            lower[start:end], upper[start:end] = lo, hi
+        return lower, upper
+
+    def query(self, person_a: int, person_b: int) -> tuple[float, float]:
+        """(lower, upper) hop bounds between two actors."""
+        lower, upper = self.query_pairs(np.array([[person_a, person_b]]))
+        return float(lower[0]), float(upper[0])
+
+    def query_pairs(self, pairs) -> tuple[np.ndarray, np.ndarray]:
+        """(lower, upper) hop bounds for an (k, 2) array of person_id pairs."""
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        return self.bounds(self.lookup(pairs[:, 0]), self.lookup(pairs[:, 1]))
+
+
+# ---------------------------------------------------------------------------
+# Building
+# ---------------------------------------------------------------------------
+
+def build_oracle(core: GraphCore, directory: Path, num_landmarks: int = DEFAULT_LANDMARKS,
+                 high_degree_share: float = HIGH_DEGREE_SHARE, source: str = '') -> DistanceOracle:
+    """
+    Pick landmarks, run their BFS and save the oracle to `directory`.
+
+    Args:
+        core: Graph to index (offsets/neighbors may be memmaps)
+        directory: Output directory (created or overwritten)
+        num_landmarks: Landmarks to pick (capped at the actor count)
+        high_degree_share: Share of landmarks taken by descending degree
+        source: Description of the graph, recorded in meta.json
+    """
+    start_time = time.time()
+    n = core.num_nodes
+    num_landmarks = min(num_landmarks, n)
+    by_degree = np.argsort(-core.degrees.astype(np.int64), kind='stable')
+    num_hubs = min(num_landmarks, max(1, round(num_landmarks * high_degree_share))) if n else 0
+
+    distances = np.full((n, num_landmarks), UNREACHABLE, dtype=np.uint8)
+    # Hops to the nearest landmark so far; actors no landmark reaches sort first
+    closest = np.full(n, np.iinfo(np.int32).max, dtype=np.int32)
+    # Degree rank breaks farthest-point ties towards hubs
+    degree_rank = np.empty(n, dtype=np.int64)
+    degree_rank[by_degree] = np.arange(n)
+
+    landmarks = []
+    for k in range(num_landmarks):
+        if k < num_hubs:
+            landmark = int(by_degree[k])
+        else:
+            far = np.flatnonzero(closest == closest.max())
+            landmark = int(far[np.argmin(degree_rank[far])])
+        levels = bfs_levels_chunked(core.offsets, core.neighbors, landmark)
+        reached = levels >= 0
+        if levels.max() >= UNREACHABLE:
+            raise ValueError(f'Landmark {core.ids[landmark]} has eccentricity {levels.max()}, '
+                             f'too large for uint8 hop counts')
+        distances[reached, k] = levels[reached]
+        closest[reached] = np.minimum(closest[reached], levels[reached])
+        landmarks.append(landmark)
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    distances.tofile(directory / 'distances.u8')
+    sorted_index = np.argsort(core.ids, kind='stable').astype(np.int32)
+    core.ids[sorted_index].tofile(directory / 'sorted_ids.i64')
+    sorted_index.tofile(directory / 'sorted_index.i32')
+    landmark_ids = core.ids[landmarks]
+    landmark_ids.tofile(directory / 'landmarks.i64')
+
+    meta = {
+        'source': source,
+        'actors': n,
+        'edges': core.num_edges,
+        'landmarks': num_landmarks,
+        'high_degree_landmarks': num_hubs,
+        'unreached_actors': int((closest == np.iinfo(np.int32).max).sum()),
+        'max_landmark_distance': int(closest[closest < np.iinfo(np.int32).max].max(initial=0)),
+        'size_bytes': int(distances.nbytes),
+        'build_seconds': round(time.time() - start_time, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    with open(directory / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+    return DistanceOracle(distances, core.ids[sorted_index], sorted_index, landmark_ids, meta)
+
+
+def open_oracle(directory: Path) -> DistanceOracle:
+    """Memory-map an oracle saved by build_oracle."""
+    directory = Path(directory)
+    with open(directory / 'meta.json') as f:
+        meta = json.load(f)
+    shape = (meta['actors'], meta['landmarks'])
+    distances = (np.memmap(directory / 'distances.u8', dtype=np.uint8, mode='r', shape=shape)
+                 if np.prod(shape) else np.zeros(shape, dtype=np.uint8))
+    return DistanceOracle(
+        distances,
+        np.fromfile(directory / 'sorted_ids.i64', dtype=np.int64),
+        np.fromfile(directory / 'sorted_index.i32', dtype=np.int32),
+        np.fromfile(directory / 'landmarks.i64', dtype=np.int64),
+        meta,
+    )
+
+
+def oracle_dir(graph: Optional[Path] = None, store: Optional[Path] = None) -> Path:
+    """Where the oracle for a graph-data file or out-of-core store is kept."""
+    if store is not None:
+        return Path(store) / 'oracle'
+    return ORACLE_DIR / Path(graph).stem
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Landmark distance oracle')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='Pick landmarks, run their BFS and save the oracle')
+    query = sub.add_parser('query', help='Hop bounds for actor pairs')
+    evaluate = sub.add_parser('evaluate', help='Compare bounds with exact BFS for sampled pairs')
+    for command in (build, query, evaluate):
+        graphs = command.add_mutually_exclusive_group(required=True)
+        graphs.add_argument('--graph', type=Path, help='Graph JSON with actors and edges')
+        graphs.add_argument('--store', type=Path, help='Out-of-core store directory (see out_of_core.py)')
+
+    build.add_argument('--landmarks', type=int, default=DEFAULT_LANDMARKS,
+                       help=f'Number of landmarks (default {DEFAULT_LANDMARKS})')
+    build.add_argument('--high-degree-share', type=float, default=HIGH_DEGREE_SHARE,
+                       help=f'Share of landmarks picked by degree (default {HIGH_DEGREE_SHARE})')
+
+    query.add_argument('person_ids', type=int, nargs='*', help='Two person_ids')
+    query.add_argument('--pairs', type=Path, help='CSV of person_id pairs (one pair per line)')
+
+    evaluate.add_argument('--samples', type=int, default=100, help='Source actors to BFS from (default 100)')
+    evaluate.add_argument('--seed', type=int, default=42, help='Random seed (default 42)')
+
+    args = parser.parse_args()
+    if args.command == 'query' and bool(args.pairs) == bool(args.person_ids):
+        parser.error('query needs either two person_ids or --pairs')
+    if args.command == 'query' and args.person_ids and len(args.person_ids) != 2:
+        parser.error('query needs exactly two person_ids')
+    return args
+
+
+def load_core(args: argparse.Namespace) -> GraphCore:
+    if args.store:
+        return open_store(args.store).core
+    return GraphCore.load_file(args.graph)
+
+
+def format_bound(value: float) -> str:
+    return 'inf' if np.isinf(value) else f'{value:.0f}'
+
+
+def main():
+    args = parse_args()
+    directory = oracle_dir(args.graph, args.store)
+
+    if args.command == 'build':
+        core = load_core(args)
+        print(f'Building {args.landmarks}-landmark oracle for {core.num_nodes:,} actors in {directory}...')
+        oracle = build_oracle(core, directory, args.landmarks, args.high_degree_share,
+                              source=str(args.store or args.graph))
+        meta = oracle.meta
+        print(f"{meta['landmarks']} landmarks ({meta['high_degree_landmarks']} by degree), "
+              f"{meta['size_bytes'] / 1e6:.1f} MB, {meta['unreached_actors']:,} actors unreached")
+        print(f"Built in {meta['build_seconds']:.2f}s, peak RSS {meta['peak_rss_mb']:.0f} MB")
+
+    elif args.command == 'query':
+        oracle = open_oracle(directory)
+        if args.pairs:
+            pairs = np.loadtxt(args.pairs, delimiter=',', dtype=np.int64, ndmin=2)
+            start_time = time.time()
+            lower, upper = oracle.query_pairs(pairs)
+            elapsed = time.time() - start_time
+            for (a, b), lo, hi in zip(pairs.tolist(), lower.tolist(), upper.tolist()):
+                print(f'{a},{b},{format_bound(lo)},{format_bound(hi)}')
+            print(f'{len(pairs):,} pairs in {elapsed * 1000:.1f} ms')
+        else:
+            lower, upper = oracle.query(*args.person_ids)
+            print(f'{args.person_ids[0]} -> {args.person_ids[1]}: '
+                  f'{format_bound(lower)} <= hops <= {format_bound(upper)}')
+
+    elif args.command == 'evaluate':
+        core = load_core(args)
+        oracle = open_oracle(directory)
+        rng = np.random.default_rng(args.seed)
+        sources = rng.choice(core.num_nodes, size=min(args.samples, core.num_nodes), replace=False)
+        exact_hits = covered = total = 0
+        slack = []
+        start_time = time.time()
+        for source in sources:
+            levels = bfs_levels_chunked(core.offsets, core.neighbors, int(source))
+            targets = np.flatnonzero(levels > 0)
+            lower, upper = oracle.bounds(np.full(len(targets), source), targets)
+            exact = levels[targets]
+            if np.any(lower > exact) or np.any(upper < exact):
+                raise AssertionError(f'Bounds violated for source {core.ids[source]}')
+            finite = np.isfinite(upper)
+            covered += int(finite.sum())
+            exact_hits += int((upper[finite] == exact[finite]).sum())
+            slack.append(upper[finite] - exact[finite])
+            total += len(targets)
+        slack = np.concatenate(slack) if slack else np.zeros(0)
+        print(f'{total:,} connected pairs from {len(sources)} sources ({time.time() - start_time:.2f}s)')
+        print(f'Upper bound finite for {covered / max(total, 1):.1%}, exact for {exact_hits / max(covered, 1):.1%}')
+        if len(slack):
+            print(f'Mean upper-bound error {slack.mean():.3f} hops (max {slack.max():.0f})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Force-directed initial layout, snapped onto Vogel slots.
+
+Runs a Fruchterman-Reingold style simulation over a GraphCore's edges:
+springs pull connected actors together and every pair of actors repels.
+Repulsion is approximated with Barnes-Hut over a quadtree built from Morton
+codes, so an iteration costs O(N log N).  The traversal is vectorized: all
+(actor, cell) pairs of one tree level are tested at once, far cells are
+accepted as point masses and near ones are expanded into their children.
+
+The continuous layout is then snapped onto the Vogel spiral by rank-matching:
+actors are sorted by distance from the layout's centroid and cut into bands
+the size of a run of consecutive slots; within each band, actors and slots
+are matched in order of angle.
+
+Usage:
+    python scripts/force_layout.py --graph optimization_outputs/graph-data-2000.json
+"""
+
+import argparse
+import json
+import math
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from graph_core import GraphCore, expand_ranges
+from optimization_utils import calculate_vogel_position
+
+# Configuration
+DEFAULT_ITERATIONS = 80  # Simulation steps
+DEFAULT_THETA = 0.8  # Barnes-Hut opening angle (cell size / distance)
+GRAVITY = 0.05  # Pull towards the centroid, keeps components together
+MAX_DEPTH = 16  # Quadtree depth limit (Morton keys use 2 bits per level)
+SNAP_BAND_FACTOR = 3  # Snapping band size, in multiples of sqrt(N) slots
+DEFAULT_GRAPH_PATH = Path(__file__).parent.parent / 'optimization_outputs' / 'graph-data-2000.json'
+
+
+def _morton_keys(qx: np.ndarray, qy: np.ndarray) -> np.ndarray:
+    """Interleave the bits of 16-bit cell coordinates into 32-bit Morton keys."""
+    def spread(v: np.ndarray) -> np.ndarray:
+        v = v.astype(np.uint64) & 0xFFFF
+        v = (v | (v << 8)) & 0x00FF00FF
+        v = (v | (v << 4)) & 0x0F0F0F0F
+        v = (v | (v << 2)) & 0x33333333
+        v = (v | (v << 1)) & 0x55555555
+        return v
+    return spread(qx) | (spread(qy) << 1)
+
+
+def barnes_hut_repulsion(pos: np.ndarray, strength: float, theta: float = DEFAULT_THETA) -> np.ndarray:
+    """
+    Approximate the repulsive force on every point: strength / d per pair,
+    directed away from the other point.
+
+    Args:
+        pos: (N, 2) point coordinates
+        strength: Force constant (k^2 in Fruchterman-Reingold)
+        theta: Opening angle; cells with size / distance < theta are treated
+            as a single mass at their centroid
+
+    Returns:
+        (N, 2) force vectors
+    """
+    n = len(pos)
+    force = np.zeros_like(pos)
+    if n < 2:
+        return force
+
+    depth = int(min(MAX_DEPTH, max(2, math.ceil(math.log2(n) / 2) + 3)))
+    lo = pos.min(axis=0)
+    extent = float((pos.max(axis=0) - lo).max()) or 1.0
+    grid = (1 << depth)
+    q = np.minimum(((pos - lo) / extent * grid).astype(np.int64), grid - 1)
+    keys = _morton_keys(q[:, 0], q[:, 1])
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    sorted_pos = pos[order]
+
+    # Per-level cells: key, mass, centroid, and the range of child cells
+    levels = []
+    for level in range(depth + 1):
+        cell_keys, first, mass = np.unique(keys >> np.uint64(2 * (depth - level)),
+                                           return_index=True, return_counts=True)
+        cx = np.add.reduceat(sorted_pos[:, 0], first) / mass
+        cy = np.add.reduceat(sorted_pos[:, 1], first) / mass
+        levels.append({'keys': cell_keys, 'first': first, 'mass': mass, 'cx': cx, 'cy': cy})
+    for level in range(depth):
+        child_keys = levels[level + 1]['keys']
+        parent = levels[level]['keys'] << np.uint64(2)
+        levels[level]['child_lo'] = np.searchsorted(child_keys, parent)
+        levels[level]['child_hi'] = np.searchsorted(child_keys, parent + np.uint64(4))
+
+    # Traverse: start every point at the root
+    points = np.arange(n)
+    cells = np.zeros(n, dtype=np.int64)
+    for level in range(depth + 1):
+        cell = levels[level]
+        size = extent / (1 << level)
+        own = (keys[points] >> np.uint64(2 * (depth - level))) == cell['keys'][cells]
+
+        mass = cell['mass'][cells].astype(np.float64)
+        cx, cy = cell['cx'][cells], cell['cy'][cells]
+        dx = sorted_pos[points, 0] - cx
+        dy = sorted_pos[points, 1] - cy
+        dist2 = dx * dx + dy * dy
+        single = mass == 1
+        accept = ~own & ((size * size < theta * theta * dist2) | single)
+
+        if accept.any():
+            p = points[accept]
+            scale = strength * mass[accept] / np.maximum(dist2[accept], 1e-18)
+            np.add.at(force[:, 0], p, scale * dx[accept])
+            np.add.at(force[:, 1], p, scale * dy[accept])
+
+        # Self-only cells need nothing further; the rest are opened
+        expand = ~accept & ~(single & own)
+        points, cells = points[expand], cells[expand]
+        if level == depth:
+            # Leaves hold points sharing a quantized cell: sum them directly
+            counts = cell['mass'][cells]
+            others = expand_ranges(cell['first'][cells], counts)
+            points = np.repeat(points, counts)
+            keep = others != points
+            points, others = points[keep], others[keep]
+            dx = sorted_pos[points, 0] - sorted_pos[others, 0]
+            dy = sorted_pos[points, 1] - sorted_pos[others, 1]
+            scale = strength / np.maximum(dx * dx + dy * dy, 1e-18)
+            np.add.at(force[:, 0], points, scale * dx)
+            np.add.at(force[:, 1], points, scale * dy)
+            break
+
+        lo_child = cell['child_lo'][cells]
+        counts = cell['child_hi'][cells] - lo_child
+        points = np.repeat(points, counts)
+        cells = expand_ranges(lo_child, counts)
+
+    # Undo the Morton sort
+    result = np.empty_like(force)
+    result[order] = force
+    return result
+
+
+def force_directed_layout(
+    core: GraphCore,
+    iterations: int = DEFAULT_ITERATIONS,
+    theta: float = DEFAULT_THETA,
+    initial: Optional[np.ndarray] = None,
+    seed: int = 42
+) -> np.ndarray:
+    """
+    Run the force-directed simulation.
+
+    Args:
+        core: Graph to lay out
+        iterations: Simulation steps
+        theta: Barnes-Hut opening angle
+        initial: Optional (N, 2) starting coordinates in dense order (default: random disc)
+        seed: Random seed for the starting coordinates
+
+    Returns:
+        (N, 2) coordinates in dense order
+    """
+    n = core.num_nodes
+    pairs = core.edge_pairs()
+    src, dst = pairs[:, 0], pairs[:, 1]
+
+    # Ideal edge length for a unit-area layout
+    k = math.sqrt(1.0 / max(n, 1))
+    if initial is None:
+        rng = np.random.default_rng(seed)
+        radius = np.sqrt(rng.random(n)) * 0.5
+        angle = rng.random(n) * 2 * math.pi
+        pos = np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
+    else:
+        pos = np.asarray(initial, dtype=np.float64).copy()
+        pos -= pos.mean(axis=0)
+        pos *= 0.5 / (np.abs(pos).max() or 1.0)
+
+    temperature = 0.1
+    cooling = (0.005 / temperature) ** (1 / max(iterations, 1))
+    for _ in range(iterations):
+        disp = barnes_hut_repulsion(pos, k * k, theta)
+
+        # Springs: attraction d^2 / k along each edge
+        delta = pos[src] - pos[dst]
+        dist = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+        pull = delta * (dist / k)[:, None]
+        np.add.at(disp, src, -pull)
+        np.add.at(disp, dst, pull)
+
+        # Gravity, scaled like the total repulsion (~sqrt(N) in these units)
+        disp -= GRAVITY * (pos - pos.mean(axis=0)) * n * k
+
+        # Limit each step to the current temperature
+        length = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-9)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature *= cooling
+
+    return pos
+
+
+def snap_to_slots(pos: np.ndarray, band_size: int = None) -> np.ndarray:
+    """
+    Assign each point a Vogel slot by rank-matching radius and angle.
+
+    Points are ranked by distance from the centroid and split into bands of
+    consecutive slots; inside a band both points and slots are ordered by
+    angle and paired up.
+
+    Args:
+        pos: (N, 2) continuous coordinates
+        band_size: Slots per band (default SNAP_BAND_FACTOR * sqrt(N))
+
+    Returns:
+        Slot index per point
+    """
+    n = len(pos)
+    band_size = band_size or max(1, int(SNAP_BAND_FACTOR * math.sqrt(n)))
+    rel = pos - pos.mean(axis=0)
+    radius = np.hypot(rel[:, 0], rel[:, 1])
+    angle = np.arctan2(rel[:, 1], rel[:, 0])
+
+    slot_xy = np.array([calculate_vogel_position(s) for s in range(n)])
+    slot_angle = np.arctan2(slot_xy[:, 1], slot_xy[:, 0])
+
+    by_radius = np.argsort(radius, kind='stable')
+    slots = np.empty(n, dtype=np.int64)
+    for start in range(0, n, band_size):
+        members = by_radius[start:start + band_size]
+        band_slots = np.arange(start, start + len(members))
+        slots[members[np.argsort(angle[members], kind='stable')]] = \
+            band_slots[np.argsort(slot_angle[band_slots], kind='stable')]
+    return slots
+
+
+def force_directed_ordering(
+    core: GraphCore,
+    iterations: int = DEFAULT_ITERATIONS,
+    theta: float = DEFAULT_THETA,
+    initial_order: Optional[list[int]] = None
+) -> list[int]:
+    """
+    Order actors by their snapped Vogel slot after a force-directed layout.
+
+    Args:
+        core: Graph to lay out
+        iterations: Simulation steps
+        theta: Barnes-Hut opening angle
+        initial_order: Optional dense indices in slot order whose Vogel
+            positions seed the simulation (e.g. degree order)
+
+    Returns:
+        Dense indices in slot order (element 0 takes the center slot)
+    """
+    initial = None
+    if initial_order is not None:
+        initial = np.empty((core.num_nodes, 2))
+        initial[initial_order] = [calculate_vogel_position(slot) for slot in range(len(initial_order))]
+
+    pos = force_directed_layout(core, iterations, theta, initial)
+    slots = snap_to_slots(pos)
+    ordered = np.empty(len(slots), dtype=np.int64)
+    ordered[slots] = np.arange(len(slots))
+    return ordered.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Force-directed layout snapped onto Vogel slots')
+    parser.add_argument('--graph', type=Path, default=DEFAULT_GRAPH_PATH,
+                        help='Graph JSON with actors and edges')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                        help=f'Simulation steps (default {DEFAULT_ITERATIONS})')
+    parser.add_argument('--theta', type=float, default=DEFAULT_THETA,
+                        help=f'Barnes-Hut opening angle (default {DEFAULT_THETA})')
+    args = parser.parse_args()
+
+    with open(args.graph) as f:
+        data = json.load(f)
+    core = GraphCore.from_step_output(data)
+
+    print(f'Force-directed layout for {core.num_nodes:,} actors, {core.num_edges:,} edges...')
+    start_time = time.time()
+    ordered = force_directed_ordering(core, args.iterations, args.theta)
+    print(f'Done in {time.time() - start_time:.2f}s')
+
+    slots = np.empty(len(ordered), dtype=np.int64)
+    slots[ordered] = np.arange(len(ordered))
+    core.place_on_slots(slots)
+    metrics = core.metrics(crossings=False)
+    print(f'Avg edge distance on Vogel slots: {metrics.avg_distance:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Array-backed graph core shared by every step.
+
+One compact representation of the actor graph instead of per-script dicts:
+
+- Dense index: actor i is ids[i]; person_id -> i via a sorted copy of ids
+  (binary search), so there is no per-actor dict
+- CSR adjacency: the neighbours of actor i are
+  neighbors[offsets[i]:offsets[i + 1]] (int64 offsets, int32 neighbours)
+- Degrees, slot ordinals (-1 = unassigned) and x/y positions as flat arrays
+
+At 20k actors / 368k edges this is about 4 MB, against hundreds of MB for
+dict-of-sets adjacency, tuple edge lists and positions dicts.  Pure-Python
+hot loops (BFS, the swap loop) read the arrays through memoryviews (see
+`csr`), which index as fast as lists; vectorized code uses them directly.
+
+A core loads from any step output or graph-data file (`actors` plus
+`edges`), and `peak_rss_mb` reports the process high-water mark so each
+step can print and record its peak memory.
+"""
+
+import json
+import resource
+import sys
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from optimization_utils import (
+    DEFAULT_SPACING,
+    Metrics,
+    calculate_vogel_position,
+    load_step_output,
+)
+
+# Configuration
+RENUMBER_METHODS = ('none', 'bfs', 'rcm')  # See GraphCore.locality_order
+
+
+class GraphCore:
+    """Actor graph over dense indices: CSR adjacency plus per-actor arrays."""
+
+    __slots__ = ('ids', 'offsets', 'neighbors', 'degrees', 'ordinals', 'xs', 'ys', '_sorted_ids', '_sorted_index')
+
+    def __init__(self, ids: np.ndarray, offsets: np.ndarray, neighbors: np.ndarray):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.neighbors = np.asarray(neighbors, dtype=np.int32)
+        self.degrees = np.diff(self.offsets).astype(np.int32)
+        self.ordinals = np.full(len(self.ids), -1, dtype=np.int32)
+        self.xs = np.full(len(self.ids), np.nan)
+        self.ys = np.full(len(self.ids), np.nan)
+        self._sorted_index = np.argsort(self.ids, kind='stable').astype(np.int32)
+        self._sorted_ids = self.ids[self._sorted_index]
+        if len(self._sorted_ids) > 1 and np.any(self._sorted_ids[1:] == self._sorted_ids[:-1]):
+            raise ValueError('Duplicate person_id in graph')
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_edges(cls, node_ids: Iterable[int], edges, drop_unknown: bool = False) -> 'GraphCore':
+        """
+        Build a core from actor IDs and (actor_id_1, actor_id_2) edges.
+
+        Neighbours are stored in edge order, interleaved exactly as appending
+        both directions of each edge to adjacency lists would.  Self-loops are
+        dropped (as in out_of_core.EdgeSpool), so num_edges matches edge_pairs().
+
+        Args:
+            node_ids: Actor IDs; their order defines the dense index
+            edges: Sequence of (actor_id_1, actor_id_2) pairs or an (m, 2) array
+            drop_unknown: Skip edges with an endpoint outside node_ids
+                instead of raising KeyError
+        """
+        ids = np.fromiter(node_ids, dtype=np.int64) if not isinstance(node_ids, np.ndarray) else node_ids
+        pairs = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        return cls._from_endpoints(ids, pairs[:, 0], pairs[:, 1], drop_unknown)
+
+    @classmethod
+    def _from_endpoints(cls, ids: np.ndarray, source_ids: np.ndarray, target_ids: np.ndarray,
+                        drop_unknown: bool) -> 'GraphCore':
+        """Build a core from person_id endpoint arrays."""
+        core = cls(ids, np.zeros(len(ids) + 1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+        sources, found_s = core.lookup(source_ids)
+        targets, found_t = core.lookup(target_ids)
+        found = found_s & found_t
+        if not found.all():
+            if not drop_unknown:
+                k = int(np.argmin(found))
+                raise KeyError(f'Edge endpoint not in graph: {[int(source_ids[k]), int(target_ids[k])]}')
+            sources, targets = sources[found], targets[found]
+
+        loops = sources == targets
+        if loops.any():
+            sources, targets = sources[~loops], targets[~loops]
+        core._set_edges(sources, targets)
+        return core
+
+    @classmethod
+    def from_step_output(cls, data: dict) -> 'GraphCore':
+        """
+        Build a core from a step output or graph-data file.
+
+        Reads `actors` (person_id, plus ordinal/x/y where present) and
+        `edges` ({source, target}); edges to actors outside the file are
+        dropped.
+        """
+        actors = data['actors']
+        edges = data['edges']
+        core = cls._from_endpoints(
+            np.fromiter((a['person_id'] for a in actors), dtype=np.int64, count=len(actors)),
+            np.fromiter((e['source'] for e in edges), dtype=np.int64, count=len(edges)),
+            np.fromiter((e['target'] for e in edges), dtype=np.int64, count=len(edges)),
+            drop_unknown=True,
+        )
+        if actors and 'ordinal' in actors[0]:
+            core.ordinals[:] = [a['ordinal'] for a in actors]
+        if actors and 'x' in actors[0]:
+            core.xs[:] = [a['x'] for a in actors]
+            core.ys[:] = [a['y'] for a in actors]
+        return core
+
+    @classmethod
+    def load_step(cls, step_name: str) -> 'GraphCore':
+        """Build a core from a saved step output (see load_step_output)."""
+        return cls.from_step_output(load_step_output(step_name))
+
+    @classmethod
+    def load_file(cls, path: Path) -> 'GraphCore':
+        """Build a core from a JSON file with `actors` and `edges`."""
+        with open(path) as f:
+            return cls.from_step_output(json.load(f))
+
+    def _set_edges(self, sources: np.ndarray, targets: np.ndarray):
+        """Replace the adjacency with the given dense-index edges."""
+        n = len(self.ids)
+        half_src = np.empty(2 * len(sources), dtype=np.int64)
+        half_dst = np.empty(2 * len(sources), dtype=np.int32)
+        half_src[0::2], half_src[1::2] = sources, targets
+        half_dst[0::2], half_dst[1::2] = targets, sources
+
+        order = np.argsort(half_src, kind='stable')
+        self.neighbors = half_dst[order]
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(half_src, minlength=n), out=self.offsets[1:])
+        self.degrees = np.diff(self.offsets).astype(np.int32)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.neighbors) // 2
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the core's arrays."""
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    def lookup(self, person_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Dense indices for person_ids, plus a mask of which were found."""
+        if not len(self._sorted_ids):
+            return np.zeros(len(person_ids), dtype=np.int32), np.zeros(len(person_ids), dtype=bool)
+        pos = np.searchsorted(self._sorted_ids, person_ids)
+        pos = np.minimum(pos, len(self._sorted_ids) - 1)
+        found = self._sorted_ids[pos] == person_ids
+        return self._sorted_index[pos], found
+
+    def __contains__(self, person_id: int) -> bool:
+        return bool(self.lookup(np.array([person_id], dtype=np.int64))[1][0])
+
+    def mask_of(self, person_ids) -> np.ndarray:
+        """Boolean mask of which person_ids are in the graph."""
+        return self.lookup(np.asarray(person_ids, dtype=np.int64))[1]
+
+    def index_of(self, person_id: int) -> int:
+        """Dense index of an actor.  Raises KeyError if absent."""
+        index, found = self.lookup(np.array([person_id], dtype=np.int64))
+        if not found[0]:
+            raise KeyError(person_id)
+        return int(index[0])
+
+    def indices_of(self, person_ids) -> np.ndarray:
+        """Dense indices of several actors.  Raises KeyError if any is absent."""
+        person_ids = np.asarray(person_ids, dtype=np.int64)
+        index, found = self.lookup(person_ids)
+        if not found.all():
+            raise KeyError(int(person_ids[~found][0]))
+        return index
+
+    def neighbors_of(self, i: int) -> np.ndarray:
+        """Dense indices adjacent to actor i."""
+        return self.neighbors[self.offsets[i]:self.offsets[i + 1]]
+
+    def csr(self) -> tuple[memoryview, memoryview]:
+        """
+        (offsets, neighbors) as memoryviews for pure-Python loops.
+
+        Indexing a memoryview yields plain ints at list speed; indexing the
+        numpy arrays element by element is several times slower.
+        """
+        return memoryview(self.offsets), memoryview(self.neighbors)
+
+    def adjacency_lists(self) -> list[list[int]]:
+        """Per-actor neighbour lists, for loops that iterate neighbours millions of times."""
+        neighbors = self.neighbors.tolist()
+        offsets = self.offsets.tolist()
+        return [neighbors[offsets[i]:offsets[i + 1]] for i in range(len(self.ids))]
+
+    def edge_pairs(self) -> np.ndarray:
+        """Every edge once, as an (m, 2) array of dense indices (lower index first)."""
+        sources = np.repeat(np.arange(len(self.ids), dtype=np.int32), self.degrees)
+        keep = sources < self.neighbors
+        return np.column_stack((sources[keep], self.neighbors[keep]))
+
+    def edge_list(self) -> list[tuple[int, int]]:
+        """Every edge once as (person_id, person_id) tuples, for APIs that take edge lists."""
+        pairs = self.ids[self.edge_pairs()]
+        return list(zip(pairs[:, 0].tolist(), pairs[:, 1].tolist()))
+
+    # ------------------------------------------------------------------
+    # Edge updates
+    # ------------------------------------------------------------------
+
+    def with_edge_changes(
+        self,
+        added: list[tuple[int, int]],
+        removed: list[tuple[int, int]]
+    ) -> tuple['GraphCore', list[tuple[int, int]], list[tuple[int, int]]]:
+        """
+        Copy of the core with edges added and removed.
+
+        Removals of absent edges, additions of existing edges, self-loops
+        and edges to unknown actors are ignored.
+
+        Returns:
+            (new core, added edges that changed it, removed edges that changed it)
+        """
+        n = len(self.ids)
+        pairs = self.edge_pairs().astype(np.int64)
+        keys = pairs[:, 0] * n + pairs[:, 1]
+
+        def edge_keys(changes):
+            changes = np.asarray(changes, dtype=np.int64).reshape(-1, 2)
+            s, found_s = self.lookup(changes[:, 0])
+            t, found_t = self.lookup(changes[:, 1])
+            ok = found_s & found_t & (s != t)
+            lo, hi = np.minimum(s, t).astype(np.int64), np.maximum(s, t).astype(np.int64)
+            return changes, np.where(ok, lo * n + hi, -1)
+
+        removed_pairs, removed_keys = edge_keys(removed)
+        applied_removed = np.isin(removed_keys, keys) & (removed_keys >= 0)
+        _, first = np.unique(removed_keys, return_index=True)
+        applied_removed &= np.isin(np.arange(len(removed_keys)), first)
+        keys = keys[~np.isin(keys, removed_keys[applied_removed])]
+
+        added_pairs, added_keys = edge_keys(added)
+        applied_added = ~np.isin(added_keys, keys) & (added_keys >= 0)
+        _, first = np.unique(added_keys, return_index=True)
+        applied_added &= np.isin(np.arange(len(added_keys)), first)
+        keys = np.concatenate((keys, added_keys[applied_added]))
+
+        core = GraphCore(self.ids, np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+        core._set_edges(keys // n, keys % n)
+        core.ordinals[:] = self.ordinals
+        core.xs[:], core.ys[:] = self.xs, self.ys
+        return core, [tuple(e) for e in added_pairs[applied_added].tolist()], \
+            [tuple(e) for e in removed_pairs[applied_removed].tolist()]
+
+    # ------------------------------------------------------------------
+    # Renumbering
+    # ------------------------------------------------------------------
+
+    def locality_order(self, method: str = 'rcm') -> np.ndarray:
+        """
+        Dense-index permutation that stores neighbours close together.
+
+        Dense indices come out in input (Recognizability) order, which
+        scatters each actor's neighbours across the arrays.  'bfs' is the
+        Cuthill-McKee order: BFS from a minimum-degree actor of each
+        component, visiting unvisited neighbours in ascending degree.
+        'rcm' reverses it (Reverse Cuthill-McKee), which usually narrows
+        the bandwidth further.  Each BFS level is expanded vectorized.
+
+        Returns:
+            order with order[new_index] = old_index (see permuted)
+        """
+        if method not in RENUMBER_METHODS:
+            raise ValueError(f'Unknown renumbering method: {method}')
+        if method == 'none':
+            return np.arange(self.num_nodes, dtype=np.int64)
+        n = self.num_nodes
+        visited = np.zeros(n, dtype=bool)
+        order = np.empty(n, dtype=np.int64)
+        filled = 0
+        for start in np.argsort(self.degrees, kind='stable').tolist():
+            if visited[start]:
+                continue
+            visited[start] = True
+            order[filled] = start
+            filled += 1
+            frontier = np.array([start], dtype=np.int64)
+            while len(frontier):
+                starts = self.offsets[frontier]
+                counts = self.offsets[frontier + 1] - starts
+                reached = self.neighbors[expand_ranges(starts, counts)].astype(np.int64)
+                parent = np.repeat(np.arange(len(frontier)), counts)
+                fresh = ~visited[reached]
+                reached, parent = reached[fresh], parent[fresh]
+                if not len(reached):
+                    break
+                # Visit order: earlier parent first, then lower degree; keep each actor's first visit
+                reached = reached[np.lexsort((reached, self.degrees[reached], parent))]
+                by_actor = np.argsort(reached, kind='stable')
+                first = np.ones(len(reached), dtype=bool)
+                first[1:] = reached[by_actor[1:]] != reached[by_actor[:-1]]
+                frontier = reached[np.sort(by_actor[first])]
+                visited[frontier] = True
+                order[filled:filled + len(frontier)] = frontier
+                filled += len(frontier)
+        return order[::-1].copy() if method == 'rcm' else order
+
+    def permuted(self, order) -> 'GraphCore':
+        """
+        Copy of the core renumbered so that new index i is old index order[i].
+
+        person_ids, slots, positions and neighbour lists move with their
+        actors (each neighbour list keeps its order), so anything keyed by
+        `ids` maps results back to person_ids unchanged.
+        """
+        order = np.asarray(order, dtype=np.int64)
+        rank = np.empty(self.num_nodes, dtype=np.int32)
+        rank[order] = np.arange(self.num_nodes, dtype=np.int32)
+        degrees = self.degrees[order]
+        offsets = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(degrees, out=offsets[1:])
+        neighbors = rank[self.neighbors[expand_ranges(self.offsets[order], degrees)]]
+        core = GraphCore(self.ids[order], offsets, neighbors)
+        core.ordinals[:] = self.ordinals[order]
+        core.xs[:], core.ys[:] = self.xs[order], self.ys[order]
+        return core
+
+    # ------------------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------------------
+
+    def place_on_slots(self, ordinals, spacing: float = DEFAULT_SPACING):
+        """Assign slot ordinals (dense order) and set x/y to their Vogel positions."""
+        self.ordinals[:] = ordinals
+        points = [calculate_vogel_position(ordinal, spacing) for ordinal in self.ordinals.tolist()]
+        self.xs[:] = [p[0] for p in points]
+        self.ys[:] = [p[1] for p in points]
+
+    def set_layout(self, positions: dict[int, tuple[float, float]], ordinals: dict[int, int]):
+        """Copy a layout given as person_id-keyed dicts into the arrays."""
+        ids = self.ids.tolist()
+        self.ordinals[:] = [ordinals[actor_id] for actor_id in ids]
+        self.xs[:] = [positions[actor_id][0] for actor_id in ids]
+        self.ys[:] = [positions[actor_id][1] for actor_id in ids]
+
+    def positions(self) -> dict[int, tuple[float, float]]:
+        """Layout as a person_id -> (x, y) dict, for APIs that take one."""
+        return dict(zip(self.ids.tolist(), zip(self.xs.tolist(), self.ys.tolist())))
+
+    def ordinal_map(self) -> dict[int, int]:
+        """Slots as a person_id -> ordinal dict, for APIs that take one."""
+        return dict(zip(self.ids.tolist(), self.ordinals.tolist()))
+
+    def edge_lengths(self) -> np.ndarray:
+        """Length of every edge (edge_pairs order) in the current layout."""
+        pairs = self.edge_pairs()
+        return np.hypot(self.xs[pairs[:, 0]] - self.xs[pairs[:, 1]], self.ys[pairs[:, 0]] - self.ys[pairs[:, 1]])
+
+    def metrics(self, crossings: bool = True) -> Metrics:
+        """
+        Standard layout metrics (see calculate_metrics), vectorized over the arrays.
+
+        Crossings go through crossings.py, which takes a positions dict and
+        edge list; those are only built when crossings are requested.
+        """
+        if not self.num_edges:
+            return Metrics(edge_count=0, total_distance=0.0, avg_distance=0.0, min_distance=0.0, max_distance=0.0)
+        lengths = self.edge_lengths()
+        total = float(lengths.sum())
+
+        edge_crossings = None
+        edge_crossings_ci = None
+        if crossings:
+            from crossings import count_crossings
+            estimate = count_crossings(self.positions(), self.edge_list())
+            edge_crossings = estimate.crossings
+            if not estimate.exact:
+                edge_crossings_ci = [round(estimate.ci_low), round(estimate.ci_high)]
+
+        return Metrics(
+            edge_count=self.num_edges,
+            total_distance=total,
+            avg_distance=total / self.num_edges,
+            min_distance=float(lengths.min()),
+            max_distance=float(lengths.max()),
+            edge_crossings=edge_crossings,
+            edge_crossings_ci=edge_crossings_ci,
+        )
+
+
+def expand_ranges(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenate arange(s, s + c) for every (s, c) pair (e.g. CSR rows)."""
+    total = int(counts.sum())
+    shift = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return shift + np.arange(total)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+if __name__ == '__main__':
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else None
+    core = GraphCore.load_file(source) if source else GraphCore.load_step('03-swap-optimization')
+    print(f'{core.num_nodes:,} actors, {core.num_edges:,} edges, '
+          f'max degree {int(core.degrees.max()) if core.num_nodes else 0}, '
+          f'{core.nbytes / 1e6:.1f} MB of arrays')
+    print(f'Peak RSS: {peak_rss_mb():.0f} MB')
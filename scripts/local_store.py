@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Supabase client.
+
+Emulates the subset of the supabase-py query builder used by the optimization
+scripts (select / filters / order / range / upsert / insert and the RPC
+functions in `sql/`) over a JSON file, so fetch and write-back paths can run
+without a network connection.
+
+Enable it by pointing SUPABASE_LOCAL_STORE at a store file; the scripts then
+get a LocalSupabase from `get_supabase_client()`.  Set SUPABASE_LOCAL_FAIL_RATE
+(0-1) to make that share of writes fail, for exercising retry paths.
+
+Usage:
+    # Build a store from a published graph snapshot
+    python scripts/local_store.py build optimization_outputs/graph-data-2000.json /tmp/store.json
+    SUPABASE_LOCAL_STORE=/tmp/store.json python scripts/01-random-baseline.py
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+
+class LocalApiError(Exception):
+    """Database error carrying a PostgREST/Postgres code, like postgrest's APIError."""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+
+
+@dataclass
+class LocalResponse:
+    """Mirror of the supabase-py APIResponse fields the scripts read."""
+    data: list[dict]
+    count: Optional[int] = None
+
+
+class LocalQuery:
+    """Chainable query over one table of a LocalSupabase store."""
+
+    def __init__(self, store: 'LocalSupabase', table: str):
+        self.store = store
+        self.table = table
+        self.columns: Optional[list[str]] = None
+        self.filters: list = []
+        self.order_by: Optional[tuple[str, bool]] = None
+        self.row_range: Optional[tuple[int, int]] = None
+        self.write: Optional[tuple[str, list[dict], Optional[str]]] = None
+
+    def select(self, columns: str = '*') -> 'LocalQuery':
+        if columns.strip() != '*':
+            self.columns = [c.strip() for c in columns.split(',')]
+        return self
+
+    def eq(self, column: str, value: Any) -> 'LocalQuery':
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def lt(self, column: str, value: Any) -> 'LocalQuery':
+        self.filters.append(lambda row: row.get(column) is not None and row[column] < value)
+        return self
+
+    def gt(self, column: str, value: Any) -> 'LocalQuery':
+        self.filters.append(lambda row: row.get(column) is not None and row[column] > value)
+        return self
+
+    def in_(self, column: str, values: list) -> 'LocalQuery':
+        allowed = set(values)
+        self.filters.append(lambda row: row.get(column) in allowed)
+        return self
+
+    def or_(self, expression: str) -> 'LocalQuery':
+        """Supports the `col.in.(a,b,c),col2.in.(...)` form used by the scripts."""
+        clauses = []
+        for column, values in re.findall(r'(\w+)\.in\.\(([^)]*)\)', expression):
+            allowed = {int(v) for v in values.split(',') if v}
+            clauses.append((column, allowed))
+        self.filters.append(lambda row: any(row.get(c) in allowed for c, allowed in clauses))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> 'LocalQuery':
+        self.order_by = (column, desc)
+        return self
+
+    def range(self, start: int, end: int) -> 'LocalQuery':
+        self.row_range = (start, end)
+        return self
+
+    def upsert(self, rows: list[dict], on_conflict: Optional[str] = None) -> 'LocalQuery':
+        self.write = ('upsert', rows, on_conflict)
+        return self
+
+    def insert(self, rows: list[dict]) -> 'LocalQuery':
+        self.write = ('insert', rows, None)
+        return self
+
+    def execute(self) -> LocalResponse:
+        if self.write:
+            return self.store._write(self.table, *self.write)
+
+        rows = self.store._rows(self.table)
+        rows = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.order_by:
+            column, desc = self.order_by
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        if self.row_range:
+            start, end = self.row_range
+            rows = rows[start:end + 1]
+        if self.columns:
+            rows = [{c: row.get(c) for c in self.columns} for row in rows]
+
+        self.store.rows_served += len(rows)
+        return LocalResponse(data=rows)
+
+
+class LocalRpc:
+    """Pending call to an emulated database function."""
+
+    def __init__(self, store: 'LocalSupabase', rows: list[dict]):
+        self.store = store
+        self.rows = rows
+        self.row_range: Optional[tuple[int, int]] = None
+
+    def range(self, start: int, end: int) -> 'LocalRpc':
+        self.row_range = (start, end)
+        return self
+
+    def execute(self) -> LocalResponse:
+        rows = self.rows
+        if self.row_range:
+            start, end = self.row_range
+            rows = rows[start:end + 1]
+        self.store.rows_served += len(rows)
+        return LocalResponse(data=rows)
+
+
+class LocalSupabase:
+    """
+    JSON-file-backed stand-in for a supabase-py Client.
+
+    The store file maps table names to lists of row dicts.  Writes are saved
+    back to the file immediately; concurrent writers are serialized.
+    """
+
+    def __init__(self, path: Path, fail_rate: Optional[float] = None):
+        self.path = Path(path)
+        with open(self.path) as f:
+            self.tables: dict[str, list[dict]] = json.load(f)
+        self.rows_served = 0  # Rows returned to the caller (proxy for bytes transferred)
+        self.rows_written = 0
+        self.fail_rate = fail_rate if fail_rate is not None else float(os.getenv('SUPABASE_LOCAL_FAIL_RATE', 0))
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    def rpc(self, name: str, params: dict) -> LocalRpc:
+        functions = {
+            'induced_actor_connections': self._induced_actor_connections,
+            'published_actor_positions': self._published_actor_positions,
+        }
+        if name not in functions:
+            raise LocalApiError(f'Could not find the function {name}', code='PGRST202')
+        return LocalRpc(self, functions[name](**params))
+
+    def _rows(self, table: str) -> list[dict]:
+        return list(self.tables.get(table, []))
+
+    def _write(self, table: str, mode: str, rows: list[dict], on_conflict: Optional[str]) -> LocalResponse:
+        with self._lock:
+            if self.fail_rate and self._rng.random() < self.fail_rate:
+                raise ConnectionError(f'Simulated write failure on {table}')
+            existing = self.tables.setdefault(table, [])
+            if mode == 'upsert' and on_conflict:
+                keys = [k.strip() for k in on_conflict.split(',')]
+                position = {tuple(row.get(k) for k in keys): i for i, row in enumerate(existing)}
+                for row in rows:
+                    key = tuple(row.get(k) for k in keys)
+                    if key in position:
+                        existing[position[key]].update(row)
+                    else:
+                        position[key] = len(existing)
+                        existing.append(dict(row))
+            else:
+                existing.extend(dict(row) for row in rows)
+            self.rows_written += len(rows)
+            self._save()
+        return LocalResponse(data=rows)
+
+    def _save(self):
+        tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.tables, f)
+        tmp.replace(self.path)
+
+    # Emulated database functions (see scripts/sql/)
+
+    def _induced_actor_connections(
+        self,
+        actor_ids: list[int],
+        after_source: Optional[int] = None,
+        after_target: Optional[int] = None,
+        page_limit: int = 1000
+    ) -> list[dict]:
+        allowed = set(actor_ids)
+        pairs = set()
+        for row in self.tables.get('actor_connections', []):
+            source, target = row['Source'], row['Target']
+            if source != target and source in allowed and target in allowed:
+                pairs.add((min(source, target), max(source, target)))
+        if after_source is not None:
+            pairs = {p for p in pairs if p > (after_source, after_target)}
+        return [{'Source': s, 'Target': t} for s, t in sorted(pairs)[:page_limit]]
+
+    def _published_actor_positions(self, p_graph_limit: int) -> list[dict]:
+        published = {
+            v['version'] for v in self.tables.get('layout_versions', [])
+            if v['graph_limit'] == p_graph_limit and v['status'] == 'published'
+        }
+        latest: dict[int, dict] = {}
+        for row in self.tables.get('actor_positions', []):
+            if row['graph_limit'] != p_graph_limit or row['version'] not in published:
+                continue
+            current = latest.get(row['person_id'])
+            if current is None or row['version'] > current['version']:
+                latest[row['person_id']] = row
+        return [
+            {k: row[k] for k in ('person_id', 'ordinal', 'x', 'y', 'version')}
+            for _, row in sorted(latest.items()) if not row.get('removed')
+        ]
+
+
+def build_store(graph_path: Path, store_path: Path, seed: int = 42):
+    """
+    Build a store from a graph-data JSON snapshot.
+
+    Each edge is written in a random direction and some are repeated (as if
+    the two actors shared several movies), matching the shape of the real
+    actor_connections table.
+    """
+    with open(graph_path) as f:
+        data = json.load(f)
+
+    rng = random.Random(seed)
+    actors = [
+        {'person_id': a['person_id'], 'name': a['name'], 'Recognizability': a['recognizability']}
+        for a in data['actors']
+    ]
+    connections = []
+    for e in data['edges']:
+        for _ in range(1 + (rng.random() < 0.3)):
+            source, target = e['source'], e['target']
+            if rng.random() < 0.5:
+                source, target = target, source
+            connections.append({'id': len(connections), 'Source': source, 'Target': target})
+
+    with open(store_path, 'w') as f:
+        json.dump({'actors': actors, 'actor_connections': connections}, f)
+    print(f'Wrote {len(actors)} actors and {len(connections)} connection rows to {store_path}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Supabase stand-in')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='Build a store from a graph-data JSON file')
+    build.add_argument('graph', type=Path)
+    build.add_argument('store', type=Path)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_store(args.graph, args.store)
+
+
+if __name__ == '__main__':
+    main()
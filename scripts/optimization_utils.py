@@ -3,11 +3,15 @@
 Shared utilities for graph layout optimization scripts.
 
 Provides common functions for:
-- Supabase client initialization
 - Vogel spiral layout calculation
 - Distance calculations
 - Metrics computation
-- Progress file management
+- Step output and progress file management
+
+This is the compute layer, and importing it needs neither the network
+client nor a .env file, so offline steps start quickly.  The database
+I/O (Supabase client, actor/connection fetches) lives in supabase_io.py;
+its functions are still available from here and are loaded on first use.
 """
 
 import os
@@ -17,11 +21,6 @@ from pathlib import Path
 from datetime import datetime
 from dataclasses import dataclass
 from typing import Optional
-from dotenv import load_dotenv
-from supabase import create_client, Client
-
-# Load environment variables
-load_dotenv()
 
 # Constants
 SCRIPT_DIR = Path(__file__).parent
@@ -33,8 +32,39 @@ GOLDEN_RATIO = (1 + 5 ** 0.5) / 2
 GOLDEN_ANGLE = 360 * (1 - 1 / GOLDEN_RATIO)  # ~137.5 degrees
 DEFAULT_SPACING = 80
 
-# Get graph limit from environment (default to 200 if not set)
-DEFAULT_GRAPH_LIMIT = int(os.getenv('VITE_GRAPH_LIMIT'))
+# Graph limit when VITE_GRAPH_LIMIT is not set (see graph_limit)
+DEFAULT_GRAPH_LIMIT = 200
+
+# Database I/O names re-exported from supabase_io, imported on first access
+_IO_NAMES = ('get_supabase_client', 'fetch_top_actors', 'fetch_connections', 'fetch_induced_connections')
+
+_env_loaded = False
+
+
+def __getattr__(name: str):
+    if name in _IO_NAMES:
+        import supabase_io
+        return getattr(supabase_io, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def load_env():
+    """Load .env into the environment once (skipped if python-dotenv is not installed)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
+
+
+def graph_limit() -> int:
+    """Graph size from VITE_GRAPH_LIMIT (environment or .env), DEFAULT_GRAPH_LIMIT if unset."""
+    load_env()
+    return int(os.getenv('VITE_GRAPH_LIMIT') or DEFAULT_GRAPH_LIMIT)
 
 
 @dataclass
@@ -45,15 +75,30 @@ class Metrics:
     avg_distance: float
     min_distance: float
     max_distance: float
+    edge_crossings: Optional[float] = None  # Exact count or sampled estimate
+    edge_crossings_ci: Optional[list[float]] = None  # [low, high]; None when exact
 
     def to_dict(self) -> dict:
-        return {
+        data = {
             'edge_count': self.edge_count,
             'total_distance': round(self.total_distance, 2),
             'avg_distance': round(self.avg_distance, 2),
             'min_distance': round(self.min_distance, 2),
             'max_distance': round(self.max_distance, 2),
         }
+        if self.edge_crossings is not None:
+            data['edge_crossings'] = round(self.edge_crossings)
+            data['edge_crossings_ci'] = self.edge_crossings_ci
+        return data
+
+    def crossings_str(self) -> str:
+        """Edge crossings formatted for display (with CI when sampled)."""
+        if self.edge_crossings is None:
+            return 'n/a'
+        if self.edge_crossings_ci is None:
+            return f'{self.edge_crossings:,.0f}'
+        low, high = self.edge_crossings_ci
+        return f'~{self.edge_crossings:,.0f} (95% CI {low:,.0f}-{high:,.0f})'
 
     def __str__(self) -> str:
         return (
@@ -61,21 +106,11 @@ class Metrics:
             f"Total distance: {self.total_distance:,.2f}\n"
             f"Avg distance: {self.avg_distance:.2f}\n"
             f"Min distance: {self.min_distance:.2f}\n"
-            f"Max distance: {self.max_distance:.2f}"
+            f"Max distance: {self.max_distance:.2f}\n"
+            f"Edge crossings: {self.crossings_str()}"
         )
 
 
-def get_supabase_client() -> Client:
-    """Initialize and return Supabase client."""
-    supabase_url = os.getenv('VITE_SUPABASE_URL')
-    supabase_key = os.getenv('VITE_SUPABASE_ANON_KEY')
-
-    if not supabase_url or not supabase_key:
-        raise ValueError('VITE_SUPABASE_URL and VITE_SUPABASE_ANON_KEY must be set in .env')
-
-    return create_client(supabase_url, supabase_key)
-
-
 def calculate_vogel_position(index: int, spacing: float = DEFAULT_SPACING) -> tuple[float, float]:
     """
     Calculate Vogel spiral position for a given index.
@@ -102,92 +137,69 @@ def euclidean_distance(x1: float, y1: float, x2: float, y2: float) -> float:
     return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
 
 
-def fetch_top_actors(supabase: Client, limit: Optional[int] = None) -> list[dict]:
+class SlotGrid:
     """
-    Fetch top actors ordered by Recognizability.
-
-    Args:
-        limit: Number of actors to fetch (defaults to VITE_GRAPH_LIMIT from .env)
+    Uniform grid spatial index over Vogel slot coordinates.
 
-    Returns list of dicts with: person_id, name, Recognizability
+    Answers k-nearest-slot queries by searching rings of grid cells outwards
+    from the query point.  Slots can be removed (e.g. once occupied) so later
+    queries only return free slots.
     """
-    if limit is None:
-        limit = DEFAULT_GRAPH_LIMIT
-
-    print(f'Fetching top {limit} actors...')
-
-    all_actors = []
-    page_size = 1000
-    start = 0
-
-    while len(all_actors) < limit:
-        remaining = limit - len(all_actors)
-        fetch_count = min(page_size, remaining)
-
-        response = supabase.table('actors') \
-            .select('person_id, name, Recognizability') \
-            .order('Recognizability', desc=True) \
-            .range(start, start + fetch_count - 1) \
-            .execute()
 
-        if not response.data:
-            break
-
-        all_actors.extend(response.data)
-        print(f'\rFetched {len(all_actors)} actors...', end='', flush=True)
-
-        if len(response.data) < fetch_count:
-            break
-        start += fetch_count
-
-    print()
-
-    if not all_actors:
-        raise ValueError('No actors returned from database')
-
-    # Filter out any with null Recognizability
-    actors = [a for a in all_actors if a.get('Recognizability') is not None]
-
-    print(f'Fetched {len(actors)} actors')
-    return actors
-
-
-def fetch_connections(supabase: Client, actor_ids: list[int]) -> list[dict]:
-    """
-    Fetch all connections between the given actors.
-
-    Returns list of dicts with: Source, Target
-    """
-    print('Fetching connections...')
-
-    all_connections = []
-    page_size = 1000
-    id_chunk_size = 500  # Keep filter URL within Supabase limits
-
-    for chunk_start in range(0, len(actor_ids), id_chunk_size):
-        chunk = actor_ids[chunk_start:chunk_start + id_chunk_size]
-        actor_ids_str = ','.join(map(str, chunk))
-        start = 0
-
-        while True:
-            response = supabase.table('actor_connections') \
-                .select('Source, Target') \
-                .or_(f'Source.in.({actor_ids_str}),Target.in.({actor_ids_str})') \
-                .range(start, start + page_size - 1) \
-                .execute()
-
-            if response.data and len(response.data) > 0:
-                all_connections.extend(response.data)
-                print(f'\rFetched {len(all_connections)} connections...', end='', flush=True)
-
-                if len(response.data) < page_size:
+    def __init__(self, slot_x: list[float], slot_y: list[float], cell_size: float = DEFAULT_SPACING):
+        self.slot_x = slot_x
+        self.slot_y = slot_y
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list[int]] = {}
+        self.size = 0
+        for slot, (x, y) in enumerate(zip(slot_x, slot_y)):
+            self.cells.setdefault(self._cell(x, y), []).append(slot)
+            self.size += 1
+        self.max_ring = max(
+            (max(abs(cx), abs(cy)) for cx, cy in self.cells), default=0
+        ) * 2 + 1
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def remove(self, slot: int):
+        """Remove a slot from the index."""
+        cell = self._cell(self.slot_x[slot], self.slot_y[slot])
+        self.cells[cell].remove(slot)
+        self.size -= 1
+
+    def nearest(self, x: float, y: float, k: int = 1, exclude: Optional[set[int]] = None) -> list[int]:
+        """
+        Return up to k slots nearest to (x, y), closest first.
+
+        Args:
+            x, y: Query point
+            k: Number of slots to return
+            exclude: Optional set of slots to skip
+        """
+        cx, cy = self._cell(x, y)
+        found: list[tuple[float, int]] = []
+        ring = 0
+
+        while ring <= self.max_ring + abs(cx) + abs(cy):
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in (range(cy - ring, cy + ring + 1)
+                           if gx in (cx - ring, cx + ring) else (cy - ring, cy + ring)):
+                    for slot in self.cells.get((gx, gy), ()):
+                        if exclude and slot in exclude:
+                            continue
+                        found.append((
+                            (self.slot_x[slot] - x) ** 2 + (self.slot_y[slot] - y) ** 2, slot
+                        ))
+            # Every slot in an unsearched ring is at least `ring` cells away
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= (ring * self.cell_size) ** 2:
                     break
-                start += page_size
-            else:
-                break
+            ring += 1
 
-    print()
-    return all_connections
+        found.sort()
+        return [slot for _, slot in found[:k]]
 
 
 def deduplicate_edges(connections: list[dict], actor_id_set: set[int]) -> list[tuple[int, int]]:
@@ -220,7 +232,8 @@ def deduplicate_edges(connections: list[dict], actor_id_set: set[int]) -> list[t
 
 def calculate_metrics(
     positions: dict[int, tuple[float, float]],  # actor_id -> (x, y)
-    edges: list[tuple[int, int]]  # (actor_id_1, actor_id_2)
+    edges: list[tuple[int, int]],  # (actor_id_1, actor_id_2)
+    crossings: bool = True
 ) -> Metrics:
     """
     Calculate standard metrics for a given layout.
@@ -228,6 +241,8 @@ def calculate_metrics(
     Args:
         positions: Dict mapping actor_id to (x, y) coordinates
         edges: List of (actor_id_1, actor_id_2) tuples
+        crossings: Whether to count edge crossings (exact on small graphs,
+            sampled estimate on large ones; see crossings.py)
 
     Returns:
         Metrics object with all standard metrics
@@ -250,12 +265,23 @@ def calculate_metrics(
 
     total = sum(distances)
 
+    edge_crossings = None
+    edge_crossings_ci = None
+    if crossings:
+        from crossings import count_crossings
+        estimate = count_crossings(positions, edges)
+        edge_crossings = estimate.crossings
+        if not estimate.exact:
+            edge_crossings_ci = [round(estimate.ci_low), round(estimate.ci_high)]
+
     return Metrics(
         edge_count=len(edges),
         total_distance=total,
         avg_distance=total / len(edges),
         min_distance=min(distances),
-        max_distance=max(distances)
+        max_distance=max(distances),
+        edge_crossings=edge_crossings,
+        edge_crossings_ci=edge_crossings_ci,
     )
 
 
@@ -314,6 +340,8 @@ def append_to_progress(
     lines.append(f'- Avg distance: {metrics.avg_distance:.2f}')
     lines.append(f'- Min distance: {metrics.min_distance:.2f}')
     lines.append(f'- Max distance: {metrics.max_distance:.2f}')
+    if metrics.edge_crossings is not None:
+        lines.append(f'- Edge crossings: {metrics.crossings_str()}')
 
     # Add comparison to previous step
     if previous_metrics and previous_metrics.avg_distance > 0:
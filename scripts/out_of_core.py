@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Out-of-core graph store for million-actor graphs.
+
+The in-memory path (fetch_connections -> deduplicate_edges -> GraphCore)
+holds every connection row, a set of edge tuples and the JSON snapshot at
+once, which stops scaling well before a million actors.  This module builds
+the same CSR arrays on disk instead, with memory bounded by a run size rather
+than the edge count:
+
+1. Edge chunks (person_id pairs from the database, a CSV file or a graph
+   JSON) are mapped to dense indices and spooled as sorted runs of 64-bit
+   half-edge keys (source << 32 | target), both directions of every edge.
+2. The runs are merged block by block (external sort), folding duplicates,
+   into `neighbors.i32` (CSR neighbours), `edges.i32` (every edge once,
+   lower index first) and `offsets.i64` (cumulative degrees).
+3. The dense index is renumbered into a locality order (Reverse
+   Cuthill-McKee by default, see GraphCore.locality_order) by rebuilding
+   the store from its own edge file, so neighbouring actors' CSR rows sit
+   close together on disk.
+4. The files are memory-mapped: `open_store` wraps them in a GraphCore, and
+   metrics and BFS run over them a chunk of edges at a time.
+
+Store directory layout:
+
+    ids.i64        person_id of each dense index (input or locality order)
+    offsets.i64    CSR offsets, n + 1 entries
+    neighbors.i32  CSR neighbours, 2m entries, sorted within each actor
+    edges.i32      (m, 2) edges, sorted, lower dense index first
+    names.txt      one actor name per line (optional)
+    meta.json      counts and build stats
+
+Usage:
+    python scripts/out_of_core.py build --graph optimization_outputs/graph-data-20000.json
+    python scripts/out_of_core.py build --actors actors.csv --edges edges.csv --store optimization_outputs/ooc
+    python scripts/out_of_core.py build --from-db --limit 1000000
+    python scripts/out_of_core.py metrics
+    python scripts/out_of_core.py bfs 4724
+"""
+
+import argparse
+import csv
+import json
+import shutil
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from graph_core import RENUMBER_METHODS, GraphCore, expand_ranges, peak_rss_mb
+from optimization_utils import DEFAULT_SPACING, Metrics, OUTPUT_DIR
+from slot_distances import vogel_slots
+
+# Configuration
+DEFAULT_STORE_DIR = OUTPUT_DIR / 'ooc'
+RUN_HALF_EDGES = 8_000_000  # Half-edge keys sorted in memory per run (64 MB)
+MERGE_BUFFER_MB = 256  # Keys read across all runs per merge step
+CHUNK_EDGES = 4_000_000  # Edges (or half-edges) per chunk for metrics and BFS
+READ_CHUNK_ROWS = 1_000_000  # Edge rows parsed per chunk from CSV / JSON
+DB_PAGE_SIZE = 1000  # Rows per keyset page when scanning actor_connections
+DEFAULT_RENUMBER = 'rcm'  # Dense-index locality order applied after the build
+
+
+@dataclass
+class EdgeStore:
+    """An opened out-of-core store: memory-mapped CSR core plus edge list."""
+    directory: Path
+    core: GraphCore  # offsets / neighbors are read-only memmaps
+    edges: np.ndarray  # (m, 2) int32 memmap, lower dense index first
+    meta: dict
+
+    def load_names(self) -> list[str]:
+        """Actor names by dense index ('' when the store has none)."""
+        path = self.directory / 'names.txt'
+        if not path.exists():
+            return [''] * self.core.num_nodes
+        with open(path, encoding='utf-8') as f:
+            return [line.rstrip('\n') for line in f]
+
+
+# ---------------------------------------------------------------------------
+# Edge sources: iterators of (source_ids, target_ids) person_id arrays
+# ---------------------------------------------------------------------------
+
+def read_actor_csv(path: Path) -> tuple[np.ndarray, Optional[list[str]]]:
+    """Read `person_id[,name]` rows (header optional)."""
+    ids, names = [], []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().lstrip('-').isdigit():
+                continue
+            ids.append(int(row[0]))
+            names.append(row[1] if len(row) > 1 else '')
+    return np.array(ids, dtype=np.int64), names if any(names) else None
+
+
+def iter_csv_edges(path: Path, chunk_rows: int = READ_CHUNK_ROWS) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Stream `source,target` rows (header optional) in chunks, parsed by np.loadtxt."""
+    with open(path) as f:
+        first = f.readline()
+        pending = [first] if first.strip()[:1].lstrip('-').isdigit() else []
+        while True:
+            lines = pending + list(islice(f, chunk_rows))
+            pending = []
+            if not lines:
+                return
+            pairs = np.loadtxt(lines, delimiter=',', dtype=np.int64, usecols=(0, 1), ndmin=2)
+            yield pairs[:, 0], pairs[:, 1]
+
+
+def iter_json_edges(edges: list[dict], chunk_rows: int = READ_CHUNK_ROWS) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Stream the `edges` of a loaded graph-data file in chunks."""
+    for start in range(0, len(edges), chunk_rows):
+        chunk = edges[start:start + chunk_rows]
+        yield (np.fromiter((e['source'] for e in chunk), dtype=np.int64, count=len(chunk)),
+               np.fromiter((e['target'] for e in chunk), dtype=np.int64, count=len(chunk)))
+
+
+def iter_db_edges(supabase, page_size: int = DB_PAGE_SIZE) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Scan actor_connections with keyset pagination on `id`.
+
+    Unlike induced_actor_connections, no page re-sends the actor list or
+    re-runs the join, so the scan costs one index range read per page.
+    Rows outside the actor set, self-loops and repeats are dropped by the
+    spool, not here.
+    """
+    last_id = -1
+    fetched = 0
+    while True:
+        response = supabase.table('actor_connections') \
+            .select('id, Source, Target') \
+            .gt('id', last_id) \
+            .order('id') \
+            .range(0, page_size - 1) \
+            .execute()
+        rows = response.data or []
+        if rows:
+            fetched += len(rows)
+            last_id = rows[-1]['id']
+            yield (np.fromiter((r['Source'] for r in rows), dtype=np.int64, count=len(rows)),
+                   np.fromiter((r['Target'] for r in rows), dtype=np.int64, count=len(rows)))
+            print(f'\rScanned {fetched:,} connection rows...', end='', flush=True)
+        if len(rows) < page_size:
+            print()
+            return
+
+
+# ---------------------------------------------------------------------------
+# Build: spool sorted runs, then merge into CSR files
+# ---------------------------------------------------------------------------
+
+def _fold_sorted(keys: np.ndarray, previous: int = -1) -> np.ndarray:
+    """Drop repeats from sorted keys (and a leading `previous`); np.unique re-sorts and is far slower."""
+    if not len(keys):
+        return keys
+    keep = np.empty(len(keys), dtype=bool)
+    keep[0] = keys[0] != previous
+    np.not_equal(keys[1:], keys[:-1], out=keep[1:])
+    return keys[keep]
+
+
+class EdgeSpool:
+    """
+    Collects edges as sorted on-disk runs of half-edge keys.
+
+    Keys are `source << 32 | target` over dense indices, so sorting them
+    orders half-edges by source and then target, which is CSR order.
+    """
+
+    def __init__(self, ids: np.ndarray, run_dir: Path, run_half_edges: int = RUN_HALF_EDGES):
+        self.index = GraphCore(ids, np.zeros(len(ids) + 1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+        self.run_dir = run_dir
+        self.run_half_edges = run_half_edges
+        self.runs: list[Path] = []
+        self.buffer: list[np.ndarray] = []
+        self.buffered = 0
+        self.rows_read = 0
+        self.rows_dropped = 0
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+    def add(self, source_ids: np.ndarray, target_ids: np.ndarray):
+        """Add a chunk of person_id edges; unknown endpoints and self-loops are dropped."""
+        self.rows_read += len(source_ids)
+        sources, found_s = self.index.lookup(source_ids)
+        targets, found_t = self.index.lookup(target_ids)
+        keep = found_s & found_t & (sources != targets)
+        self.rows_dropped += int(len(keep) - keep.sum())
+        sources = sources[keep].astype(np.int64)
+        targets = targets[keep].astype(np.int64)
+        self.buffer.append((sources << 32) | targets)
+        self.buffer.append((targets << 32) | sources)
+        self.buffered += 2 * len(sources)
+        if self.buffered >= self.run_half_edges:
+            self._flush_run()
+
+    def _flush_run(self):
+        if not self.buffered:
+            return
+        keys = _fold_sorted(np.sort(np.concatenate(self.buffer)))
+        self.buffer, self.buffered = [], 0
+        path = self.run_dir / f'run-{len(self.runs):05d}.i64'
+        keys.tofile(path)
+        self.runs.append(path)
+
+    def finish(self, directory: Path, merge_buffer_mb: float = MERGE_BUFFER_MB) -> dict:
+        """
+        Merge the runs into offsets / neighbors / edges files in `directory`.
+
+        Each step reads up to a block of keys from every run, takes the keys
+        up to the smallest block end (everything at or below it is now in
+        memory, since runs are sorted), sorts and folds them, and appends
+        them to the output files.
+
+        Returns:
+            Merge stats (runs, half_edges, edges)
+        """
+        self._flush_run()
+        n = self.index.num_nodes
+        runs = [np.memmap(p, dtype=np.int64, mode='r') for p in self.runs]
+        block = max(65_536, int(merge_buffer_mb * 1024 * 1024) // (8 * max(1, len(runs))))
+        pos = [0] * len(runs)
+        degrees = np.zeros(n, dtype=np.int64)
+        last_key = -1
+        half_edges = edges = 0
+
+        with open(directory / 'neighbors.i32', 'wb') as neighbors_file, \
+                open(directory / 'edges.i32', 'wb') as edges_file:
+            while True:
+                active = [r for r in range(len(runs)) if pos[r] < len(runs[r])]
+                if not active:
+                    break
+                bound = min(runs[r][min(pos[r] + block, len(runs[r])) - 1] for r in active)
+                parts = []
+                for r in active:
+                    window = runs[r][pos[r]:pos[r] + block]
+                    take = int(np.searchsorted(window, bound, side='right'))
+                    parts.append(window[:take])
+                    pos[r] += take
+                keys = _fold_sorted(np.sort(np.concatenate(parts)), last_key)
+                if not len(keys):
+                    continue
+                last_key = int(keys[-1])
+
+                sources = (keys >> 32).astype(np.int32)
+                targets = (keys & 0xFFFFFFFF).astype(np.int32)
+                targets.tofile(neighbors_file)
+                degrees += np.bincount(sources, minlength=n)
+                lower = sources < targets
+                np.column_stack((sources[lower], targets[lower])).tofile(edges_file)
+                half_edges += len(keys)
+                edges += int(lower.sum())
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(degrees, out=offsets[1:])
+        offsets.tofile(directory / 'offsets.i64')
+        del runs
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+        return {'runs': len(self.runs), 'half_edges': half_edges, 'edges': edges}
+
+
+def build_store(
+    directory: Path,
+    ids: np.ndarray,
+    edge_chunks: Iterable[tuple[np.ndarray, np.ndarray]],
+    names: Optional[list[str]] = None,
+    source: str = '',
+    run_half_edges: int = RUN_HALF_EDGES,
+    renumber: str = DEFAULT_RENUMBER
+) -> EdgeStore:
+    """
+    Build an out-of-core store from actor IDs and streamed edge chunks.
+
+    Args:
+        directory: Store directory (created; existing files are replaced)
+        ids: person_ids; their order defines the dense index
+        edge_chunks: Iterable of (source_ids, target_ids) person_id arrays;
+            duplicates, reversed pairs, self-loops and unknown endpoints are fine
+        names: Optional actor names in the order of ids
+        source: Description of where the edges came from, for meta.json
+        run_half_edges: Half-edge keys per in-memory sorted run
+        renumber: Locality order for the dense index ('none', 'bfs' or
+            'rcm'; see renumber_store)
+
+    Returns:
+        The opened store
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    start_time = time.time()
+    ids = np.asarray(ids, dtype=np.int64)
+    ids.tofile(directory / 'ids.i64')
+    if names is not None:
+        with open(directory / 'names.txt', 'w', encoding='utf-8') as f:
+            f.writelines(name.replace('\n', ' ') + '\n' for name in names)
+
+    spool = EdgeSpool(ids, directory / 'runs', run_half_edges)
+    for source_ids, target_ids in edge_chunks:
+        spool.add(source_ids, target_ids)
+    spooled_at = time.time()
+    merge = spool.finish(directory)
+
+    meta = {
+        'actors': len(ids),
+        'edges': merge['edges'],
+        'source': source,
+        'rows_read': spool.rows_read,
+        'rows_dropped': spool.rows_dropped,
+        'runs': merge['runs'],
+        'spool_seconds': round(spooled_at - start_time, 2),
+        'merge_seconds': round(time.time() - spooled_at, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    with open(directory / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+    store = open_store(directory)
+    return renumber_store(store, renumber, run_half_edges) if renumber != 'none' else store
+
+
+def iter_store_edges(store: EdgeStore, chunk_edges: int = CHUNK_EDGES) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Stream a store's edges as person_id chunks."""
+    for start in range(0, len(store.edges), chunk_edges):
+        pairs = np.asarray(store.edges[start:start + chunk_edges])
+        yield store.core.ids[pairs[:, 0]], store.core.ids[pairs[:, 1]]
+
+
+def neighbor_gap(edges: np.ndarray, rank: Optional[np.ndarray] = None, chunk_edges: int = CHUNK_EDGES) -> float:
+    """Mean |i - j| over edges (after mapping through `rank`): how far apart neighbours are stored."""
+    total = 0
+    for start in range(0, len(edges), chunk_edges):
+        pairs = np.asarray(edges[start:start + chunk_edges]).astype(np.int64)
+        if rank is not None:
+            pairs = rank[pairs]
+        total += int(np.abs(pairs[:, 1] - pairs[:, 0]).sum())
+    return total / len(edges) if len(edges) else 0.0
+
+
+def renumber_store(store: EdgeStore, method: str = DEFAULT_RENUMBER, run_half_edges: int = RUN_HALF_EDGES) -> EdgeStore:
+    """
+    Rewrite a store with its dense index in locality order.
+
+    The order comes from GraphCore.locality_order over the mapped arrays,
+    and the store is rebuilt from its own edge file through the spool, so
+    this stays out of core.  ids.i64 and names.txt are permuted with it, so
+    person_ids (and results keyed by them) are unaffected; only dense-index
+    files such as step 4's distances follow the new order.  The store is
+    left as is when the new order does not shrink the mean neighbour gap.
+    """
+    start_time = time.time()
+    order = store.core.locality_order(method)
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    before, after = neighbor_gap(store.edges), neighbor_gap(store.edges, rank)
+    directory = store.directory
+
+    if after < before:
+        names = store.load_names() if (directory / 'names.txt').exists() else None
+        staging = directory / 'renumbered'
+        build_store(staging, store.core.ids[order], iter_store_edges(store),
+                    [names[i] for i in order] if names else None, store.meta['source'], run_half_edges, 'none')
+        for path in staging.iterdir():
+            if path.name != 'meta.json':
+                path.replace(directory / path.name)
+        shutil.rmtree(staging)
+
+    meta = dict(store.meta)
+    meta.update({
+        'renumber': method if after < before else 'none',
+        'renumber_seconds': round(time.time() - start_time, 2),
+        'mean_neighbor_gap': [round(before), round(min(before, after))],
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    })
+    with open(directory / 'meta.json', 'w') as f:
+        json.dump(meta, f, indent=2)
+    return open_store(directory)
+
+
+def open_store(directory: Path) -> EdgeStore:
+    """Memory-map a store built by build_store."""
+    directory = Path(directory)
+    with open(directory / 'meta.json') as f:
+        meta = json.load(f)
+    ids = np.fromfile(directory / 'ids.i64', dtype=np.int64)
+
+    def mapped(name: str, dtype, shape) -> np.ndarray:
+        # np.memmap cannot map an empty file
+        if not np.prod(shape):
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(directory / name, dtype=dtype, mode='r', shape=shape)
+
+    core = GraphCore(
+        ids,
+        mapped('offsets.i64', np.int64, (len(ids) + 1,)),
+        mapped('neighbors.i32', np.int32, (2 * meta['edges'],)),
+    )
+    return EdgeStore(directory, core, mapped('edges.i32', np.int32, (meta['edges'], 2)), meta)
+
+
+# ---------------------------------------------------------------------------
+# Chunked metrics and BFS
+# ---------------------------------------------------------------------------
+
+def chunked_metrics(edges: np.ndarray, xs: np.ndarray, ys: np.ndarray, chunk_edges: int = CHUNK_EDGES) -> Metrics:
+    """
+    Edge-length metrics (see calculate_metrics) over an (m, 2) edge array.
+
+    Reads `chunk_edges` edges at a time, so only the per-actor coordinate
+    arrays need to fit in memory.  Crossings are not computed.
+    """
+    total = 0.0
+    shortest, longest = np.inf, 0.0
+    for start in range(0, len(edges), chunk_edges):
+        pairs = np.asarray(edges[start:start + chunk_edges])
+        lengths = np.hypot(xs[pairs[:, 0]] - xs[pairs[:, 1]], ys[pairs[:, 0]] - ys[pairs[:, 1]])
+        total += float(lengths.sum())
+        shortest = min(shortest, float(lengths.min()))
+        longest = max(longest, float(lengths.max()))
+
+    if not len(edges):
+        return Metrics(edge_count=0, total_distance=0.0, avg_distance=0.0, min_distance=0.0, max_distance=0.0)
+    return Metrics(
+        edge_count=len(edges),
+        total_distance=total,
+        avg_distance=total / len(edges),
+        min_distance=shortest,
+        max_distance=longest,
+    )
+
+
+def bfs_levels_chunked(offsets: np.ndarray, neighbors: np.ndarray, source: int,
+                       chunk_edges: int = CHUNK_EDGES) -> np.ndarray:
+    """
+    Level-synchronous BFS over CSR arrays (typically memmaps), vectorized.
+
+    Each level's frontier is processed in slices whose neighbour lists total
+    about `chunk_edges` half-edges, so memory stays bounded on hub-heavy
+    levels.  Newly reached actors are marked in place (repeats are
+    harmless) and the next frontier is read back from `dist` in index
+    order, so CSR rows are fetched in file order; on a renumbered store
+    that keeps neighbouring rows together.  Same result as
+    centrality.bfs_levels.
+
+    Returns:
+        int32 hop counts by dense index, -1 if unreachable
+    """
+    dist = np.full(len(offsets) - 1, -1, dtype=np.int32)
+    dist[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    level = 0
+    while len(frontier):
+        level += 1
+        starts = np.asarray(offsets[frontier])
+        counts = np.asarray(offsets[frontier + 1]) - starts
+        reach = np.cumsum(counts)
+        i = 0
+        while i < len(frontier):
+            before = reach[i - 1] if i else 0
+            j = max(i + 1, int(np.searchsorted(reach, before + chunk_edges, side='right')))
+            adjacent = np.asarray(neighbors[expand_ranges(starts[i:j], counts[i:j])])
+            dist[adjacent[dist[adjacent] < 0]] = level
+            i = j
+        frontier = np.flatnonzero(dist == level)
+    return dist
+
+
+def degree_layout(core: GraphCore, spacing: float = DEFAULT_SPACING) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Step 2's degree ordering: (ordinals, xs, ys) with hubs on the innermost slots."""
+    order = np.argsort(-core.degrees.astype(np.int64), kind='stable')
+    ordinals = np.empty(core.num_nodes, dtype=np.int32)
+    ordinals[order] = np.arange(core.num_nodes, dtype=np.int32)
+    slot_x, slot_y = vogel_slots(core.num_nodes, spacing)
+    return ordinals, slot_x[ordinals], slot_y[ordinals]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Out-of-core graph store')
+    parser.add_argument('--store', type=Path, default=DEFAULT_STORE_DIR,
+                        help=f'Store directory (default {DEFAULT_STORE_DIR})')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    build = sub.add_parser('build', help='Build a store from streamed edges')
+    sources = build.add_mutually_exclusive_group(required=True)
+    sources.add_argument('--graph', type=Path, help='Graph JSON with actors and edges')
+    sources.add_argument('--edges', type=Path, help='CSV of source,target person_ids (needs --actors)')
+    sources.add_argument('--from-db', action='store_true', help='Top actors plus a scan of actor_connections')
+    build.add_argument('--actors', type=Path, help='CSV of person_id[,name] for --edges')
+    build.add_argument('--limit', type=int, default=None, help='Actors to fetch for --from-db')
+    build.add_argument('--run-edges', type=int, default=RUN_HALF_EDGES,
+                       help=f'Half-edges per sorted run (default {RUN_HALF_EDGES:,})')
+    build.add_argument('--renumber', choices=RENUMBER_METHODS, default=DEFAULT_RENUMBER,
+                       help=f'Dense-index locality order (default {DEFAULT_RENUMBER})')
+
+    sub.add_parser('metrics', help='Degree-ordering layout metrics, computed in chunks')
+
+    bfs = sub.add_parser('bfs', help='Chunked BFS from one actor')
+    bfs.add_argument('person_id', type=int)
+
+    args = parser.parse_args()
+    if args.command == 'build' and args.edges and not args.actors:
+        parser.error('--edges needs --actors')
+    return args
+
+
+def main():
+    args = parse_args()
+    start_time = time.time()
+
+    if args.command == 'build':
+        if args.graph:
+            with open(args.graph) as f:
+                data = json.load(f)
+            actors = data['actors']
+            ids = np.fromiter((a['person_id'] for a in actors), dtype=np.int64, count=len(actors))
+            names = [a['name'] for a in actors]
+            chunks, source = iter_json_edges(data['edges']), str(args.graph)
+        elif args.edges:
+            ids, names = read_actor_csv(args.actors)
+            chunks, source = iter_csv_edges(args.edges), str(args.edges)
+        else:
+            from supabase_io import fetch_top_actors, get_supabase_client
+            supabase = get_supabase_client()
+            actors = fetch_top_actors(supabase, args.limit)
+            ids = np.fromiter((a['person_id'] for a in actors), dtype=np.int64, count=len(actors))
+            names = [a['name'] for a in actors]
+            del actors
+            chunks, source = iter_db_edges(supabase), 'actor_connections'
+
+        print(f'Building store for {len(ids):,} actors in {args.store}...')
+        store = build_store(args.store, ids, chunks, names, source, args.run_edges, args.renumber)
+        meta = store.meta
+        print(f'{meta["actors"]:,} actors, {meta["edges"]:,} edges from {meta["rows_read"]:,} rows '
+              f'({meta["rows_dropped"]:,} dropped) in {meta["runs"]} runs')
+        print(f'Spool {meta["spool_seconds"]:.2f}s, merge {meta["merge_seconds"]:.2f}s')
+        if 'renumber' in meta:
+            before, after = meta['mean_neighbor_gap']
+            print(f'Renumbering ({args.renumber}) in {meta["renumber_seconds"]:.2f}s: '
+                  f'mean neighbour index gap {before:,} -> {after:,}'
+                  + ('' if meta['renumber'] != 'none' else ' (kept input order)'))
+
+    elif args.command == 'metrics':
+        store = open_store(args.store)
+        _, xs, ys = degree_layout(store.core)
+        metrics = chunked_metrics(store.edges, xs, ys)
+        print(f'{store.core.num_nodes:,} actors, {store.core.num_edges:,} edges (degree ordering)')
+        print(metrics)
+
+    elif args.command == 'bfs':
+        store = open_store(args.store)
+        levels = bfs_levels_chunked(store.core.offsets, store.core.neighbors, store.core.index_of(args.person_id))
+        reached = levels[levels > 0]
+        print(f'Reachable: {len(reached):,}   Unreachable: {int((levels < 0).sum()):,}')
+        if len(reached):
+            print(f'Avg distance: {reached.mean():.3f}   Max distance: {int(reached.max())}')
+
+    print(f'Time: {time.time() - start_time:.2f}s')
+    print(f'Peak RSS: {peak_rss_mb():.0f} MB')
+
+
+if __name__ == '__main__':
+    main()
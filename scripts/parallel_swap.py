@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Domain-decomposed parallel swap optimization.
+
+Splits the Vogel slots into angular/radial sectors and runs swap optimization
+on every sector concurrently, one worker process per sector.  Actor slots,
+positions and per-actor contributions live in shared-memory arrays, which
+workers read as numpy views, so they see each other's moves without copying
+the layout back and forth.
+
+Each round:
+- Slots are grouped into sectors (angular wedges x radial bands)
+- Actors sitting within one spacing of a sector edge are frozen
+- The parent refreshes every actor's contribution (sum of its edge lengths)
+- Workers swap the remaining actors within their own sector, evaluating each
+  proposal against the cached contributions as the serial path does
+- The parent re-measures the exact total distance and rolls the round back
+  if concurrent moves made it worse
+
+Sector boundaries rotate between rounds so actors frozen on an edge in one
+round are interior in the next, which lets swaps cross every sector over time.
+A rolled-back round is retried on the next, rotated partition; the run only
+stops after STALL_ROUNDS consecutive rounds that were rolled back or improved
+the total by less than MIN_ROUND_IMPROVEMENT.
+
+A worker only updates the cached contributions of its own sector's actors.
+Moves in other sectors can leave a cached value stale until the next
+refresh; the round rollback catches any swap that was accepted on a stale
+delta and made the total worse.
+"""
+
+import math
+import random
+import time
+from multiprocessing import Pool, RawArray
+from typing import Optional
+
+import numpy as np
+
+from graph_core import GraphCore
+from optimization_utils import GOLDEN_RATIO, DEFAULT_SPACING
+from run_controller import RunController
+
+# Configuration
+DEFAULT_ROUNDS = 50  # Upper bound on decomposition rounds
+DEFAULT_RADIAL_BANDS = 2  # Radial bands per angular wedge
+MIN_ROUND_IMPROVEMENT = 1e-4  # A round improving total by less than this fraction counts as stalled
+STALL_ROUNDS = 3  # Consecutive stalled or rolled-back rounds that end the run
+DEADLINE_CHECK_INTERVAL = 1000  # Worker iterations between wall-clock budget checks
+
+# Worker-global state (populated by _init_worker in each process)
+_slot_of = None
+_pos_x = None
+_pos_y = None
+_contrib = None
+_owner = None
+_offsets = None
+_neighbors = None
+
+
+def _init_worker(slot_of, pos_x, pos_y, contrib, owner, offsets, neighbors):
+    """Attach a worker process to the shared layout arrays (as numpy views)."""
+    global _slot_of, _pos_x, _pos_y, _contrib, _owner, _offsets, _neighbors
+    _slot_of = np.frombuffer(slot_of, dtype=np.int32)
+    _pos_x = np.frombuffer(pos_x, dtype=np.float64)
+    _pos_y = np.frombuffer(pos_y, dtype=np.float64)
+    _contrib = np.frombuffer(contrib, dtype=np.float64)
+    _owner = np.frombuffer(owner, dtype=np.int32)
+    _offsets = offsets.tolist()  # Scalar lookups are faster on a list
+    _neighbors = neighbors
+
+
+def _distances_from(neighbors: np.ndarray, x: float, y: float) -> np.ndarray:
+    """Distance from (x, y) to each of `neighbors` at its current position."""
+    return np.hypot(_pos_x[neighbors] - x, _pos_y[neighbors] - y)
+
+
+def _apply_swap(i: int, j: int, new_i: float, new_j: float, sector: int):
+    """
+    Swap actors i and j and update the cached contributions of their
+    neighbours in `sector` by the change in length of the edge to the
+    moved actor.  Neighbours owned by other sectors are left to the
+    parent's next refresh.
+    """
+    xi, yi, xj, yj = _pos_x[i], _pos_y[i], _pos_x[j], _pos_y[j]
+    for moved, old_x, old_y, new_x, new_y, other in ((i, xi, yi, xj, yj, j), (j, xj, yj, xi, yi, i)):
+        nb = _neighbors[_offsets[moved]:_offsets[moved + 1]]
+        own = (_owner[nb] == sector) & (nb != other)
+        if own.any():
+            nb = nb[own]
+            _contrib[nb] += _distances_from(nb, new_x, new_y) - _distances_from(nb, old_x, old_y)
+
+    _slot_of[i], _slot_of[j] = _slot_of[j], _slot_of[i]
+    _pos_x[i], _pos_x[j] = xj, xi
+    _pos_y[i], _pos_y[j] = yj, yi
+    _contrib[i] = new_i
+    _contrib[j] = new_j
+
+
+def _optimize_sector(task: tuple[int, list[int], int, int, int, Optional[float]]) -> tuple[int, int, float, float]:
+    """
+    Run swap optimization on the movable actors of a single sector.
+
+    Like the serial try_swap, only the two post-swap contributions are
+    evaluated; the current ones come from the shared cache.
+
+    Args:
+        task: (sector id, actor indices, random seed, max iterations,
+               stagnation threshold, wall-clock deadline or None)
+
+    Returns:
+        (iterations, swaps accepted, estimated delta, worker CPU seconds)
+    """
+    sector, members, seed, max_iterations, stagnation_threshold, deadline = task
+    if len(members) < 2:
+        return 0, 0, 0.0, 0.0
+
+    cpu_start = time.process_time()
+    rng = random.Random(seed)
+    iteration = 0
+    swaps_accepted = 0
+    stagnation_counter = 0
+    total_delta = 0.0
+
+    while stagnation_counter < stagnation_threshold and iteration < max_iterations:
+        iteration += 1
+        if deadline is not None and iteration % DEADLINE_CHECK_INTERVAL == 0 and time.time() >= deadline:
+            break
+        i, j = rng.sample(members, 2)
+
+        xi, yi = _pos_x[i], _pos_y[i]
+        xj, yj = _pos_x[j], _pos_y[j]
+        nb_i = _neighbors[_offsets[i]:_offsets[i + 1]]
+        nb_j = _neighbors[_offsets[j]:_offsets[j + 1]]
+
+        # j's term in i's sum is measured to j's current slot (length 0); if the
+        # two are adjacent, the edge keeps its length under the swap
+        new_i = float(_distances_from(nb_i, xj, yj).sum())
+        new_j = float(_distances_from(nb_j, xi, yi).sum())
+        if (nb_i == j).any():
+            length = math.hypot(xi - xj, yi - yj)
+            new_i += length
+            new_j += length
+        delta = new_i + new_j - _contrib[i] - _contrib[j]
+
+        if delta < -0.001:
+            _apply_swap(i, j, new_i, new_j, sector)
+            total_delta += delta
+            swaps_accepted += 1
+            stagnation_counter = 0
+        else:
+            stagnation_counter += 1
+
+    return iteration, swaps_accepted, total_delta, time.process_time() - cpu_start
+
+
+def assign_sectors(
+    slot_x: list[float],
+    slot_y: list[float],
+    wedges: int,
+    bands: int,
+    round_index: int,
+    spacing: float = DEFAULT_SPACING
+) -> tuple[list[int], list[bool]]:
+    """
+    Split slots into angular/radial sectors for one round.
+
+    Wedge boundaries rotate by a golden-ratio fraction of a wedge each round,
+    and radial band boundaries shift by half a band on alternate rounds.
+
+    Args:
+        slot_x, slot_y: Slot coordinates (index = ordinal)
+        wedges: Number of angular wedges
+        bands: Number of radial bands per wedge
+        round_index: Round number (drives boundary rotation)
+        spacing: Vogel spacing, used as the frozen margin around edges
+
+    Returns:
+        - Sector id per slot
+        - Boundary flag per slot (True = frozen this round)
+    """
+    num_slots = len(slot_x)
+    wedge_width = 2 * math.pi / wedges
+    angle_offset = (round_index / GOLDEN_RATIO % 1.0) * wedge_width
+    band_shift = 0.5 if bands > 1 and round_index % 2 else 0.0
+    band_size = num_slots / bands
+
+    sectors = []
+    boundary = []
+    for s in range(num_slots):
+        x, y = slot_x[s], slot_y[s]
+        radius = math.hypot(x, y)
+        angle = (math.atan2(y, x) + angle_offset) % (2 * math.pi)
+
+        wedge = min(int(angle / wedge_width), wedges - 1)
+        band = min(int((s + 1) / band_size + band_shift), bands)
+
+        # Distance from the slot to the nearest wedge edge, measured across the edge
+        edge_angle = min(angle - wedge * wedge_width, (wedge + 1) * wedge_width - angle)
+        near_wedge_edge = wedges > 1 and radius * math.sin(min(edge_angle, math.pi / 2)) < spacing
+
+        # Band edges are slot indices; Vogel radius grows with sqrt(index)
+        lower_edge = (band - band_shift) * band_size
+        upper_edge = (band + 1 - band_shift) * band_size
+        near_band_edge = (
+            (0 < lower_edge and abs(radius - spacing * math.sqrt(lower_edge)) < spacing)
+            or (upper_edge < num_slots and abs(spacing * math.sqrt(upper_edge) - radius) < spacing)
+        )
+
+        sectors.append(wedge * (bands + 1) + band)
+        boundary.append(near_wedge_edge or near_band_edge)
+
+    return sectors, boundary
+
+
+def run_parallel_swap_optimization(
+    actors: list[dict],
+    edges: list[tuple[int, int]],
+    initial_positions: dict[int, tuple[float, float]],
+    initial_ordinals: dict[int, int],
+    workers: int,
+    max_iterations: int,
+    stagnation_threshold: int,
+    seed: int,
+    rounds: int = DEFAULT_ROUNDS,
+    radial_bands: int = DEFAULT_RADIAL_BANDS,
+    controller: Optional[RunController] = None
+) -> tuple[dict[int, tuple[float, float]], dict[int, int], dict]:
+    """
+    Run sector-parallel swap optimization.
+
+    Args:
+        actors: List of actor dicts with person_id
+        edges: List of (actor_id_1, actor_id_2) tuples
+        initial_positions: Dict mapping actor_id to (x, y)
+        initial_ordinals: Dict mapping actor_id to ordinal
+        workers: Number of worker processes
+        max_iterations: Total swap proposals across all rounds and workers
+        stagnation_threshold: Consecutive non-improving proposals that end a sector
+        seed: Random seed
+        rounds: Maximum number of decomposition rounds
+        radial_bands: Radial bands per angular wedge
+        controller: Optional run controller, checked after every round
+
+    Returns:
+        - Final positions dict
+        - Final ordinals dict
+        - Stats dict with convergence information
+    """
+    actor_ids = [a['person_id'] for a in actors]
+    n = len(actor_ids)
+
+    # Slot coordinates come straight from the input layout (slot = ordinal)
+    num_slots = max(initial_ordinals.values()) + 1
+    slot_x = [0.0] * num_slots
+    slot_y = [0.0] * num_slots
+    for actor_id in actor_ids:
+        slot_x[initial_ordinals[actor_id]], slot_y[initial_ordinals[actor_id]] = initial_positions[actor_id]
+
+    # CSR adjacency over dense indices
+    core = GraphCore.from_edges(actor_ids, edges)
+    offsets, neighbors = core.offsets, core.neighbors
+
+    # Shared layout arrays (the parent uses numpy views of them too)
+    slot_of_raw = RawArray('i', [initial_ordinals[a] for a in actor_ids])
+    pos_x_raw = RawArray('d', [initial_positions[a][0] for a in actor_ids])
+    pos_y_raw = RawArray('d', [initial_positions[a][1] for a in actor_ids])
+    contrib_raw = RawArray('d', n)
+    owner_raw = RawArray('i', n)
+    slot_of = np.frombuffer(slot_of_raw, dtype=np.int32)
+    pos_x = np.frombuffer(pos_x_raw, dtype=np.float64)
+    pos_y = np.frombuffer(pos_y_raw, dtype=np.float64)
+    contrib = np.frombuffer(contrib_raw, dtype=np.float64)
+    owner = np.frombuffer(owner_raw, dtype=np.int32)
+
+    edge_index = core.edge_pairs()
+    sources, targets = edge_index[:, 0], edge_index[:, 1]
+
+    def measure_total() -> float:
+        """Exact total distance; also refreshes the contribution cache."""
+        lengths = np.hypot(pos_x[sources] - pos_x[targets], pos_y[sources] - pos_y[targets])
+        contrib[:] = (np.bincount(sources, weights=lengths, minlength=n)
+                      + np.bincount(targets, weights=lengths, minlength=n))
+        return float(lengths.sum())
+
+    total_distance = measure_total()
+    print(f'Initial total distance: {total_distance:,.2f}')
+
+    wedges = max(1, workers)
+    rng = random.Random(seed)
+    iterations_per_round = max(1, max_iterations // rounds)
+
+    iteration = 0
+    swaps_accepted = 0
+    rounds_run = 0
+    rounds_rolled_back = 0
+    stalled_rounds = 0
+    worker_seconds = 0.0
+    critical_path_seconds = 0.0
+    stopped_reason = 'max_rounds'
+    start_time = time.time()
+    if controller:
+        controller.start(total_distance)
+
+    with Pool(
+        processes=workers,
+        initializer=_init_worker,
+        initargs=(slot_of_raw, pos_x_raw, pos_y_raw, contrib_raw, owner_raw, offsets, neighbors)
+    ) as pool:
+        for round_index in range(rounds):
+            if iteration >= max_iterations:
+                stopped_reason = 'max_iterations'
+                break
+
+            round_start = time.process_time()
+            sectors, boundary = assign_sectors(slot_x, slot_y, wedges, radial_bands, round_index)
+
+            members: dict[int, list[int]] = {}
+            for i, s in enumerate(slot_of.tolist()):
+                if boundary[s]:
+                    owner[i] = -1
+                else:
+                    owner[i] = sectors[s]
+                    members.setdefault(sectors[s], []).append(i)
+
+            movable = sum(len(m) for m in members.values())
+            budget = min(iterations_per_round, max_iterations - iteration)
+            deadline = None
+            if controller and controller.budget_seconds is not None:
+                deadline = controller.start_time + controller.budget_seconds
+            tasks = [
+                (sector, m, rng.randrange(2 ** 31), max(1, budget * len(m) // movable), stagnation_threshold,
+                 deadline)
+                for sector, m in members.items() if len(m) >= 2
+            ]
+
+            snapshot = (slot_of.copy(), pos_x.copy(), pos_y.copy())
+            parent_seconds = time.process_time() - round_start
+            results = pool.map(_optimize_sector, tasks)
+            rounds_run += 1
+
+            round_iterations = sum(r[0] for r in results)
+            round_swaps = sum(r[1] for r in results)
+            iteration += round_iterations
+
+            round_start = time.process_time()
+            new_total = measure_total()
+            if new_total > total_distance:
+                # Concurrent moves on neighbouring sectors cancelled out: discard round
+                slot_of[:], pos_x[:], pos_y[:] = snapshot
+                rounds_rolled_back += 1
+                round_swaps = 0
+                new_total = measure_total()
+            else:
+                swaps_accepted += round_swaps
+
+            # Ideal wall time on `workers` cores: the parent's serial work plus
+            # the longer of the slowest sector and an even split of all sectors
+            task_seconds = [r[3] for r in results]
+            parent_seconds += time.process_time() - round_start
+            worker_seconds += sum(task_seconds)
+            critical_path_seconds += parent_seconds + max(max(task_seconds, default=0.0),
+                                                          sum(task_seconds) / workers)
+
+            improvement = (total_distance - new_total) / total_distance if total_distance else 0.0
+            total_distance = new_total
+
+            print(f'\rRound {rounds_run}: {swaps_accepted} swaps, '
+                  f'total distance: {total_distance:,.2f}', end='', flush=True)
+
+            # round_swaps is 0 after a rollback; the next round's partition is rotated
+            if round_swaps == 0 or improvement < MIN_ROUND_IMPROVEMENT:
+                stalled_rounds += 1
+                if stalled_rounds >= STALL_ROUNDS:
+                    stopped_reason = 'stagnation'
+                    break
+            else:
+                stalled_rounds = 0
+
+            if controller and controller.check(total_distance, evaluations=iteration):
+                stopped_reason = controller.stopped_reason
+                break
+
+    elapsed_time = time.time() - start_time
+    print()  # New line after progress
+    if critical_path_seconds:
+        print(f'Projected speedup on {workers} cores: {worker_seconds / critical_path_seconds:.2f}x '
+              f'(from per-sector CPU time, not measured wall-clock scaling)')
+
+    xs, ys, slots = pos_x.tolist(), pos_y.tolist(), slot_of.tolist()
+    positions = {actor_id: (xs[i], ys[i]) for i, actor_id in enumerate(actor_ids)}
+    ordinals = {actor_id: slots[i] for i, actor_id in enumerate(actor_ids)}
+
+    stats = {
+        'mode': 'parallel',
+        'workers': workers,
+        'rounds': rounds_run,
+        'rounds_rolled_back': rounds_rolled_back,
+        'iterations': iteration,
+        'swaps_accepted': swaps_accepted,
+        'stagnation_threshold': stagnation_threshold,
+        'elapsed_seconds': round(elapsed_time, 2),
+        'worker_cpu_seconds': round(worker_seconds, 2),
+        'critical_path_seconds': round(critical_path_seconds, 2),
+        'projected_speedup': round(worker_seconds / critical_path_seconds, 2) if critical_path_seconds else None,
+        'stopped_reason': stopped_reason,
+    }
+
+    return positions, ordinals, stats
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Budget-driven run controller for the optimization steps.
+
+Decides when a long-running step should stop:
+- Wall-clock budget (seconds)
+- Target improvement (% below the starting total)
+- Minimum improvement rate (% of the starting total per second, measured
+  over a trailing window) - stops once marginal gains dry up
+
+Steps call `check()` periodically with their current objective value and stop
+as soon as it returns a reason.  The reason is recorded in the step's stats.
+
+With `trace=True` the controller also keeps every (timestamp, evaluations,
+value) it is shown, which anytime_profile.py turns into quality-vs-time
+curves.  Tracing never changes when a run stops.
+"""
+
+import argparse
+import time
+from collections import deque
+from typing import Optional
+
+# Defaults
+DEFAULT_RATE_WINDOW = 10.0  # Seconds of history used to measure improvement rate
+DEFAULT_CHECK_INTERVAL = 1000  # Iterations between controller checks in tight loops
+
+
+class RunController:
+    """Tracks elapsed time and objective progress against stopping criteria."""
+
+    def __init__(
+        self,
+        budget_seconds: Optional[float] = None,
+        target_improvement_pct: Optional[float] = None,
+        min_rate_per_second: Optional[float] = None,
+        rate_window_seconds: float = DEFAULT_RATE_WINDOW,
+        trace: bool = False
+    ):
+        """
+        Args:
+            budget_seconds: Stop after this much wall-clock time
+            target_improvement_pct: Stop once the objective is this % below its start
+            min_rate_per_second: Stop once improvement over the trailing window
+                falls below this % of the starting objective per second
+            rate_window_seconds: Length of the trailing window for the rate cutoff
+            trace: Record every start/check as (timestamp, evaluations, value)
+                in `self.trace`, kept across restarts (e.g. nested tiers)
+        """
+        self.budget_seconds = budget_seconds
+        self.target_improvement_pct = target_improvement_pct
+        self.min_rate_per_second = min_rate_per_second
+        self.rate_window_seconds = rate_window_seconds
+
+        self.start_time = None
+        self.initial_value = None
+        self.stopped_reason = None
+        self._history = deque()
+        self.trace = [] if trace else None
+
+    def start(self, initial_value: float = 0.0):
+        """Start the clock and record the starting objective value."""
+        self.start_time = time.time()
+        self.initial_value = initial_value
+        self.stopped_reason = None
+        self._history = deque([(self.start_time, initial_value)])
+        if self.trace is not None:
+            self.trace.append((self.start_time, 0, initial_value))
+
+    @property
+    def elapsed(self) -> float:
+        return time.time() - self.start_time if self.start_time is not None else 0.0
+
+    def improvement_pct(self, value: float) -> float:
+        """Improvement of `value` over the starting objective, in percent."""
+        if not self.initial_value:
+            return 0.0
+        return (self.initial_value - value) / self.initial_value * 100
+
+    def budget_exhausted(self) -> bool:
+        """True once the wall-clock budget has run out."""
+        if self.budget_seconds is not None and self.elapsed >= self.budget_seconds:
+            self.stopped_reason = 'budget'
+            return True
+        return False
+
+    def check(self, value: float, evaluations: int = 0) -> Optional[str]:
+        """
+        Record the current objective value and test every stopping criterion.
+
+        Args:
+            value: Current objective (total distance)
+            evaluations: Work done since start() in the optimizer's own unit
+                (move evaluations, proposals, windows); only used for the trace
+
+        Returns:
+            Stop reason ('budget', 'target_improvement', 'min_rate') or None
+        """
+        now = time.time()
+        if self.trace is not None:
+            self.trace.append((now, evaluations, value))
+
+        if self.budget_exhausted():
+            return self.stopped_reason
+
+        if (self.target_improvement_pct is not None
+                and self.improvement_pct(value) >= self.target_improvement_pct):
+            self.stopped_reason = 'target_improvement'
+            return self.stopped_reason
+
+        if self.min_rate_per_second is not None and self.initial_value:
+            self._history.append((now, value))
+            # Keep one sample at or before the window start as the reference point
+            while len(self._history) > 2 and self._history[1][0] <= now - self.rate_window_seconds:
+                self._history.popleft()
+
+            ref_time, ref_value = self._history[0]
+            window = now - ref_time
+            if window >= self.rate_window_seconds:
+                rate = (ref_value - value) / self.initial_value * 100 / window
+                if rate < self.min_rate_per_second:
+                    self.stopped_reason = 'min_rate'
+                    return self.stopped_reason
+
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            'budget_seconds': self.budget_seconds,
+            'target_improvement_pct': self.target_improvement_pct,
+            'min_rate_per_second': self.min_rate_per_second,
+            'rate_window_seconds': self.rate_window_seconds,
+        }
+
+
+def add_controller_arguments(parser: argparse.ArgumentParser, objective: bool = True):
+    """
+    Add the shared run-controller options to a step's CLI.
+
+    Args:
+        parser: The step's argument parser
+        objective: Whether the step has an objective to improve (adds the
+            target and rate cutoffs); otherwise only --budget is offered
+    """
+    group = parser.add_argument_group('run controller')
+    group.add_argument('--budget', type=float, default=None, metavar='SECONDS',
+                       help='Wall-clock budget; stop when it runs out')
+    if not objective:
+        return
+    group.add_argument('--target-improvement', type=float, default=None, metavar='PCT',
+                       help='Stop once total distance is this %% below the starting total')
+    group.add_argument('--min-rate', type=float, default=None, metavar='PCT_PER_SEC',
+                       help='Stop once improvement falls below this %% of the starting total per second')
+    group.add_argument('--rate-window', type=float, default=DEFAULT_RATE_WINDOW, metavar='SECONDS',
+                       help=f'Trailing window for --min-rate (default {DEFAULT_RATE_WINDOW:g}s)')
+
+
+def controller_from_args(args: argparse.Namespace, trace: bool = False) -> RunController:
+    """Build a RunController from parsed CLI arguments."""
+    return RunController(
+        budget_seconds=args.budget,
+        target_improvement_pct=getattr(args, 'target_improvement', None),
+        min_rate_per_second=getattr(args, 'min_rate', None),
+        rate_window_seconds=getattr(args, 'rate_window', DEFAULT_RATE_WINDOW),
+        trace=trace,
+    )
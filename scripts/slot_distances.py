@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Precomputed slot-to-slot distance table.
+
+Swap deltas only ever measure distances between two Vogel slots, so for
+graphs up to a few thousand actors every distance can be computed once:
+an N x N float32 matrix (4 * N^2 bytes; 16 MB for 2000 slots) turns each
+edge length in the swap loop into an index lookup instead of a hypot.
+
+Tables are cached on disk under optimization_outputs/cache/, keyed by
+(N, spacing), and memory-mapped read-only, so later runs (and the nested
+tiers of one run) skip the build.  Tables over the memory budget are not
+built; callers fall back to computing distances on the fly.
+
+Usage:
+    python scripts/slot_distances.py 2000
+"""
+
+import math
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from optimization_utils import DEFAULT_SPACING, GOLDEN_ANGLE, OUTPUT_DIR
+
+# Configuration
+TABLE_BUDGET_MB = 256  # Largest table used (~8,000 slots); 0 disables the table
+CACHE_DIR = OUTPUT_DIR / 'cache'
+BUILD_CHUNK_ROWS = 512  # Rows computed per block while building
+POSITION_TOLERANCE = 1e-6  # Max coordinate error for positions to count as on their slots
+
+
+def table_bytes(num_slots: int) -> int:
+    """Size of the float32 table for num_slots slots."""
+    return 4 * num_slots * num_slots
+
+
+def table_path(num_slots: int, spacing: float = DEFAULT_SPACING, cache_dir: Path = CACHE_DIR) -> Path:
+    """Cache file for a (num_slots, spacing) table."""
+    return cache_dir / f'slot-distances-{num_slots}-{spacing:g}.f32'
+
+
+def vogel_slots(num_slots: int, spacing: float = DEFAULT_SPACING) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized calculate_vogel_position for slots 0..num_slots-1."""
+    index = np.arange(num_slots, dtype=np.float64)
+    radius = spacing * np.sqrt(index + 1)
+    theta = np.radians(index * GOLDEN_ANGLE)
+    return radius * np.cos(theta), radius * np.sin(theta)
+
+
+def build_table(num_slots: int, spacing: float, path: Path):
+    """
+    Write the distance table to `path`, a block of rows at a time.
+
+    The table is written to a temporary file and renamed into place, so an
+    interrupted build never leaves a truncated table behind.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.tmp{os.getpid()}')
+    x, y = vogel_slots(num_slots, spacing)
+    table = np.memmap(tmp_path, dtype=np.float32, mode='w+', shape=(num_slots, num_slots))
+    for start in range(0, num_slots, BUILD_CHUNK_ROWS):
+        stop = min(start + BUILD_CHUNK_ROWS, num_slots)
+        table[start:stop] = np.hypot(x[start:stop, None] - x[None, :], y[start:stop, None] - y[None, :])
+    table.flush()
+    del table
+    os.replace(tmp_path, path)
+
+
+def load_slot_distance_table(
+    num_slots: int,
+    spacing: float = DEFAULT_SPACING,
+    budget_mb: float = TABLE_BUDGET_MB,
+    cache_dir: Path = CACHE_DIR
+) -> Optional[np.memmap]:
+    """
+    Memory-map the distance table for num_slots slots, building it if needed.
+
+    Args:
+        num_slots: Number of Vogel slots (slots 0..num_slots-1)
+        spacing: Vogel spacing the slots were laid out with
+        budget_mb: Largest table to use, in megabytes
+        cache_dir: Directory holding cached tables
+
+    Returns:
+        Read-only (num_slots, num_slots) float32 memmap, or None if the
+        table does not fit the budget
+    """
+    if num_slots < 1 or table_bytes(num_slots) > budget_mb * 1024 * 1024:
+        return None
+    path = table_path(num_slots, spacing, cache_dir)
+    if not path.exists() or path.stat().st_size != table_bytes(num_slots):
+        start_time = time.time()
+        build_table(num_slots, spacing, path)
+        print(f'Built slot distance table ({num_slots} slots, '
+              f'{table_bytes(num_slots) / 1e6:.1f} MB) in {time.time() - start_time:.2f}s')
+    return np.memmap(path, dtype=np.float32, mode='r', shape=(num_slots, num_slots))
+
+
+def positions_on_slots(
+    xs: list[float],
+    ys: list[float],
+    slots: list[int],
+    spacing: float = DEFAULT_SPACING
+) -> bool:
+    """Check that every actor sits exactly on the Vogel position of its slot."""
+    if not slots:
+        return True
+    slot_x, slot_y = vogel_slots(max(slots) + 1, spacing)
+    index = np.asarray(slots)
+    scale = spacing * math.sqrt(len(slot_x))
+    return bool(
+        np.all(np.abs(slot_x[index] - np.asarray(xs)) <= POSITION_TOLERANCE * scale)
+        and np.all(np.abs(slot_y[index] - np.asarray(ys)) <= POSITION_TOLERANCE * scale)
+    )
+
+
+def flat_view(table: np.memmap) -> memoryview:
+    """
+    Flat float32 view of a table: entry (s, t) is view[s * N + t].
+
+    Indexing a memoryview returns a plain Python float and is several times
+    cheaper than indexing the array, which matters in the swap loop.
+    """
+    return memoryview(table).cast('B').cast('f')
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    table = load_slot_distance_table(size)
+    if table is None:
+        print(f'{size} slots ({table_bytes(size) / 1e6:.1f} MB) exceeds the {TABLE_BUDGET_MB} MB budget')
+    else:
+        print(f'{table_path(size)}: {table.shape[0]} x {table.shape[1]} float32')
@@ -0,0 +1,57 @@
+-- Versioned actor positions written by 05-publish-positions.py.
+--
+-- Every publish allocates a new layout version and inserts rows only for
+-- actors whose slot or position changed (or that left the layout, as
+-- `removed` tombstones).  The version is flipped to 'published' only after
+-- all of its rows are written, and readers resolve each actor's latest row
+-- among published versions only, so a half-written (or abandoned) version is
+-- never visible.
+--
+-- Positions live here rather than in columns on `actors`, whose in-place
+-- updates would be visible batch by batch and only hold one graph size.
+-- Readers should call published_actor_positions(graph_limit) instead.
+
+create table if not exists layout_versions (
+  graph_limit integer not null,
+  version integer not null,
+  tag text,
+  status text not null default 'writing',  -- 'writing' | 'published'
+  changed_rows integer,
+  created_at timestamptz not null default now(),
+  published_at timestamptz,
+  primary key (graph_limit, version)
+);
+
+create table if not exists actor_positions (
+  graph_limit integer not null,
+  person_id bigint not null,
+  version integer not null,
+  ordinal integer,
+  x double precision,
+  y double precision,
+  removed boolean not null default false,
+  primary key (graph_limit, person_id, version)
+);
+
+-- Layout as of the newest published version, ordered for stable pagination.
+-- Rows of versions still 'writing' (or abandoned mid-publish) are ignored.
+create or replace function published_actor_positions(p_graph_limit integer)
+returns table (person_id bigint, ordinal integer, x double precision, y double precision, version integer)
+language sql
+stable
+as $$
+  select latest.person_id, latest.ordinal, latest.x, latest.y, latest.version
+  from (
+    select distinct on (p.person_id) p.*
+    from actor_positions p
+    where p.graph_limit = p_graph_limit
+      and p.version in (
+        select v.version
+        from layout_versions v
+        where v.graph_limit = p_graph_limit and v.status = 'published'
+      )
+    order by p.person_id, p.version desc
+  ) latest
+  where not latest.removed
+  order by latest.person_id;
+$$;
@@ -0,0 +1,35 @@
+-- Distinct connections between a set of actors, each pair exactly once.
+--
+-- Used by fetch_induced_connections() in supabase_io.py.  Returning
+-- only pairs with both endpoints in the set (and folding pairs repeated across
+-- movies or stored in both directions) keeps the transfer to the size of the
+-- final edge list.  Results are ordered by (Source, Target) and paged by key:
+-- pass the last pair of the previous page as after_source / after_target, so
+-- each page starts where the last one ended instead of at a row offset.
+
+-- Replaces the earlier single-argument version
+drop function if exists induced_actor_connections(bigint[]);
+
+create or replace function induced_actor_connections(
+  actor_ids bigint[],
+  after_source bigint default null,
+  after_target bigint default null,
+  page_limit integer default 1000
+)
+returns table ("Source" bigint, "Target" bigint)
+language sql
+stable
+as $$
+  select distinct
+    least(c."Source", c."Target") as "Source",
+    greatest(c."Source", c."Target") as "Target"
+  from actor_connections c
+  where c."Source" = any(actor_ids)
+    and c."Target" = any(actor_ids)
+    and c."Source" <> c."Target"
+    and (after_source is null
+         or (least(c."Source", c."Target"), greatest(c."Source", c."Target"))
+            > (after_source, after_target))
+  order by 1, 2
+  limit page_limit;
+$$;
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Content-addressed memoization for the pipeline stages.
+
+Each stage fingerprints everything its output depends on:
+
+- Input content: the graph snapshot (steps 1-2) or the actors/edges/layout
+  of the previous step's output (step 3), hashed by content, so a rerun of
+  step 2 that produces the same layout still lets step 3 hit
+- Config: the stage's CLI options and constants
+- Code version: a hash of the stage script plus the shared modules
+  (every non-step `scripts/*.py`)
+
+Outputs are kept in a local artifact store under
+optimization_outputs/artifacts/, one directory per fingerprint.  On a hit,
+the stage copies its cached files back into optimization_outputs/ and
+stops.  The fetched graph itself is a snapshot artifact per graph size,
+reused until it is older than SNAPSHOT_MAX_AGE_HOURS (or --refresh), so
+iterating on one stage no longer refetches from Supabase.
+
+Hits update the artifact's last-used time; `prune` evicts least recently
+used artifacts down to a size cap and/or drops those unused for N days.
+
+Usage:
+    python scripts/stage_cache.py list
+    python scripts/stage_cache.py prune --max-mb 500
+    python scripts/stage_cache.py prune --max-age-days 30
+    python scripts/stage_cache.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+from optimization_utils import OUTPUT_DIR, SCRIPT_DIR
+
+# Configuration
+ARTIFACT_DIR = OUTPUT_DIR / 'artifacts'
+SNAPSHOT_MAX_AGE_HOURS = 24  # Refetch the graph once its snapshot is older than this
+DEFAULT_MAX_MB = 1024  # Size cap used by `prune` when none is given
+SNAPSHOT_FILE = 'graph.json'
+
+
+def content_hash(data) -> str:
+    """SHA-256 of a JSON-serializable value in canonical form."""
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def code_version(stage_script: Path) -> str:
+    """Hash of a stage script and the shared modules it may import."""
+    digest = hashlib.sha256()
+    shared = sorted(p for p in SCRIPT_DIR.glob('*.py') if not p.name[0].isdigit())
+    for path in [Path(stage_script)] + shared:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def stage_fingerprint(stage: str, inputs: str, config: dict, stage_script: Path) -> str:
+    """Fingerprint of one stage run: stage name, input hash, config and code version."""
+    return content_hash({
+        'stage': stage,
+        'inputs': inputs,
+        'config': config,
+        'code': code_version(stage_script),
+    })
+
+
+class ArtifactStore:
+    """
+    Directory of artifacts keyed by fingerprint.
+
+    Each artifact is `root/<fp[:2]>/<fp>/` holding the cached files plus a
+    meta.json (stage, created, last_used, size, description).  Artifacts are
+    written to a temporary directory and renamed into place, so a crash
+    never leaves a partial artifact behind.
+    """
+
+    def __init__(self, root: Path = ARTIFACT_DIR):
+        self.root = Path(root)
+
+    def path(self, fingerprint: str) -> Path:
+        return self.root / fingerprint[:2] / fingerprint
+
+    def get(self, fingerprint: str) -> Optional[Path]:
+        """Artifact directory for a fingerprint (marking it used), or None on a miss."""
+        path = self.path(fingerprint)
+        meta_path = path / 'meta.json'
+        if not meta_path.exists():
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta['last_used'] = time.time()
+        meta['hits'] = meta.get('hits', 0) + 1
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f, indent=2)
+        return path
+
+    def put(self, fingerprint: str, stage: str, files: Iterable[Path], info: Optional[dict] = None) -> Path:
+        """Copy files into a new artifact (replacing any existing one)."""
+        path = self.path(fingerprint)
+        tmp = path.with_name(f'{fingerprint}.tmp{os.getpid()}')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        size = 0
+        names = []
+        for source in files:
+            source = Path(source)
+            shutil.copy2(source, tmp / source.name)
+            size += source.stat().st_size
+            names.append(source.name)
+        now = time.time()
+        meta = {
+            'stage': stage,
+            'fingerprint': fingerprint,
+            'files': names,
+            'size_bytes': size,
+            'created': now,
+            'last_used': now,
+            'hits': 0,
+            'info': info or {},
+        }
+        with open(tmp / 'meta.json', 'w') as f:
+            json.dump(meta, f, indent=2)
+        shutil.rmtree(path, ignore_errors=True)
+        tmp.rename(path)
+        return path
+
+    def restore(self, path: Path, destination: Path = OUTPUT_DIR) -> list[Path]:
+        """Copy an artifact's files into `destination`; returns the restored paths."""
+        with open(path / 'meta.json') as f:
+            names = json.load(f)['files']
+        destination.mkdir(parents=True, exist_ok=True)
+        restored = []
+        for name in names:
+            shutil.copy2(path / name, destination / name)
+            restored.append(destination / name)
+        return restored
+
+    def entries(self) -> list[dict]:
+        """meta.json of every artifact, least recently used first."""
+        entries = []
+        for meta_path in self.root.glob('??/*/meta.json'):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            meta['path'] = meta_path.parent
+            entries.append(meta)
+        return sorted(entries, key=lambda m: m['last_used'])
+
+    def prune(self, max_mb: Optional[float] = None, max_age_days: Optional[float] = None) -> tuple[int, int]:
+        """
+        Evict artifacts unused for max_age_days, then least recently used
+        ones until the store fits max_mb.
+
+        Returns:
+            (artifacts removed, bytes freed)
+        """
+        entries = self.entries()
+        total = sum(m['size_bytes'] for m in entries)
+        cutoff = time.time() - max_age_days * 86400 if max_age_days is not None else None
+        removed = freed = 0
+        for meta in entries:
+            too_old = cutoff is not None and meta['last_used'] < cutoff
+            too_big = max_mb is not None and total > max_mb * 1024 * 1024
+            if not (too_old or too_big):
+                continue
+            shutil.rmtree(meta['path'], ignore_errors=True)
+            total -= meta['size_bytes']
+            freed += meta['size_bytes']
+            removed += 1
+        return removed, freed
+
+
+# ---------------------------------------------------------------------------
+# Graph snapshots
+# ---------------------------------------------------------------------------
+
+def load_graph_snapshot(
+    limit: int,
+    refresh: bool = False,
+    max_age_hours: float = SNAPSHOT_MAX_AGE_HOURS,
+    store: Optional[ArtifactStore] = None
+) -> tuple[list[dict], list[tuple[int, int]], str]:
+    """
+    Top `limit` actors and their deduplicated edges, fetched at most once
+    per max_age_hours.
+
+    The fetch result is stored as an artifact keyed by its content hash,
+    and a per-size pointer (artifacts/snapshots/<limit>.json) records the
+    latest one.
+
+    Returns:
+        (actors, edges, snapshot hash)
+    """
+    store = store or ArtifactStore()
+    pointer_path = store.root / 'snapshots' / f'{limit}.json'
+    if not refresh and pointer_path.exists():
+        with open(pointer_path) as f:
+            pointer = json.load(f)
+        age_hours = (time.time() - pointer['fetched_at']) / 3600
+        path = store.get(pointer['fingerprint']) if age_hours < max_age_hours else None
+        if path is not None:
+            with open(path / SNAPSHOT_FILE) as f:
+                graph = json.load(f)
+            print(f"Using graph snapshot {pointer['fingerprint'][:12]} "
+                  f"({len(graph['actors'])} actors, {len(graph['edges'])} edges, fetched {age_hours:.1f}h ago)")
+            return graph['actors'], [tuple(e) for e in graph['edges']], pointer['fingerprint']
+
+    from optimization_utils import deduplicate_edges
+    from supabase_io import fetch_induced_connections, fetch_top_actors, get_supabase_client
+    supabase = get_supabase_client()
+    actors = fetch_top_actors(supabase, limit)
+    actor_ids = [a['person_id'] for a in actors]
+    connections = fetch_induced_connections(supabase, actor_ids)
+    edges = deduplicate_edges(connections, set(actor_ids))
+
+    graph = {'actors': actors, 'edges': [list(e) for e in edges]}
+    fingerprint = content_hash(graph)
+    store.root.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=store.root) as tmp:
+        staged = Path(tmp) / SNAPSHOT_FILE
+        with open(staged, 'w') as f:
+            json.dump(graph, f)
+        store.put(fingerprint, 'snapshot', [staged], {'limit': limit})
+
+    pointer_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(pointer_path, 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'fetched_at': time.time()}, f)
+    print(f'Stored graph snapshot {fingerprint[:12]}')
+    return actors, edges, fingerprint
+
+
+# ---------------------------------------------------------------------------
+# Stage helpers
+# ---------------------------------------------------------------------------
+
+def add_cache_arguments(parser: argparse.ArgumentParser, snapshot: bool = True):
+    """
+    Add the shared memoization options to a step's CLI.
+
+    Args:
+        parser: The step's argument parser
+        snapshot: Whether the step reads the graph snapshot (adds --refresh)
+    """
+    group = parser.add_argument_group('stage cache')
+    group.add_argument('--no-cache', action='store_true',
+                       help='Recompute even if a cached output matches (the result is still stored)')
+    if snapshot:
+        group.add_argument('--refresh', action='store_true',
+                           help='Refetch the graph instead of reusing the snapshot')
+
+
+def restore_cached_stage(fingerprint: str, stage: str, no_cache: bool = False,
+                         store: Optional[ArtifactStore] = None) -> Optional[dict]:
+    """
+    On a hit, restore the stage's cached files and return its step output.
+
+    Returns:
+        The cached step output, or None on a miss (or with no_cache)
+    """
+    if no_cache:
+        return None
+    store = store or ArtifactStore()
+    path = store.get(fingerprint)
+    if path is None:
+        return None
+    restored = store.restore(path)
+    print(f'Cache hit for {stage} ({fingerprint[:12]}): restored '
+          f'{", ".join(p.name for p in restored)}')
+    with open(OUTPUT_DIR / f'{stage}.json') as f:
+        return json.load(f)
+
+
+def store_stage(fingerprint: str, stage: str, files: Iterable[Path], info: Optional[dict] = None,
+                store: Optional[ArtifactStore] = None):
+    """Store a finished stage's output files under its fingerprint."""
+    store = store or ArtifactStore()
+    store.put(fingerprint, stage, files, info)
+    print(f'Cached {stage} as {fingerprint[:12]}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stage artifact store')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help='List artifacts, least recently used first')
+    prune = sub.add_parser('prune', help='Evict artifacts by age and/or LRU down to a size cap')
+    prune.add_argument('--max-mb', type=float, default=None,
+                       help=f'Size cap in MB (default {DEFAULT_MAX_MB} when --max-age-days is not given)')
+    prune.add_argument('--max-age-days', type=float, default=None,
+                       help='Evict artifacts not used for this many days')
+    sub.add_parser('clear', help='Remove every artifact and snapshot pointer')
+    args = parser.parse_args()
+
+    store = ArtifactStore()
+    if args.command == 'list':
+        entries = store.entries()
+        for meta in entries:
+            last_used = datetime.fromtimestamp(meta['last_used']).strftime('%Y-%m-%d %H:%M')
+            print(f"{meta['fingerprint'][:12]}  {meta['stage']:<24} {meta['size_bytes'] / 1e6:>8.1f} MB  "
+                  f"hits {meta['hits']:>3}  last used {last_used}")
+        total = sum(m['size_bytes'] for m in entries)
+        print(f'{len(entries)} artifacts, {total / 1e6:.1f} MB')
+    elif args.command == 'prune':
+        max_mb = args.max_mb
+        if max_mb is None and args.max_age_days is None:
+            max_mb = DEFAULT_MAX_MB
+        removed, freed = store.prune(max_mb, args.max_age_days)
+        print(f'Removed {removed} artifacts ({freed / 1e6:.1f} MB)')
+    elif args.command == 'clear':
+        shutil.rmtree(store.root, ignore_errors=True)
+        print(f'Removed {store.root}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check for the offline modules.
+
+Imports each offline module (and the offline steps) in a fresh interpreter
+with every VITE_* / SUPABASE_* variable removed, and fails if:
+
+- the import raises (e.g. a module reads Supabase config at import time)
+- `supabase` or `dotenv` ends up in sys.modules
+- the module's own import time exceeds the budget
+
+numpy is imported (and timed) first in each interpreter and excluded from
+the budget: every numeric step pays it regardless, and it is not ours to
+trim.  Each module is imported RUNS times and the fastest run counts.
+
+Usage:
+    python scripts/startup_check.py
+    python scripts/startup_check.py --budget-ms 50 --runs 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BUDGET_MS = 100  # Own import time allowed per module (excluding numpy)
+RUNS = 3  # Fresh interpreters per module; the fastest counts
+FORBIDDEN_MODULES = ('supabase', 'dotenv')  # Network client and .env loader
+OFFLINE_MODULES = [
+    'optimization_utils',
+    'graph_core',
+    'run_controller',
+    'slot_distances',
+    'stage_cache',
+    'out_of_core',
+    'distance_oracle',
+    '03-swap-optimization',
+    '04-shortest-paths',
+    '06-overview-tiles',
+]
+
+# Runs in the child interpreter; step scripts are loaded by path (hyphenated names)
+_PROBE = '''
+import importlib, importlib.util, json, sys, time
+name = sys.argv[1]
+start = time.perf_counter()
+import numpy
+numpy_ms = (time.perf_counter() - start) * 1000
+start = time.perf_counter()
+if name[0].isdigit():
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), name + '.py')
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+else:
+    importlib.import_module(name)
+own_ms = (time.perf_counter() - start) * 1000
+print(json.dumps({
+    'numpy_ms': numpy_ms,
+    'own_ms': own_ms,
+    'forbidden': [m for m in %r if m in sys.modules],
+}))
+''' % (FORBIDDEN_MODULES,)
+
+
+def offline_env() -> dict:
+    """The current environment without any Supabase or graph configuration."""
+    return {k: v for k, v in os.environ.items() if not k.startswith(('VITE_', 'SUPABASE_'))}
+
+
+def probe(name: str, env: dict) -> dict:
+    """Import one module in a fresh interpreter and report its timings."""
+    result = subprocess.run(
+        [sys.executable, '-c', _PROBE, name],
+        cwd=SCRIPT_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        return {'error': error[-1] if error else f'exit code {result.returncode}'}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Check offline import times against a budget')
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS,
+                        help=f'Own import time allowed per module (default {BUDGET_MS})')
+    parser.add_argument('--runs', type=int, default=RUNS,
+                        help=f'Fresh interpreters per module; the fastest counts (default {RUNS})')
+    parser.add_argument('modules', nargs='*', default=OFFLINE_MODULES,
+                        help='Modules or step scripts (without .py) to check')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    env = offline_env()
+
+    print(f'Import budget: {args.budget_ms:.0f} ms per module (numpy excluded), best of {args.runs}')
+    print(f"{'module':<24} {'own ms':>8} {'numpy ms':>9}  status")
+    failures = 0
+    for name in args.modules:
+        runs = [probe(name, env) for _ in range(args.runs)]
+        errors = [r['error'] for r in runs if 'error' in r]
+        if errors:
+            print(f'{name:<24} {"-":>8} {"-":>9}  FAIL: {errors[0]}')
+            failures += 1
+            continue
+        best = min(runs, key=lambda r: r['own_ms'])
+        problems = []
+        forbidden = sorted({m for r in runs for m in r['forbidden']})
+        if forbidden:
+            problems.append(f'imports {", ".join(forbidden)}')
+        if best['own_ms'] > args.budget_ms:
+            problems.append('over budget')
+        status = 'FAIL: ' + '; '.join(problems) if problems else 'ok'
+        failures += bool(problems)
+        print(f"{name:<24} {best['own_ms']:>8.1f} {best['numpy_ms']:>9.1f}  {status}")
+
+    print()
+    if failures:
+        print(f'{failures} of {len(args.modules)} modules failed')
+        sys.exit(1)
+    print(f'All {len(args.modules)} modules within budget')
+
+
+if __name__ == '__main__':
+    main()
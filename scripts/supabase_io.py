@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Database I/O layer: Supabase client and the actor/connection fetches.
+
+Split out of optimization_utils so that offline steps never import the
+network client: `supabase` is imported only when a real client is created
+(never with SUPABASE_LOCAL_STORE), and `.env` is loaded when this module
+is.  The names are still importable from optimization_utils, which loads
+this module on first access.
+"""
+
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from optimization_utils import graph_limit, load_env
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+load_env()
+
+# Most requests the chunk-pair fallback of fetch_induced_connections may make
+# (chunks squared, before paging); 100 covers up to 5,000 actors
+FALLBACK_MAX_QUERIES = 100
+RPC_PAGE_SIZE = 1000  # Pairs per keyset page from induced_actor_connections
+MISSING_FUNCTION_CODES = ('PGRST202', '42883')  # PostgREST / Postgres: function does not exist
+
+
+def get_supabase_client() -> 'Client':
+    """
+    Initialize and return Supabase client.
+
+    If SUPABASE_LOCAL_STORE is set, returns a LocalSupabase stand-in backed by
+    that JSON file instead (see local_store.py).
+    """
+    local_store = os.getenv('SUPABASE_LOCAL_STORE')
+    if local_store:
+        from local_store import LocalSupabase
+        print(f'Using local Supabase stand-in: {local_store}')
+        return LocalSupabase(Path(local_store))
+
+    supabase_url = os.getenv('VITE_SUPABASE_URL')
+    supabase_key = os.getenv('VITE_SUPABASE_ANON_KEY')
+
+    if not supabase_url or not supabase_key:
+        raise ValueError('VITE_SUPABASE_URL and VITE_SUPABASE_ANON_KEY must be set in .env')
+
+    from supabase import create_client
+    return create_client(supabase_url, supabase_key)
+
+
+def fetch_top_actors(supabase: 'Client', limit: Optional[int] = None) -> list[dict]:
+    """
+    Fetch top actors ordered by Recognizability.
+
+    Args:
+        limit: Number of actors to fetch (defaults to VITE_GRAPH_LIMIT from .env)
+
+    Returns list of dicts with: person_id, name, Recognizability
+    """
+    if limit is None:
+        limit = graph_limit()
+
+    print(f'Fetching top {limit} actors...')
+
+    all_actors = []
+    page_size = 1000
+    start = 0
+
+    while len(all_actors) < limit:
+        remaining = limit - len(all_actors)
+        fetch_count = min(page_size, remaining)
+
+        response = supabase.table('actors') \
+            .select('person_id, name, Recognizability') \
+            .order('Recognizability', desc=True) \
+            .range(start, start + fetch_count - 1) \
+            .execute()
+
+        if not response.data:
+            break
+
+        all_actors.extend(response.data)
+        print(f'\rFetched {len(all_actors)} actors...', end='', flush=True)
+
+        if len(response.data) < fetch_count:
+            break
+        start += fetch_count
+
+    print()
+
+    if not all_actors:
+        raise ValueError('No actors returned from database')
+
+    # Filter out any with null Recognizability
+    actors = [a for a in all_actors if a.get('Recognizability') is not None]
+
+    print(f'Fetched {len(actors)} actors')
+    return actors
+
+
+def fetch_connections(supabase: 'Client', actor_ids: list[int]) -> list[dict]:
+    """
+    Fetch all connections between the given actors.
+
+    Returns list of dicts with: Source, Target
+    """
+    print('Fetching connections...')
+
+    all_connections = []
+    page_size = 1000
+    id_chunk_size = 500  # Keep filter URL within Supabase limits
+
+    for chunk_start in range(0, len(actor_ids), id_chunk_size):
+        chunk = actor_ids[chunk_start:chunk_start + id_chunk_size]
+        actor_ids_str = ','.join(map(str, chunk))
+        start = 0
+
+        while True:
+            response = supabase.table('actor_connections') \
+                .select('Source, Target') \
+                .or_(f'Source.in.({actor_ids_str}),Target.in.({actor_ids_str})') \
+                .range(start, start + page_size - 1) \
+                .execute()
+
+            if response.data and len(response.data) > 0:
+                all_connections.extend(response.data)
+                print(f'\rFetched {len(all_connections)} connections...', end='', flush=True)
+
+                if len(response.data) < page_size:
+                    break
+                start += page_size
+            else:
+                break
+
+    print()
+    return all_connections
+
+
+def fetch_induced_connections(
+    supabase: 'Client',
+    actor_ids: list[int],
+    max_fallback_queries: Optional[int] = FALLBACK_MAX_QUERIES
+) -> list[dict]:
+    """
+    Fetch each connection whose endpoints are both in actor_ids, exactly once.
+
+    Calls the `induced_actor_connections` database function (sql/), which
+    returns distinct (Source, Target) pairs with Source < Target, one keyset
+    page at a time: each call passes the last pair received, so no page is
+    re-sorted past an offset.  If the function is not deployed (or is the
+    older single-argument version), falls back to one query per ordered pair of id
+    chunks (Source in chunk A, Target in chunk B), which never returns edges
+    leaving the actor set; pairs repeated across movies are folded client-side.
+
+    The fallback needs (actors / 500)^2 requests before paging: 64 at 4,000
+    actors, 1,600 at 20,000.  Above max_fallback_queries it raises instead
+    of quietly making thousands of requests.  Any other RPC error, or one
+    after the first page, is raised rather than falling back.
+
+    Args:
+        max_fallback_queries: Request limit for the fallback (None = no limit)
+
+    Returns list of dicts with: Source, Target (Source < Target)
+    """
+    print('Fetching induced connections...')
+
+    connections = []
+    try:
+        while True:
+            params = {'actor_ids': actor_ids, 'page_limit': RPC_PAGE_SIZE}
+            if connections:
+                params['after_source'] = connections[-1]['Source']
+                params['after_target'] = connections[-1]['Target']
+            response = supabase.rpc('induced_actor_connections', params).execute()
+            connections.extend(response.data or [])
+            print(f'\rFetched {len(connections)} connections...', end='', flush=True)
+            if not response.data or len(response.data) < RPC_PAGE_SIZE:
+                break
+        print()
+        return connections
+    except Exception as e:
+        if connections or getattr(e, 'code', None) not in MISSING_FUNCTION_CODES:
+            raise
+        rpc_error = e
+
+    page_size = 1000
+
+    sorted_ids = sorted(actor_ids)
+    id_chunk_size = 500  # Two filters of this size stay within Supabase URL limits
+    chunks = [sorted_ids[i:i + id_chunk_size] for i in range(0, len(sorted_ids), id_chunk_size)]
+    num_queries = len(chunks) ** 2
+    if max_fallback_queries is not None and num_queries > max_fallback_queries:
+        raise RuntimeError(
+            f'induced_actor_connections unavailable ({rpc_error}). The chunk-pair fallback would make '
+            f'{num_queries:,} requests for {len(actor_ids):,} actors (limit {max_fallback_queries:,}). '
+            f'Deploy scripts/sql/induced_actor_connections.sql, or pass max_fallback_queries=None.'
+        )
+    print(f'\ninduced_actor_connections unavailable ({rpc_error}); querying {len(chunks)} x {len(chunks)} '
+          f'chunk pairs ({num_queries:,} requests before paging)')
+
+    pairs = set()
+    rows_fetched = 0
+    for chunk_a in chunks:
+        for chunk_b in chunks:
+            start = 0
+            while True:
+                response = supabase.table('actor_connections') \
+                    .select('Source, Target') \
+                    .in_('Source', chunk_a) \
+                    .in_('Target', chunk_b) \
+                    .range(start, start + page_size - 1) \
+                    .execute()
+
+                rows = response.data or []
+                rows_fetched += len(rows)
+                for row in rows:
+                    source, target = row['Source'], row['Target']
+                    if source != target:
+                        pairs.add((min(source, target), max(source, target)))
+
+                print(f'\rFetched {rows_fetched} rows ({len(pairs)} connections)...', end='', flush=True)
+                if len(rows) < page_size:
+                    break
+                start += page_size
+
+    print()
+    return [{'Source': source, 'Target': target} for source, target in sorted(pairs)]